@@ -7,10 +7,29 @@ Fails if:
 3) memory_log.jsonl missing entry for task_id
 4) Memory entry missing critical fields
 
+Task packets and memory entries are validated in full: memory_log.schema.json and a
+schema derived from task_packet.template.yaml are compiled once into Python validator
+modules (tools/schema_compiler.py), cached under tools/.schema_cache/ and reused until
+the schema, template or gate policy changes.
+
+The latest memory entry for the task is looked up through the SQLite memory index
+when it is fresh for the log, otherwise by scanning the log backwards in blocks, so
+the gate does not need to parse the whole history.
+
+Bulk audit (`--all`, or `--task-glob` for a custom packet set) validates every memory
+entry in the log and every matching task packet in one pass. The log is split into
+byte ranges and the work is fanned out across a process pool. A JSON report with
+per-entry errors, counts and timing is written to `--report`, or to stdout.
+
 Usage:
   python tools/ai_gate_check.py \
     --task-packet res://ai_library/tasks/current_task.yaml \
-    --memory-log res://ai_library/docs/memory_log.jsonl
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    [--db-path res://ai_library/docs/ai_memory_index.db]
+
+  python tools/ai_gate_check.py --all \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    [--task-glob "ai_library/tasks/**/*.yaml"] [--jobs 8] [--report gate_report.json]
 
 Exit code:
   0 = pass
@@ -21,9 +40,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sqlite3
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import yaml  # type: ignore
@@ -31,52 +55,44 @@ except Exception as exc:  # pragma: no cover
     print("ERROR: PyYAML is required. Install with: pip install pyyaml")
     raise
 
+from build_memory_index import LOCATION_COLUMNS, connect_reader, fetch_entries, index_is_fresh
+from jsonl_stream import iter_jsonl_reverse, log_files
+from schema_compiler import Validator, load_json_schema_validator, load_task_packet_validator
+from tracing import add_trace_arguments, run_main, traced
+
+DEFAULT_TASK_GLOB = "ai_library/tasks/**/*.yaml"
+AUDIT_MIN_CHUNK_BYTES = 1024 * 1024
+AUDIT_CHUNKS_PER_WORKER = 4
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MEMORY_SCHEMA_PATH = PROJECT_ROOT / "ai_library" / "docs" / "memory_log.schema.json"
+TASK_TEMPLATE_PATH = PROJECT_ROOT / "ai_library" / "docs" / "task_packet.template.yaml"
+
+NON_BLANK = {"type": "string", "pattern": r"\S"}
 
-REQUIRED_MEMORY_FIELDS = [
-    "memory_id",
-    "timestamp_utc",
-    "task_id",
-    "feature",
-    "expected_behavior",
-    "actual_behavior",
-    "assumptions",
-    "files_touched",
-    "acceptance_checks",
-    "outcome",
-    "confidence",
-    "confidence_calibrated",
-    "failure_tags",
-    "pattern_ids_used",
-    "contract_ids_touched",
-    "fix_summary",
-    "repair_strategy",
-    "prevention_updates",
-    "time_to_green_minutes",
-    "reusability_score",
-    "engine_version",
-    "agent_role",
-]
-
-ALLOWED_FAILURE_TAGS = {
-    "input_contract_violation",
-    "physics_loop_misuse",
-    "move_and_slide_delta_error",
-    "scene_contract_break",
-    "tight_coupling_parent_chain",
-    "patch_scope_violation",
-    "no_acceptance_gate",
-    "version_drift",
-    "silent_dependency_failure",
-    "regression_unchecked",
-    "performance_regression",
-    "serialization_break",
-    "nondeterministic_behavior",
-    "api_contract_drift",
-    "dependency_version_conflict",
-    "test_flakiness",
-    "content_pipeline_mismatch",
+# Gate policy layered on top of the schemas before compilation: the gate is stricter
+# than memory_log.schema.json, and the template alone cannot express non-empty lists.
+MEMORY_GATE_POLICY: Dict[str, Dict[str, Any]] = {
+    "assumptions": {"minItems": 1},
+    "acceptance_checks": {"minItems": 1},
+    "files_touched": {"minItems": 1},
 }
 
+TASK_PACKET_POLICY: Dict[str, Dict[str, Any]] = {
+    "task.task_id": NON_BLANK,
+    "task.max_files_changed": {"minimum": 1},
+    "task.max_lines_changed": {"minimum": 1},
+    "assumptions": {"minItems": 1},
+    "dod_checks": {"minItems": 1},
+    "verification_notes.plan_note": NON_BLANK,
+    "verification_notes.risk_note": NON_BLANK,
+    "verification_notes.verification_note": NON_BLANK,
+}
+for _section in ("acceptance_checks", "regression_checks"):
+    TASK_PACKET_POLICY[f"{_section}.automated_required"] = {"minItems": 1}
+    for _field in ("id", "name", "expected"):
+        TASK_PACKET_POLICY[f"{_section}.automated_required[].{_field}"] = NON_BLANK
+
 
 def fail(msg: str) -> None:
     print(f"[AI-GATE][FAIL] {msg}")
@@ -95,6 +111,7 @@ def resolve_project_path(raw_path: str) -> Path:
     return Path(input_path)
 
 
+@traced("load_yaml")
 def load_yaml(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"Task packet not found: {path}")
@@ -105,25 +122,6 @@ def load_yaml(path: Path) -> Dict[str, Any]:
     return data
 
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    if not path.exists():
-        raise FileNotFoundError(f"Memory log not found: {path}")
-    entries: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for i, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSONL at line {i}: {e}") from e
-            if not isinstance(obj, dict):
-                raise ValueError(f"JSONL line {i} is not an object")
-            entries.append(obj)
-    return entries
-
-
 def get_task_id(task_packet: Dict[str, Any]) -> str:
     task = task_packet.get("task")
     if not isinstance(task, dict):
@@ -134,166 +132,329 @@ def get_task_id(task_packet: Dict[str, Any]) -> str:
     return task_id.strip()
 
 
-def _validate_named_checks(checks: Any, section: str, errors: List[str]) -> int:
-    if not isinstance(checks, list) or len(checks) == 0:
-        errors.append(f"Task packet must include non-empty '{section}' list.")
-        return 0
+def memory_entry_validator() -> Validator:
+    return load_json_schema_validator("memory_log", MEMORY_SCHEMA_PATH, MEMORY_GATE_POLICY)
 
-    valid_count = 0
-    for idx, check in enumerate(checks):
-        if not isinstance(check, dict):
-            errors.append(f"{section}[{idx}] must be an object.")
-            continue
-        for field in ("id", "name", "expected"):
-            value = check.get(field)
-            if not isinstance(value, str) or not value.strip():
-                errors.append(f"{section}[{idx}] missing non-empty '{field}'.")
-        valid_count += 1
-    return valid_count
 
+def task_packet_validator() -> Validator:
+    return load_task_packet_validator("task_packet", TASK_TEMPLATE_PATH, TASK_PACKET_POLICY)
 
-def validate_task_packet(task_packet: Dict[str, Any]) -> List[str]:
-    errors: List[str] = []
-
-    task = task_packet.get("task")
-    if not isinstance(task, dict):
-        errors.append("Task packet must include 'task' object.")
-    else:
-        for field in ("risk_tier", "blast_radius", "max_files_changed", "max_lines_changed"):
-            if field not in task:
-                errors.append(f"Task packet task missing '{field}'.")
-        if isinstance(task.get("max_files_changed"), int) and task["max_files_changed"] <= 0:
-            errors.append("task.max_files_changed must be > 0.")
-        if isinstance(task.get("max_lines_changed"), int) and task["max_lines_changed"] <= 0:
-            errors.append("task.max_lines_changed must be > 0.")
-
-    verification_notes = task_packet.get("verification_notes")
-    if not isinstance(verification_notes, dict):
-        errors.append("Task packet must include 'verification_notes' object.")
-    else:
-        for note_field in ("plan_note", "risk_note", "verification_note"):
-            value = verification_notes.get(note_field)
-            if not isinstance(value, str) or not value.strip():
-                errors.append(f"verification_notes missing non-empty '{note_field}'.")
-
-    assumptions = task_packet.get("assumptions")
-    if not isinstance(assumptions, list) or len(assumptions) == 0:
-        errors.append("Task packet must include non-empty 'assumptions' list.")
-
-    acceptance_checks = task_packet.get("acceptance_checks")
-    if not isinstance(acceptance_checks, dict):
-        errors.append("Task packet must include structured 'acceptance_checks' object.")
-    else:
-        _validate_named_checks(acceptance_checks.get("automated_required"), "acceptance_checks.automated_required", errors)
-
-    regression_checks = task_packet.get("regression_checks")
-    if not isinstance(regression_checks, dict):
-        errors.append("Task packet must include structured 'regression_checks' object.")
-    else:
-        _validate_named_checks(regression_checks.get("automated_required"), "regression_checks.automated_required", errors)
-
-    dod_checks = task_packet.get("dod_checks")
-    if not isinstance(dod_checks, list) or len(dod_checks) == 0:
-        errors.append("Task packet must include non-empty 'dod_checks' list.")
-
-    return errors
 
+def validate_task_packet(task_packet: Dict[str, Any]) -> List[str]:
+    return [f"Task packet {error}" for error in task_packet_validator()(task_packet)]
 
-def validate_memory_entry(entry: Dict[str, Any], task_id: str) -> List[str]:
-    errors: List[str] = []
 
-    for field in REQUIRED_MEMORY_FIELDS:
-        if field not in entry:
-            errors.append(f"Memory entry missing field: '{field}'")
+def validate_memory_entry(entry: Dict[str, Any], task_id: str, validator: Optional[Validator] = None) -> List[str]:
+    """Schema and task_id errors for one entry; loops pass a `memory_entry_validator()` in."""
+    errors = [f"Memory entry {error}" for error in (validator or memory_entry_validator())(entry)]
 
     if entry.get("task_id") != task_id:
         errors.append(
             f"Memory entry task_id '{entry.get('task_id')}' does not match task packet task_id '{task_id}'"
         )
 
-    assumptions = entry.get("assumptions")
-    if not isinstance(assumptions, list) or len(assumptions) == 0:
-        errors.append("Memory entry must include non-empty 'assumptions' list.")
-
-    acceptance_checks = entry.get("acceptance_checks")
-    if not isinstance(acceptance_checks, list) or len(acceptance_checks) == 0:
-        errors.append("Memory entry must include non-empty 'acceptance_checks' list.")
-
-    failure_tags = entry.get("failure_tags")
-    if not isinstance(failure_tags, list):
-        errors.append("Memory entry must include 'failure_tags' list.")
-    else:
-        invalid = [tag for tag in failure_tags if tag not in ALLOWED_FAILURE_TAGS]
-        if invalid:
-            errors.append(f"Memory entry has invalid failure_tags: {', '.join(invalid)}")
-
-    files_touched = entry.get("files_touched")
-    if not isinstance(files_touched, list) or len(files_touched) == 0:
-        errors.append("Memory entry must include non-empty 'files_touched' list.")
-
     return errors
 
 
-def find_latest_memory_entry(entries: List[Dict[str, Any]], task_id: str) -> Dict[str, Any] | None:
-    matches = [e for e in entries if e.get("task_id") == task_id]
-    return matches[-1] if matches else None
-
-
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Validate AI task packet and memory log linkage.")
-    parser.add_argument("--task-packet", required=True, help="Path to task packet YAML")
-    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl")
-    args = parser.parse_args()
-
-    task_packet_path = resolve_project_path(args.task_packet)
-    memory_log_path = resolve_project_path(args.memory_log)
-
-    failed = False
+def lookup_indexed_entry(db_path: Path, memory_log_path: Path, task_id: str) -> Dict[str, Any] | None:
+    """Latest entry for task_id via idx_memories_task_id; raises LookupError if the index is unusable."""
+    if not db_path.exists():
+        raise LookupError(f"Memory index not found: {db_path}")
+    try:
+        conn = connect_reader(db_path)
+    except sqlite3.Error as exc:
+        raise LookupError(str(exc)) from exc
+    try:
+        if not index_is_fresh(conn, memory_log_path):
+            raise LookupError("Memory index is stale for this log")
+        row = conn.execute(
+            f"SELECT {LOCATION_COLUMNS} FROM memories WHERE task_id = ? ORDER BY rowid DESC LIMIT 1",
+            (task_id,),
+        ).fetchone()
+    except sqlite3.Error as exc:
+        raise LookupError(str(exc)) from exc
+    finally:
+        conn.close()
+    return fetch_entries(memory_log_path, [row])[0] if row else None
+
+
+def task_id_needles(task_id: str) -> List[str]:
+    """Byte forms `task_id` can take inside a JSON line: raw UTF-8, and string-escaped as
+    json.dumps writes it with and without ensure_ascii (quotes, backslashes, non-ASCII)."""
+    return sorted({task_id, json.dumps(task_id)[1:-1], json.dumps(task_id, ensure_ascii=False)[1:-1]})
+
+
+def scan_latest_memory_entry(memory_log_path: Path, task_id: str) -> Dict[str, Any] | None:
+    for record in iter_jsonl_reverse(memory_log_path, needles=task_id_needles(task_id)):
+        if record.entry.get("task_id") == task_id:
+            return record.entry
+    return None
+
+
+@traced("lookup_memory")
+def find_latest_memory_entry(
+    memory_log_path: Path, task_id: str, db_path: Path | None
+) -> Tuple[Dict[str, Any] | None, str]:
+    """Return (entry, source) using the fresh SQLite index when possible, else a reverse scan."""
+    if not memory_log_path.exists():
+        raise FileNotFoundError(f"Memory log not found: {memory_log_path}")
+    if db_path is not None:
+        try:
+            return lookup_indexed_entry(db_path, memory_log_path, task_id), "memory index"
+        except LookupError:
+            pass
+    return scan_latest_memory_entry(memory_log_path, task_id), "reverse log scan"
+
+
+@dataclass
+class GateResult:
+    ok: bool
+    task_id: str = ""
+    memory_source: str = ""
+    messages: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[str]:
+        return [text for level, text in self.messages if level == "FAIL"]
+
+    def render(self) -> str:
+        return "\n".join(f"[AI-GATE][{level}] {text}" for level, text in self.messages)
+
+
+def run_gate(task_packet_path: Path, memory_log_path: Path, db_path: Path | None = None) -> GateResult:
+    """Programmatic gate entry point; collects PASS/FAIL messages instead of printing them."""
+    result = GateResult(ok=False)
+
+    def passed(msg: str) -> None:
+        result.messages.append(("PASS", msg))
+
+    def failed(msg: str) -> GateResult:
+        result.messages.append(("FAIL", msg))
+        return result
 
     try:
         task_packet = load_yaml(task_packet_path)
         task_id = get_task_id(task_packet)
-        ok(f"Loaded task packet: {task_packet_path}")
-        ok(f"Task ID: {task_id}")
+        result.task_id = task_id
+        passed(f"Loaded task packet: {task_packet_path}")
+        passed(f"Task ID: {task_id}")
     except Exception as e:
-        fail(str(e))
-        return 1
+        return failed(str(e))
 
     task_errors = validate_task_packet(task_packet)
-    if task_errors:
-        failed = True
-        for err in task_errors:
-            fail(err)
-    else:
-        ok("Task packet contains assumptions and acceptance checks.")
+    for err in task_errors:
+        failed(err)
+    if not task_errors:
+        passed("Task packet contains assumptions and acceptance checks.")
 
     try:
-        entries = load_jsonl(memory_log_path)
-        ok(f"Loaded memory log entries: {len(entries)}")
+        entry, source = find_latest_memory_entry(memory_log_path, task_id, db_path)
+        result.memory_source = source
+        passed(f"Resolved latest memory entry via {source}")
     except Exception as e:
-        fail(str(e))
-        return 1
+        return failed(str(e))
 
-    entry = find_latest_memory_entry(entries, task_id)
     if entry is None:
-        fail(f"No memory_log.jsonl entry found for task_id '{task_id}'")
-        return 1
+        return failed(f"No memory_log.jsonl entry found for task_id '{task_id}'")
 
     mem_errors = validate_memory_entry(entry, task_id)
-    if mem_errors:
-        failed = True
-        for err in mem_errors:
-            fail(err)
-    else:
-        ok("Memory log entry exists and passes required field checks.")
+    for err in mem_errors:
+        failed(err)
+    if not mem_errors:
+        passed("Memory log entry exists and passes required field checks.")
+
+    if task_errors or mem_errors:
+        return failed("AI gate failed.")
+
+    passed("AI gate passed.")
+    result.ok = True
+    return result
+
+
+def split_log(memory_log_path: Path, parts: int) -> List[Tuple[Path, int, int]]:
+    """(file, start, end) byte ranges covering the log (every shard of a shard directory),
+    each starting at a line boundary."""
+    files = [(path, path.stat().st_size) for path in log_files(memory_log_path)]
+    total = sum(size for _, size in files)
+    chunk = max(AUDIT_MIN_CHUNK_BYTES, -(-total // max(1, parts)))
+    ranges: List[Tuple[Path, int, int]] = []
+    for path, size in files:
+        start = 0
+        with path.open("rb") as handle:
+            while start < size:
+                handle.seek(min(size, start + chunk))
+                handle.readline()
+                end = min(size, handle.tell())
+                ranges.append((path, start, end))
+                start = end
+    return ranges
+
+
+def _entry_failure(line: int, offset: int, entry: Dict[str, Any] | None, errors: List[str]) -> Dict[str, Any]:
+    entry = entry or {}
+    return {"line": line, "offset": offset, "memory_id": entry.get("memory_id"), "task_id": entry.get("task_id"), "errors": errors}
+
+
+def audit_log_range(memory_log_path: str, start: int, end: int) -> Dict[str, Any]:
+    """Validate every entry in one byte range; line numbers are relative to the range."""
+    validator = memory_entry_validator()
+    failures: List[Dict[str, Any]] = []
+    latest: Dict[str, Dict[str, Any]] = {}
+    entries = 0
+    lines = 0
+    with open(memory_log_path, "rb") as handle:
+        handle.seek(start)
+        position = start
+        for raw in handle:
+            if position >= end:
+                break
+            offset = position
+            position += len(raw)
+            lines += 1
+            text = raw.decode("utf-8", errors="replace").strip()
+            if not text:
+                continue
+            entries += 1
+            try:
+                entry = json.loads(text)
+            except json.JSONDecodeError as exc:
+                failures.append(_entry_failure(lines, offset, None, [f"Invalid JSON: {exc}"]))
+                continue
+            if not isinstance(entry, dict):
+                failures.append(_entry_failure(lines, offset, None, ["Line is not a JSON object"]))
+                continue
+            task_id = entry.get("task_id")
+            errors = validate_memory_entry(entry, task_id, validator)
+            if errors:
+                failures.append(_entry_failure(lines, offset, entry, errors))
+            if isinstance(task_id, str):
+                latest[task_id] = {"line": lines, "offset": offset, "memory_id": entry.get("memory_id"), "errors": errors}
+    return {"start": start, "entries": entries, "lines": lines, "failures": failures, "latest": latest}
+
+
+def audit_task_packet(task_packet_path: str) -> Dict[str, Any]:
+    try:
+        task_packet = load_yaml(Path(task_packet_path))
+        task_id = get_task_id(task_packet)
+    except Exception as exc:
+        return {"path": task_packet_path, "task_id": None, "errors": [str(exc)]}
+    return {"path": task_packet_path, "task_id": task_id, "errors": validate_task_packet(task_packet)}
+
+
+@traced("audit")
+def run_audit(memory_log_path: Path, task_packet_paths: List[Path], jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Validate the whole log and every task packet across a process pool; returns the JSON report."""
+    if not memory_log_path.exists():
+        raise FileNotFoundError(f"Memory log not found: {memory_log_path}")
+    started = time.perf_counter()
+    workers = max(1, jobs or os.cpu_count() or 1)
+    ranges = split_log(memory_log_path, workers * AUDIT_CHUNKS_PER_WORKER)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        log_futures = [pool.submit(audit_log_range, str(path), start, end) for path, start, end in ranges]
+        packet_futures = [pool.submit(audit_task_packet, str(path)) for path in task_packet_paths]
+        chunks = [future.result() for future in log_futures]
+        packets = [future.result() for future in packet_futures]
+
+    # Line numbers are per file; records from a shard directory also name their shard.
+    sharded = memory_log_path.is_dir()
+    entry_failures: List[Dict[str, Any]] = []
+    latest: Dict[str, Dict[str, Any]] = {}
+    line_base = 0
+    entries = 0
+    current_file = None
+    for (path, _, _), chunk in zip(ranges, chunks):
+        if path != current_file:
+            current_file = path
+            line_base = 0
+        located = {"shard": path.name} if sharded else {}
+        for failure in chunk["failures"]:
+            entry_failures.append({**failure, **located, "line": failure["line"] + line_base})
+        for task_id, record in chunk["latest"].items():
+            latest[task_id] = {**record, **located, "line": record["line"] + line_base}
+        line_base += chunk["lines"]
+        entries += chunk["entries"]
+
+    for packet in packets:
+        task_id = packet["task_id"]
+        if task_id is None:
+            continue
+        record = latest.get(task_id)
+        if record is None:
+            packet["errors"].append(f"No memory_log.jsonl entry found for task_id '{task_id}'")
+            continue
+        packet["latest_memory"] = {key: record[key] for key in ("shard", "line", "memory_id") if key in record}
+        where = f"{record['shard']} line {record['line']}" if "shard" in record else f"line {record['line']}"
+        packet["errors"].extend(f"Latest memory entry ({where}): {err}" for err in record["errors"])
+    for packet in packets:
+        packet["ok"] = not packet["errors"]
+
+    failed_packets = sum(1 for packet in packets if not packet["ok"])
+    return {
+        "ok": not entry_failures and failed_packets == 0,
+        "memory_log": str(memory_log_path),
+        "workers": workers,
+        "chunks": len(ranges),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "counts": {
+            "memory_entries": entries,
+            "memory_entries_failed": len(entry_failures),
+            "task_ids": len(latest),
+            "task_packets": len(packets),
+            "task_packets_failed": failed_packets,
+        },
+        "memory_failures": entry_failures,
+        "task_packets": packets,
+    }
+
 
-    if failed:
-        fail("AI gate failed.")
-        return 1
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate AI task packet and memory log linkage.")
+    parser.add_argument("--task-packet", help="Path to task packet YAML (single-task mode)")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument(
+        "--db-path",
+        default="res://ai_library/docs/ai_memory_index.db",
+        help="SQLite memory index used for the lookup when fresh (empty string disables)",
+    )
+    parser.add_argument("--all", action="store_true", help="Audit every memory entry and every task packet")
+    parser.add_argument("--task-glob", help=f"Project-relative glob of task packets to audit (default: {DEFAULT_TASK_GLOB})")
+    parser.add_argument("--jobs", type=int, default=None, help="Audit worker processes (default: CPU count)")
+    parser.add_argument("--report", help="Write the audit JSON report here instead of stdout")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
 
-    ok("AI gate passed.")
-    return 0
+    if args.all or args.task_glob:
+        project_root = Path(__file__).resolve().parents[1]
+        packets = sorted(project_root.glob(args.task_glob or DEFAULT_TASK_GLOB))
+        report = run_audit(resolve_project_path(args.memory_log), packets, args.jobs)
+        payload = json.dumps(report, indent=2)
+        if args.report:
+            report_path = resolve_project_path(args.report)
+            report_path.parent.mkdir(parents=True, exist_ok=True)
+            report_path.write_text(payload + "\n", encoding="utf-8")
+            counts = report["counts"]
+            summary = (
+                f"{counts['memory_entries']} memory entries ({counts['memory_entries_failed']} failed), "
+                f"{counts['task_packets']} task packets ({counts['task_packets_failed']} failed) "
+                f"in {report['wall_seconds']}s; report: {report_path}"
+            )
+            (ok if report["ok"] else fail)(summary)
+        else:
+            print(payload)
+        return 0 if report["ok"] else 1
+
+    if not args.task_packet:
+        parser.error("--task-packet is required unless --all or --task-glob is given")
+    result = run_gate(
+        resolve_project_path(args.task_packet),
+        resolve_project_path(args.memory_log),
+        resolve_project_path(args.db_path) if args.db_path else None,
+    )
+    for level, text in result.messages:
+        (ok if level == "PASS" else fail)(text)
+    return 0 if result.ok else 1
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(run_main(main))
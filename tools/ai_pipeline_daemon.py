@@ -1,16 +1,51 @@
 #!/usr/bin/env python3
 import argparse
+import importlib
 import json
 import subprocess
 import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from types import ModuleType
+from typing import Dict, List, Optional
+
+from file_watcher import create_watcher
+from pipeline_dag import Step, StepOutcome, run_dag
+from step_cache import StepCache, cached_runner
+from tracing import TRACER, add_trace_arguments, run_main, span, summarize, write_chrome_trace
 
 ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = ROOT / "tools"
 STATE_PATH = ROOT / "tools" / ".pipeline_state.json"
+CACHE_PATH = ROOT / "tools" / ".pipeline_cache.json"
+TRACE_PATH = ROOT / "tools" / ".pipeline_trace.json"
+
+TASK_PACKET = "res://ai_library/tasks/current_task.yaml"
+MEMORY_LOG = "res://ai_library/docs/memory_log.jsonl"
+MEMORY_LOG_SHARDS = "res://ai_library/docs/memory_log"
+MEMORY_LOG_INPUTS = ["ai_library/docs/memory_log.jsonl", "ai_library/docs/memory_log/"]
+MEMORY_INDEX = "res://ai_library/docs/ai_memory_index.db"
+
+INDEX_TOOL_INPUTS = ["tools/build_memory_index.py", "tools/jsonl_stream.py", "tools/tracing.py"]
+GATE_TOOL_INPUTS = [
+    "tools/ai_gate_check.py",
+    "tools/build_memory_index.py",
+    "tools/jsonl_stream.py",
+    "tools/schema_compiler.py",
+    "tools/tracing.py",
+    "ai_library/docs/memory_log.schema.json",
+    "ai_library/docs/task_packet.template.yaml",
+]
+BRIEF_INPUTS = [
+    "src/data/sections_manifest.json",
+    "src/data/artifacts_manifest.json",
+    "src/cli/manifest_cli.ts",
+    "src/state/",
+    "package.json",
+]
 
+# Plain entries are files; entries ending in "/" are watched recursively.
 WATCH_FILES = [
     "ai_library/tasks/current_task.yaml",
     "ai_library/docs/memory_log.jsonl",
@@ -18,6 +53,11 @@ WATCH_FILES = [
     "src/data/artifacts_manifest.json",
     "package.json",
 ]
+WATCH_DIRS = [
+    "ai_library/systems/",
+    "ai_library/docs/memory_log/",
+    "src/data/",
+]
 
 
 @dataclass
@@ -27,33 +67,6 @@ class CmdResult:
     output: str
 
 
-def resolve(path: str) -> Path:
-    return ROOT / path
-
-
-def file_fingerprint(path: Path) -> Optional[Tuple[int, int]]:
-    if not path.exists() or not path.is_file():
-        return None
-    stat = path.stat()
-    return (stat.st_mtime_ns, stat.st_size)
-
-
-def snapshot(paths: List[str]) -> Dict[str, Optional[Tuple[int, int]]]:
-    snap: Dict[str, Optional[Tuple[int, int]]] = {}
-    for rel in paths:
-        snap[rel] = file_fingerprint(resolve(rel))
-    return snap
-
-
-def diff_snapshots(old: Dict[str, Optional[Tuple[int, int]]], new: Dict[str, Optional[Tuple[int, int]]]) -> List[str]:
-    changed: List[str] = []
-    keys = set(old.keys()) | set(new.keys())
-    for key in sorted(keys):
-        if old.get(key) != new.get(key):
-            changed.append(key)
-    return changed
-
-
 def run_cmd(command: str) -> CmdResult:
     proc = subprocess.run(
         command,
@@ -66,6 +79,73 @@ def run_cmd(command: str) -> CmdResult:
     return CmdResult(ok=proc.returncode == 0, code=proc.returncode, output=output.strip())
 
 
+def _local_modules() -> Dict[str, Path]:
+    """Imported modules whose source lives directly in tools/, by module name."""
+    found: Dict[str, Path] = {}
+    for module_name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file and Path(file).resolve().parent == TOOLS_DIR:
+            found[module_name] = Path(file).resolve()
+    return found
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+# The daemon's own modules stay loaded (TRACER and the step types must not be swapped out
+# mid-run); mtimes of every other tools/ module loaded through load_tool().
+_DAEMON_MODULES = frozenset(_local_modules())
+_TOOL_STAMPS: Dict[Path, int] = {}
+
+
+def load_tool(name: str) -> ModuleType:
+    """Import a tools/ module for in-process use, with fresh code for it and its helpers.
+
+    When any tools/ module loaded so far changed on disk, all of them are dropped from
+    sys.modules before the import, so an edit to build_memory_index or jsonl_stream
+    reaches ai_gate_check too instead of only reloading the top-level module.
+    """
+    if any(_mtime_ns(path) != mtime for path, mtime in _TOOL_STAMPS.items()):
+        for module_name in set(_local_modules()) - _DAEMON_MODULES:
+            del sys.modules[module_name]
+        _TOOL_STAMPS.clear()
+    module = importlib.import_module(name)
+    for module_name, path in _local_modules().items():
+        if module_name not in _DAEMON_MODULES:
+            _TOOL_STAMPS.setdefault(path, _mtime_ns(path))
+    return module
+
+
+def memory_log_source() -> str:
+    """The shard directory once it exists (see memory_shards.py), otherwise the single-file log."""
+    return MEMORY_LOG_SHARDS if (ROOT / "ai_library" / "docs" / "memory_log").is_dir() else MEMORY_LOG
+
+
+def gate_action() -> StepOutcome:
+    gate = load_tool("ai_gate_check")
+    result = gate.run_gate(
+        gate.resolve_project_path(TASK_PACKET),
+        gate.resolve_project_path(memory_log_source()),
+        gate.resolve_project_path(MEMORY_INDEX),
+    )
+    details = {"task_id": result.task_id, "memory_source": result.memory_source, "errors": result.errors}
+    return StepOutcome(result.ok, 0 if result.ok else 1, result.render(), details=details)
+
+
+def index_action() -> StepOutcome:
+    indexer = load_tool("build_memory_index")
+    result = indexer.build_index(
+        indexer.resolve_project_path(memory_log_source()), indexer.resolve_project_path(MEMORY_INDEX)
+    )
+    details = {"mode": result.mode, "new_entries": result.new_entries, "memories": result.memories}
+    output = f"[INDEX][PASS] Refresh mode: {result.mode} (+{result.new_entries} entries); memories={result.memories}"
+    return StepOutcome(True, 0, output, details=details)
+
+
 def write_state(payload: dict) -> None:
     STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
     STATE_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
@@ -78,9 +158,11 @@ def classify_changes(changed: List[str]) -> dict:
     should_gate = any(
         p.endswith("current_task.yaml")
         or p.endswith("memory_log.jsonl")
+        or p.startswith("ai_library/docs/memory_log/")
         or p.endswith("package.json")
         or p.endswith("sections_manifest.json")
         or p.endswith("artifacts_manifest.json")
+        or p.startswith("ai_library/systems/")
         for p in changed
     )
 
@@ -94,54 +176,92 @@ def classify_changes(changed: List[str]) -> dict:
     return {"should_gate": should_gate, "should_brief": should_brief}
 
 
-def run_pipeline(focus: Optional[str]) -> dict:
-    steps = []
+def build_pipeline(focus: Optional[str]) -> List[Step]:
+    steps = [
+        Step(
+            name="manifest:lint:artifacts",
+            command="npm run manifest:lint:artifacts",
+            inputs=[
+                "src/data/artifacts_manifest.json",
+                "schemas/artifacts_manifest.schema.json",
+                "src/cli/lint_artifacts_manifest.ts",
+                "package.json",
+            ],
+        ),
+        Step(
+            name="build_memory_index",
+            command=f"python tools/build_memory_index.py --memory-log {memory_log_source()} --db-path {MEMORY_INDEX}",
+            inputs=MEMORY_LOG_INPUTS + INDEX_TOOL_INPUTS,
+            outputs=["ai_library/docs/ai_memory_index.db"],
+            action=index_action,
+        ),
+        Step(
+            name="ai_gate_check",
+            command=f"python tools/ai_gate_check.py --task-packet {TASK_PACKET} --memory-log {memory_log_source()}",
+            inputs=["ai_library/tasks/current_task.yaml"] + MEMORY_LOG_INPUTS + GATE_TOOL_INPUTS,
+            after=["build_memory_index"],
+            action=gate_action,
+        ),
+        Step(
+            name="manifest:brief:full:artifacts",
+            command="npm run manifest:brief:full:artifacts",
+            inputs=BRIEF_INPUTS,
+            after=["manifest:lint:artifacts", "ai_gate_check"],
+            outputs=["docs/brief_full.md"],
+        ),
+    ]
 
-    lint = run_cmd("npm run manifest:lint:artifacts")
-    steps.append({"name": "manifest:lint:artifacts", "ok": lint.ok, "code": lint.code, "output": lint.output})
-    if not lint.ok:
-        return {"ok": False, "steps": steps}
+    if focus:
+        steps.append(
+            Step(
+                name=f"manifest:brief:custom (focus={focus})",
+                command=f"npm run manifest:brief:custom -- --output docs/brief_{focus.replace('.', '_')}.md --focus {focus} --depth 2 --format markdown --with-artifacts src/data/artifacts_manifest.json",
+                inputs=BRIEF_INPUTS,
+                after=["manifest:lint:artifacts", "ai_gate_check"],
+                outputs=[f"docs/brief_{focus.replace('.', '_')}.md"],
+            )
+        )
+    return steps
 
-    gate = run_cmd(
-        "python tools/ai_gate_check.py --task-packet res://ai_library/tasks/current_task.yaml --memory-log res://ai_library/docs/memory_log.jsonl"
-    )
-    steps.append({"name": "ai_gate_check", "ok": gate.ok, "code": gate.code, "output": gate.output})
-    if not gate.ok:
-        return {"ok": False, "steps": steps}
 
-    brief_full = run_cmd("npm run manifest:brief:full:artifacts")
-    steps.append({"name": "manifest:brief:full:artifacts", "ok": brief_full.ok, "code": brief_full.code, "output": brief_full.output})
-    if not brief_full.ok:
-        return {"ok": False, "steps": steps}
+def run_step(step: Step) -> StepOutcome:
+    with span(f"step:{step.name}"):
+        if step.action is not None:
+            return step.action()
+        result = run_cmd(step.command)
+        return StepOutcome(result.ok, result.code, result.output)
 
-    if focus:
-        brief_focus = run_cmd(
-            f"npm run manifest:brief:custom -- --output docs/brief_{focus.replace('.', '_')}.md --focus {focus} --depth 2 --format markdown --with-artifacts src/data/artifacts_manifest.json"
-        )
-        steps.append({
-            "name": f"manifest:brief:custom (focus={focus})",
-            "ok": brief_focus.ok,
-            "code": brief_focus.code,
-            "output": brief_focus.output,
-        })
-        if not brief_focus.ok:
-            return {"ok": False, "steps": steps}
 
-    return {"ok": True, "steps": steps}
+def run_pipeline(focus: Optional[str], jobs: int = 4, cache: Optional[StepCache] = None) -> dict:
+    runner = cached_runner(cache, run_step) if cache is not None else run_step
+    result = run_dag(build_pipeline(focus), runner, max_workers=jobs)
+    if cache is not None:
+        cache.save()
+    return result
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Background smart runner for AI pipeline checks and briefs.")
-    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Polling interval in seconds.")
+    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Polling interval in seconds (polling watcher only).")
     parser.add_argument("--debounce-seconds", type=float, default=3.0, help="Debounce interval before a run.")
     parser.add_argument("--focus", type=str, default=None, help="Optional focus section id for a focused brief (e.g. 3.0).")
     parser.add_argument("--once", action="store_true", help="Run one cycle and exit.")
+    parser.add_argument("--jobs", type=int, default=4, help="Maximum pipeline steps run concurrently.")
+    parser.add_argument("--no-cache", action="store_true", help="Always execute steps instead of replaying cached results.")
+    parser.add_argument(
+        "--watcher",
+        choices=("auto", "inotify", "poll"),
+        default="auto",
+        help="Change detection backend; auto prefers inotify and falls back to polling.",
+    )
+    parser.add_argument("--watch", action="append", default=[], help="Extra file or directory/ to watch (repeatable).")
+    add_trace_arguments(parser)
     args = parser.parse_args()
 
     print("[PIPELINE] Smart daemon starting...")
     print(f"[PIPELINE] Root: {ROOT}")
 
-    prev = snapshot(WATCH_FILES)
+    cache = None if args.no_cache else StepCache(ROOT, CACHE_PATH)
     pending_since: Optional[float] = None
     pending_changes: List[str] = []
 
@@ -161,9 +281,15 @@ def main() -> None:
             return
 
         print(f"[PIPELINE] Running intelligent pipeline for changes: {', '.join(changed)}")
-        result = run_pipeline(args.focus)
+        TRACER.drain()
+        result = run_pipeline(args.focus, jobs=args.jobs, cache=cache)
+        events = TRACER.events()
         run_record["ok"] = result["ok"]
+        run_record["wall_seconds"] = result["wall_seconds"]
         run_record["steps"] = result["steps"]
+        run_record["spans"] = summarize(events)
+        run_record["trace"] = str(TRACE_PATH.relative_to(ROOT))
+        write_chrome_trace(TRACE_PATH, events)
         write_state(run_record)
 
         if result["ok"]:
@@ -175,14 +301,15 @@ def main() -> None:
         execute(WATCH_FILES)
         return
 
-    print("[PIPELINE] Watching for changes...")
+    watcher = create_watcher(ROOT, WATCH_FILES + WATCH_DIRS + args.watch, args.poll_seconds, mode=args.watcher)
+    print(f"[PIPELINE] Watching for changes ({type(watcher).__name__})...")
     try:
         while True:
-            time.sleep(args.poll_seconds)
-            current = snapshot(WATCH_FILES)
-            changed = diff_snapshots(prev, current)
+            timeout = None
+            if pending_since is not None:
+                timeout = max(0.0, args.debounce_seconds - (time.time() - pending_since))
+            changed = watcher.wait(timeout)
             if changed:
-                prev = current
                 pending_changes = sorted(set(pending_changes + changed))
                 pending_since = time.time()
                 print(f"[PIPELINE] Change detected: {', '.join(changed)}")
@@ -196,7 +323,9 @@ def main() -> None:
     except KeyboardInterrupt:
         print("\n[PIPELINE] Stopped by user.")
         sys.exit(0)
+    finally:
+        watcher.close()
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmarks memory index ingestion on a synthetic memory log.
+
+Compares the original row-at-a-time ingestion (one execute per memory, FTS row, link
+row and rollup update, secondary indexes maintained during the load) against the
+batched executemany path, build_memory_index.rebuild_index_records(). Both parse the
+log with JsonlStream and write the same rows into a fresh database; the sync_index()
+extras around a real rebuild (prefix hashing, index_meta, the shadow copy) are left out
+so the numbers isolate the batching.
+
+Usage:
+  python tools/bench_memory_index.py --entries 500000 [--json-out bench.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from build_memory_index import (
+    EntryLocation,
+    RollupAccumulator,
+    _iter_strings,
+    _iter_tags,
+    _join_text,
+    _stream_records,
+    ensure_schema,
+    rebuild_index_records,
+)
+from jsonl_stream import JsonlStream
+
+FAILURE_TAGS = [
+    "input_contract_violation",
+    "physics_loop_misuse",
+    "move_and_slide_delta_error",
+    "scene_contract_break",
+    "tight_coupling_parent_chain",
+    "patch_scope_violation",
+    "no_acceptance_gate",
+    "version_drift",
+    "silent_dependency_failure",
+    "regression_unchecked",
+    "performance_regression",
+    "serialization_break",
+    "nondeterministic_behavior",
+    "api_contract_drift",
+    "dependency_version_conflict",
+    "test_flakiness",
+    "content_pipeline_mismatch",
+]
+SUBSYSTEMS = ["movement", "combat", "ai", "interaction", "ui", "core"]
+ROLES = ["planner", "coder", "validator", "integrator", "reflector", "documenter"]
+OUTCOMES = ["success", "success", "success", "partial", "failed", "rolled_back"]
+WORDS = (
+    "jump apex gravity velocity input action physics process signal scene contract hitbox "
+    "health damage projectile patrol chase state machine interact detector hud label regression"
+).split()
+
+
+def synthesize_entry(index: int, rng: random.Random) -> Dict[str, Any]:
+    subsystem = rng.choice(SUBSYSTEMS)
+    outcome = rng.choice(OUTCOMES)
+    task_id = f"M{index // 1000 + 1}-T{index % 1000:03d}"
+    phrase = " ".join(rng.sample(WORDS, 6))
+    confidence = round(rng.uniform(0.4, 0.99), 2)
+    return {
+        "memory_id": f"MEM-{task_id}-{index:07d}",
+        "timestamp_utc": f"2026-02-{index % 28 + 1:02d}T{index % 24:02d}:{index % 60:02d}:00Z",
+        "task_id": task_id,
+        "feature": f"{subsystem} {phrase}",
+        "agent_role": rng.choice(ROLES),
+        "engine_version": "4.5",
+        "expected_behavior": f"Expected {phrase} to stay stable.",
+        "actual_behavior": f"Observed {phrase} drift." if outcome != "success" else "Behaved as expected.",
+        "assumptions": [f"{subsystem} contract unchanged"],
+        "pattern_ids_used": [f"PATTERN-{subsystem.upper()}-{rng.randint(1, 20):03d}"],
+        "contract_ids_touched": [f"CONTRACT-API-{subsystem.upper()}-{rng.randint(1, 10):03d}"],
+        "files_touched": [f"res://ai_library/systems/{subsystem}/{rng.choice(WORDS)}.gd"],
+        "acceptance_checks": [{"name": f"AC {phrase}", "result": "pass" if outcome == "success" else "fail"}],
+        "regression_checks": [{"name": "RC startup sanity", "result": "pass"}],
+        "outcome": outcome,
+        "failure_tags": [] if outcome == "success" else rng.sample(FAILURE_TAGS, rng.randint(1, 3)),
+        "root_cause": "unknown" if outcome == "success" else "logic_bug",
+        "fix_summary": f"Adjusted {phrase}.",
+        "repair_strategy": "Minimal patch and replay validation.",
+        "prevention_updates": [f"Added check for {rng.choice(WORDS)}."],
+        "confidence": confidence,
+        "confidence_calibrated": round(max(0.0, confidence - rng.uniform(0.0, 0.2)), 2),
+        "reusability_score": round(rng.uniform(0.2, 0.95), 2),
+        "time_spent_minutes": rng.randint(5, 240),
+        "time_to_green_minutes": rng.randint(5, 240),
+        "notes": f"Synthetic entry {index}.",
+    }
+
+
+def write_synthetic_log(path: Path, count: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    with path.open("w", encoding="utf-8") as handle:
+        for index in range(count):
+            handle.write(json.dumps(synthesize_entry(index, rng), ensure_ascii=False))
+            handle.write("\n")
+
+
+def legacy_rebuild_index(records: List[Tuple[Dict[str, Any], EntryLocation]], connection: sqlite3.Connection) -> None:
+    """Row-at-a-time ingestion as it existed before batching; kept as the benchmark baseline."""
+    for idx, (entry, (source_file, byte_offset, byte_length)) in enumerate(records, start=1):
+        memory_id = str(entry.get("memory_id") or f"MEM-AUTO-{idx:06d}")
+        task_id = str(entry.get("task_id") or "")
+        cursor = connection.execute(
+            """
+            INSERT INTO memories (
+                memory_id, task_id, feature, agent_role, engine_version,
+                outcome, confidence, confidence_calibrated, root_cause,
+                expected_behavior, actual_behavior, fix_summary, repair_strategy, notes,
+                assumptions, prevention_updates, source_file, byte_offset, byte_length
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                memory_id,
+                task_id,
+                str(entry.get("feature", "")),
+                str(entry.get("agent_role", "")),
+                str(entry.get("engine_version", "")),
+                str(entry.get("outcome", "")),
+                float(entry.get("confidence", 0.0) or 0.0),
+                float(entry.get("confidence_calibrated", 0.0) or 0.0),
+                str(entry.get("root_cause", "")),
+                str(entry.get("expected_behavior", "")),
+                str(entry.get("actual_behavior", "")),
+                str(entry.get("fix_summary", "")),
+                str(entry.get("repair_strategy", "")),
+                str(entry.get("notes", "")),
+                _join_text(entry.get("assumptions", [])),
+                _join_text(entry.get("prevention_updates", [])),
+                source_file,
+                byte_offset,
+                byte_length,
+            ),
+        )
+        connection.execute(
+            """
+            INSERT INTO memory_fts (
+                rowid, memory_id, task_id, feature, expected_behavior, actual_behavior,
+                fix_summary, notes, assumptions, prevention_updates
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                cursor.lastrowid,
+                memory_id,
+                task_id,
+                str(entry.get("feature", "")),
+                str(entry.get("expected_behavior", "")),
+                str(entry.get("actual_behavior", "")),
+                str(entry.get("fix_summary", "")),
+                str(entry.get("notes", "")),
+                _join_text(entry.get("assumptions", [])),
+                _join_text(entry.get("prevention_updates", [])),
+            ),
+        )
+        for tag in _iter_tags(entry):
+            connection.execute(
+                "INSERT OR IGNORE INTO memory_failure_tags (memory_id, failure_tag) VALUES (?, ?)",
+                (memory_id, tag),
+            )
+        for contract_id in _iter_strings(entry, "contract_ids_touched"):
+            connection.execute(
+                "INSERT OR IGNORE INTO memory_contract_ids (memory_id, contract_id) VALUES (?, ?)",
+                (memory_id, contract_id),
+            )
+        for pattern_id in _iter_strings(entry, "pattern_ids_used"):
+            connection.execute(
+                "INSERT OR IGNORE INTO memory_pattern_ids (memory_id, pattern_id) VALUES (?, ?)",
+                (memory_id, pattern_id),
+            )
+        rollups = RollupAccumulator()
+        rollups.add(memory_id, entry)
+        rollups.flush(connection)
+
+
+def time_legacy(log_path: Path, db_path: Path) -> float:
+    with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
+        conn.commit()
+        started = time.perf_counter()
+        legacy_rebuild_index(list(_stream_records(JsonlStream(log_path))), conn)
+        conn.commit()
+    return time.perf_counter() - started
+
+
+def time_batched(log_path: Path, db_path: Path) -> float:
+    with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
+        conn.commit()
+        started = time.perf_counter()
+        rebuild_index_records(_stream_records(JsonlStream(log_path)), conn)
+        conn.commit()
+    return time.perf_counter() - started
+
+
+def table_counts(db_path: Path) -> Dict[str, int]:
+    tables = ["memories", "memory_fts", "memory_failure_tags", "memory_contract_ids", "memory_pattern_ids",
+              "memory_days", "daily_rollup", "daily_counts"]
+    with sqlite3.connect(db_path) as conn:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark memory index ingestion on a synthetic log.")
+    parser.add_argument("--entries", type=int, default=500000, help="Number of synthetic memory entries")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the synthetic log")
+    parser.add_argument("--json-out", help="Optional path for machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_memory_index_") as tmp:
+        tmp_dir = Path(tmp)
+        log_path = tmp_dir / "memory_log.jsonl"
+        write_synthetic_log(log_path, args.entries, seed=args.seed)
+        print(f"[BENCH] Synthetic log: {args.entries} entries, {log_path.stat().st_size / 1e6:.1f} MB")
+
+        legacy_seconds = time_legacy(log_path, tmp_dir / "legacy.db")
+        batched_seconds = time_batched(log_path, tmp_dir / "batched.db")
+        legacy_counts = table_counts(tmp_dir / "legacy.db")
+        batched_counts = table_counts(tmp_dir / "batched.db")
+        if legacy_counts != batched_counts:
+            print(f"[BENCH][FAIL] Paths wrote different rows: legacy={legacy_counts} batched={batched_counts}")
+            return 1
+
+    results = {
+        "entries": args.entries,
+        "legacy_seconds": round(legacy_seconds, 3),
+        "legacy_entries_per_second": round(args.entries / legacy_seconds, 1),
+        "batched_seconds": round(batched_seconds, 3),
+        "batched_entries_per_second": round(args.entries / batched_seconds, 1),
+        "speedup": round(legacy_seconds / batched_seconds, 2),
+    }
+    print(f"[BENCH] legacy : {results['legacy_seconds']:.2f}s ({results['legacy_entries_per_second']:.0f} entries/s)")
+    print(f"[BENCH] batched: {results['batched_seconds']:.2f}s ({results['batched_entries_per_second']:.0f} entries/s)")
+    print(f"[BENCH] speedup: {results['speedup']:.2f}x")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
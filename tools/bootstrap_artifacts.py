@@ -1,65 +1,141 @@
 #!/usr/bin/env python3
+"""
+Bootstrap src/data/artifacts_manifest.json from src/data/sections_manifest.json.
+
+By default the existing manifest is merged: its artifacts are kept as they are
+(including their created_at stamps), and only section/artifact-type combinations that
+have no artifact yet are added. If the merged manifest equals the one on disk, the
+file is not touched, so the pipeline daemon's manifest watch does not fire. Writes go
+to a temp file in the same directory that is then renamed over the manifest.
+`--rebuild` regenerates every artifact from scratch.
+
+Usage:
+  python tools/bootstrap_artifacts.py [--rebuild]
+"""
+
+import argparse
 import json
+import os
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from tracing import add_trace_arguments, run_main, traced
 
 ROOT = Path(__file__).resolve().parents[1]
 SECTIONS_PATH = ROOT / "src" / "data" / "sections_manifest.json"
 ARTIFACTS_PATH = ROOT / "src" / "data" / "artifacts_manifest.json"
+MANIFEST_VERSION = "1.0.0"
 
 
 def load_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def main() -> None:
-    sections = load_json(SECTIONS_PATH)
+def bootstrap_artifact(project_id: str, sid: Any, artifact_type: str, now: str) -> Dict[str, Any]:
+    return {
+        "artifact_id": f"art.{sid}.{artifact_type}.v1",
+        "project_id": project_id,
+        "section_id": sid,
+        "task_id": f"task-{str(sid).replace('.', '-')}",
+        "producer_agent": "integrator",
+        "artifact_type": artifact_type,
+        "title": f"Section {sid} {artifact_type}",
+        "summary": "Bootstrapped artifact for CI completeness baseline",
+        "status": "final",
+        "created_at": now,
+        "updated_at": now,
+        "inspect_payload": {
+            "source": "bootstrap",
+            "section": sid,
+            "artifact_type": artifact_type,
+        },
+        "verification": {
+            "verify_pass": True,
+            "check_count": 0,
+            "failed_checks": [],
+        },
+        "tags": ["bootstrap", f"section:{sid}"],
+    }
 
-    now = datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-    artifacts = []
 
+@traced("merge_manifest")
+def merge_manifest(existing: Dict[str, Any], sections: Dict[str, Any], now: str) -> Tuple[Dict[str, Any], int]:
+    """Existing artifacts plus a bootstrap artifact for every missing section/type pair.
+
+    Artifacts are grouped by section in sections-manifest order, keeping their existing
+    order within a section; new ones follow their section's existing artifacts.
+    Artifacts for sections that are no longer listed are kept at the end.
+    """
+    project_id = sections.get("project_type", "unknown")
+    by_section: Dict[str, List[Dict[str, Any]]] = {}
+    for item in existing.get("artifacts", []):
+        by_section.setdefault(str(item.get("section_id")), []).append(item)
+
+    artifacts: List[Dict[str, Any]] = []
+    added = 0
     for section in sections.get("sections", []):
         sid = section.get("id")
+        current = by_section.pop(str(sid), [])
+        present = {item.get("artifact_type") for item in current}
+        artifacts.extend(current)
         for artifact_type in section.get("required_artifact_types", []):
-            artifacts.append(
-                {
-                    "artifact_id": f"art.{sid}.{artifact_type}.v1",
-                    "project_id": sections.get("project_type", "unknown"),
-                    "section_id": sid,
-                    "task_id": f"task-{str(sid).replace('.', '-')}",
-                    "producer_agent": "integrator",
-                    "artifact_type": artifact_type,
-                    "title": f"Section {sid} {artifact_type}",
-                    "summary": "Bootstrapped artifact for CI completeness baseline",
-                    "status": "final",
-                    "created_at": now,
-                    "updated_at": now,
-                    "inspect_payload": {
-                        "source": "bootstrap",
-                        "section": sid,
-                        "artifact_type": artifact_type,
-                    },
-                    "verification": {
-                        "verify_pass": True,
-                        "check_count": 0,
-                        "failed_checks": [],
-                    },
-                    "tags": ["bootstrap", f"section:{sid}"],
-                }
-            )
+            if artifact_type in present:
+                continue
+            artifacts.append(bootstrap_artifact(project_id, sid, artifact_type, now))
+            present.add(artifact_type)
+            added += 1
+    for leftover in by_section.values():
+        artifacts.extend(leftover)
 
     payload = {
-        "manifest_version": "1.0.0",
-        "project_id": sections.get("project_type", "unknown"),
+        "manifest_version": existing.get("manifest_version", MANIFEST_VERSION),
+        "project_id": project_id,
         "artifact_types": sections.get("artifact_types", []),
         "artifacts": artifacts,
     }
+    return payload, added
+
+
+@traced("write")
+def write_atomic(path: Path, text: str, newline: str = "\n") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8", newline=newline) as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bootstrap the artifacts manifest from the sections manifest.")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate every artifact instead of merging.")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    sections = load_json(SECTIONS_PATH)
+    now = datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+    existing: Dict[str, Any] = {}
+    newline = "\n"
+    if ARTIFACTS_PATH.exists() and not args.rebuild:
+        raw = ARTIFACTS_PATH.read_bytes()
+        existing = json.loads(raw.decode("utf-8"))
+        newline = "\r\n" if b"\r\n" in raw else "\n"
+
+    payload, added = merge_manifest(existing, sections, now)
+    if payload == existing:
+        print(f"Artifacts manifest up to date: {len(payload['artifacts'])} artifacts")
+        return
 
-    ARTIFACTS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    ARTIFACTS_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    print(f"Bootstrapped artifacts: {len(artifacts)}")
+    write_atomic(ARTIFACTS_PATH, json.dumps(payload, indent=2), newline)
+    print(f"Bootstrapped artifacts: {len(payload['artifacts'])} ({added} added)")
     print(f"Wrote: {ARTIFACTS_PATH}")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
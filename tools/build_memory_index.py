@@ -2,19 +2,139 @@
 """
 Builds a lightweight SQLite index from ai_library/docs/memory_log.jsonl.
 
+By default the index is refreshed incrementally: the byte length and SHA-256 of the
+already-indexed prefix of the log are kept in the `index_meta` table, and only lines
+appended after that prefix are parsed and inserted. Any change inside the indexed
+prefix (edit, truncation, rewrite) falls back to a full rebuild. A final entry without
+its newline is indexed; once more lines follow, its line is re-read from its start so
+line counts and hashes stay aligned, without inserting the entry twice.
+
+The same pass maintains per-day rollups (`daily_rollup`, `daily_counts`, `memory_days`)
+keyed by the UTC date of `timestamp_utc`, which generate_daily_report.py queries instead
+of rescanning the log.
+
+The index does not keep a copy of each entry: `memories` records where the entry's line
+lives (`source_file`, empty for a single-file log, plus `byte_offset`/`byte_length`) and
+`fetch_entries()` reads it back from a memory map of the log. `memory_fts` is an
+external-content FTS5 table over the text columns of `memories`, so the searchable text
+is stored once. Databases in the older raw_json layout are dropped and rebuilt.
+
+`--memory-log` may also name a shard directory (see memory_shards.py). Each shard's
+indexed size, mtime and prefix hash are kept in `index_shards`; new shards and shards
+that only grew are parsed in parallel worker processes (`--jobs`), and the parent merges
+their rows into SQLite in shard order. A shard that shrank, was rewritten or was
+removed triggers a full rebuild, which is parallelized the same way.
+
+Full rebuilds never touch the live tables: they run in a shadow copy of the database
+(`<db>.shadow-<pid>`, seeded from a snapshot so tables owned by other tools survive)
+with durability relaxed, and the finished copy is published into the live file in a
+single write transaction through the SQLite backup API. WAL readers keep their
+snapshot until then and never see a half-built index; a crashed rebuild only leaves
+a stale shadow file, removed by the next rebuild. Query paths open the index with
+`connect_reader()` (read-only, memory-mapped).
+
 Usage:
   python tools/build_memory_index.py \
     --memory-log res://ai_library/docs/memory_log.jsonl \
-    --db-path res://ai_library/docs/ai_memory_index.db
+    --db-path res://ai_library/docs/ai_memory_index.db \
+    [--full] [--jobs 8]
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jsonl_stream import JsonlStream, LogMap, log_files, log_signature
+from tracing import add_trace_arguments, run_main, span, traced
+
+HASH_CHUNK_BYTES = 1024 * 1024
+INSERT_BATCH_SIZE = 5000
+BULK_CACHE_SIZE_KIB = 262144
+READER_MMAP_BYTES = 256 * 1024 * 1024
+SHADOW_SUFFIX = ".shadow-"
+# Bump when the rollup definitions change; older indexes are then rebuilt in full.
+ROLLUP_VERSION = "1"
+
+# Tables owned by the memory index; a shadow rebuild drops and recreates exactly these.
+INDEX_TABLES = [
+    "memory_failure_tags",
+    "memory_contract_ids",
+    "memory_pattern_ids",
+    "memory_fts",
+    "memory_days",
+    "daily_rollup",
+    "daily_counts",
+    "index_shards",
+    "memories",
+]
+
+SECONDARY_INDEXES = {
+    "idx_memories_task_id": "memories(task_id)",
+    "idx_memories_outcome": "memories(outcome)",
+    "idx_failure_tag": "memory_failure_tags(failure_tag)",
+    "idx_contract_id": "memory_contract_ids(contract_id)",
+    "idx_pattern_id": "memory_pattern_ids(pattern_id)",
+    "idx_memory_days_day": "memory_days(day)",
+}
+
+INSERT_MEMORY_SQL = """
+    INSERT INTO memories (
+        memory_id, task_id, feature, agent_role, engine_version,
+        outcome, confidence, confidence_calibrated, root_cause,
+        expected_behavior, actual_behavior, fix_summary, repair_strategy, notes,
+        assumptions, prevention_updates, source_file, byte_offset, byte_length
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# memory_fts is external-content: index the memories rows inserted after rowid ?.
+INSERT_FTS_SQL = """
+    INSERT INTO memory_fts (
+        rowid, memory_id, task_id, feature, expected_behavior, actual_behavior,
+        fix_summary, notes, assumptions, prevention_updates
+    )
+    SELECT rowid, memory_id, task_id, feature, expected_behavior, actual_behavior,
+           fix_summary, notes, assumptions, prevention_updates
+    FROM memories
+    WHERE rowid > ?
+    ORDER BY rowid
+"""
+
+# Columns callers select to hand rows to fetch_entries().
+LOCATION_COLUMNS = "memory_id, source_file, byte_offset, byte_length"
+
+# (source_file, byte_offset, byte_length) of an entry's line; source_file is "" for a single-file log.
+EntryLocation = Tuple[str, int, int]
+
+UPSERT_DAILY_ROLLUP_SQL = """
+    INSERT INTO daily_rollup (
+        day, total, confidence_sum, confidence_n, calibrated_sum, calibrated_n,
+        time_to_green_sum, time_to_green_n
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(day) DO UPDATE SET
+        total = total + excluded.total,
+        confidence_sum = confidence_sum + excluded.confidence_sum,
+        confidence_n = confidence_n + excluded.confidence_n,
+        calibrated_sum = calibrated_sum + excluded.calibrated_sum,
+        calibrated_n = calibrated_n + excluded.calibrated_n,
+        time_to_green_sum = time_to_green_sum + excluded.time_to_green_sum,
+        time_to_green_n = time_to_green_n + excluded.time_to_green_n
+"""
+
+UPSERT_DAILY_COUNT_SQL = """
+    INSERT INTO daily_counts (day, dimension, name, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, dimension, name) DO UPDATE SET count = count + excluded.count
+"""
 
 
 def resolve_project_path(raw_path: str) -> Path:
@@ -25,24 +145,78 @@ def resolve_project_path(raw_path: str) -> Path:
     return Path(value)
 
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    entries: List[Dict[str, Any]] = []
-    if not path.exists():
-        raise FileNotFoundError(f"Memory log not found: {path}")
+def database_path(connection: sqlite3.Connection) -> Optional[Path]:
+    """File behind the connection's main database, or None for in-memory databases."""
+    for _, name, filename in connection.execute("PRAGMA database_list"):
+        if name == "main":
+            return Path(filename) if filename else None
+    return None
 
-    with path.open("r", encoding="utf-8") as handle:
-        for line_no, line in enumerate(handle, start=1):
-            text = line.strip()
-            if not text:
-                continue
-            try:
-                obj = json.loads(text)
-            except json.JSONDecodeError as exc:
-                raise ValueError(f"Invalid JSON at line {line_no}: {exc}") from exc
-            if not isinstance(obj, dict):
-                raise ValueError(f"Line {line_no} is not a JSON object")
-            entries.append(obj)
-    return entries
+
+def enable_mmap(connection: sqlite3.Connection) -> sqlite3.Connection:
+    connection.execute(f"PRAGMA mmap_size={READER_MMAP_BYTES}")
+    return connection
+
+
+def connect_reader(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Read-only, memory-mapped connection for query paths; raises sqlite3.Error if unusable."""
+    return enable_mmap(
+        sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True, check_same_thread=check_same_thread)
+    )
+
+
+def hash_file_prefix(path: Path, length: int) -> Any:
+    digest = hashlib.sha256()
+    remaining = length
+    with path.open("rb") as handle:
+        while remaining > 0:
+            chunk = handle.read(min(HASH_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def resume_prefix(path: Path, indexed_bytes: int) -> Tuple[int, Any, str]:
+    """Where an incremental pass resumes: (offset, digest of the bytes before it, hex
+    digest of the whole indexed prefix).
+
+    The offset is `indexed_bytes`, or the start of the last indexed line when that line
+    had no newline yet, so the pass re-reads it now that it may be terminated.
+    """
+    resume = indexed_bytes
+    with path.open("rb") as handle:
+        while resume > 0:
+            step = min(HASH_CHUNK_BYTES, resume)
+            handle.seek(resume - step)
+            block = handle.read(step)
+            cut = block.rfind(b"\n")
+            if cut >= 0:
+                resume -= step - cut - 1
+                break
+            resume -= step
+        handle.seek(resume)
+        tail = handle.read(indexed_bytes - resume)
+    digest = hash_file_prefix(path, resume)
+    whole = digest.copy()
+    whole.update(tail)
+    return resume, digest, whole.hexdigest()
+
+
+def parse_date(ts: str) -> str:
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).date().isoformat()
+    except Exception:
+        return ""
+
+
+def subsystem_of(file_path: str) -> str:
+    """Subsystem name for paths under `.../systems/<name>/`, else an empty string."""
+    marker = "systems/"
+    if marker not in file_path:
+        return ""
+    return file_path.split(marker, maxsplit=1)[1].split("/", maxsplit=1)[0]
 
 
 def _join_text(value: Any) -> str:
@@ -65,7 +239,32 @@ def _iter_strings(entry: Dict[str, Any], field: str) -> Iterable[str]:
     return [str(item) for item in values]
 
 
+def entry_failure_tags(entry: Dict[str, Any]) -> List[str]:
+    return list(_iter_tags(entry))
+
+
+def entry_subsystems(entry: Dict[str, Any]) -> List[str]:
+    """Subsystems of the entry's touched files, one per file (repeats are kept)."""
+    return [name for name in (subsystem_of(path) for path in _iter_strings(entry, "files_touched")) if name]
+
+
+def _drop_legacy_layout(connection: sqlite3.Connection) -> None:
+    """Drop index tables from the raw_json layout so the next sync rebuilds them in full."""
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(memories)")}
+    if not columns or "byte_offset" in columns:
+        return
+    for table in INDEX_TABLES:
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+    # The oldest shipped indexes predate index_meta; ensure_schema creates it afterwards.
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'index_meta'").fetchone():
+        connection.execute("DELETE FROM index_meta WHERE key <> 'index_generation'")
+    connection.commit()
+    connection.execute("VACUUM")
+
+
+@traced("ensure_schema")
 def ensure_schema(connection: sqlite3.Connection) -> None:
+    _drop_legacy_layout(connection)
     connection.executescript(
         """
         PRAGMA journal_mode=WAL;
@@ -80,13 +279,16 @@ def ensure_schema(connection: sqlite3.Connection) -> None:
             confidence REAL,
             confidence_calibrated REAL,
             root_cause TEXT,
+            expected_behavior TEXT,
+            actual_behavior TEXT,
             fix_summary TEXT,
             repair_strategy TEXT,
             notes TEXT,
-            files_touched_json TEXT,
-            assumptions_json TEXT,
-            prevention_updates_json TEXT,
-            raw_json TEXT NOT NULL
+            assumptions TEXT,
+            prevention_updates TEXT,
+            source_file TEXT NOT NULL DEFAULT '',
+            byte_offset INTEGER,
+            byte_length INTEGER
         );
 
         CREATE TABLE IF NOT EXISTS memory_failure_tags (
@@ -119,41 +321,211 @@ def ensure_schema(connection: sqlite3.Connection) -> None:
             fix_summary,
             notes,
             assumptions,
-            prevention_updates
+            prevention_updates,
+            content='memories',
+            content_rowid='rowid'
+        );
+
+        CREATE TABLE IF NOT EXISTS memory_days (
+            memory_id TEXT PRIMARY KEY,
+            day TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            day TEXT PRIMARY KEY,
+            total INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            confidence_n INTEGER NOT NULL,
+            calibrated_sum REAL NOT NULL,
+            calibrated_n INTEGER NOT NULL,
+            time_to_green_sum REAL NOT NULL,
+            time_to_green_n INTEGER NOT NULL
         );
 
-        CREATE INDEX IF NOT EXISTS idx_memories_task_id ON memories(task_id);
-        CREATE INDEX IF NOT EXISTS idx_memories_outcome ON memories(outcome);
-        CREATE INDEX IF NOT EXISTS idx_failure_tag ON memory_failure_tags(failure_tag);
-        CREATE INDEX IF NOT EXISTS idx_contract_id ON memory_contract_ids(contract_id);
-        CREATE INDEX IF NOT EXISTS idx_pattern_id ON memory_pattern_ids(pattern_id);
+        CREATE TABLE IF NOT EXISTS daily_counts (
+            day TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            name TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, dimension, name)
+        );
+
+        CREATE TABLE IF NOT EXISTS index_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS index_shards (
+            name TEXT PRIMARY KEY,
+            bytes INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            entries INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        );
         """
     )
+    create_secondary_indexes(connection)
+
 
+def create_secondary_indexes(connection: sqlite3.Connection) -> None:
+    for name, target in SECONDARY_INDEXES.items():
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
 
-def rebuild_index(entries: List[Dict[str, Any]], connection: sqlite3.Connection) -> None:
+
+def drop_secondary_indexes(connection: sqlite3.Connection) -> None:
+    for name in SECONDARY_INDEXES:
+        connection.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+@contextmanager
+def bulk_load_pragmas(connection: sqlite3.Connection) -> Iterator[None]:
+    """Relax durability and enlarge the page cache for a rebuild, then restore both."""
+    synchronous = connection.execute("PRAGMA synchronous").fetchone()[0]
+    cache_size = connection.execute("PRAGMA cache_size").fetchone()[0]
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute(f"PRAGMA cache_size=-{BULK_CACHE_SIZE_KIB}")
+    try:
+        yield
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.execute(f"PRAGMA synchronous={int(synchronous)}")
+        connection.execute(f"PRAGMA cache_size={int(cache_size)}")
+
+
+def read_index_meta(connection: sqlite3.Connection) -> Dict[str, str]:
+    return {key: value for key, value in connection.execute("SELECT key, value FROM index_meta")}
+
+
+def write_index_meta(connection: sqlite3.Connection, values: Dict[str, Any]) -> None:
+    connection.executemany(
+        "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+        [(key, str(value)) for key, value in values.items()],
+    )
+
+
+def index_is_fresh(connection: sqlite3.Connection, memory_log_path: Path) -> bool:
+    """True when the index already covers exactly the current bytes of the log (by size and mtime)."""
+    try:
+        meta = read_index_meta(connection)
+    except sqlite3.DatabaseError:
+        return False
+    if memory_log_path.is_dir():
+        return (
+            meta.get("source_path") == str(memory_log_path.resolve())
+            and meta.get("source_signature") == log_signature(memory_log_path)
+        )
+    stat = memory_log_path.stat()
+    return (
+        meta.get("source_path") == str(memory_log_path.resolve())
+        and meta.get("indexed_bytes") == str(stat.st_size)
+        and meta.get("source_mtime_ns") == str(stat.st_mtime_ns)
+    )
+
+
+def index_generation(connection: sqlite3.Connection) -> int:
+    """Counter bumped by every full rebuild; derived data keyed on it knows to start over."""
+    row = connection.execute("SELECT value FROM index_meta WHERE key = 'index_generation'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def clear_index(connection: sqlite3.Connection) -> None:
     connection.execute("DELETE FROM memory_failure_tags")
     connection.execute("DELETE FROM memory_contract_ids")
     connection.execute("DELETE FROM memory_pattern_ids")
-    connection.execute("DELETE FROM memory_fts")
+    connection.execute("INSERT INTO memory_fts (memory_fts) VALUES ('delete-all')")
     connection.execute("DELETE FROM memories")
-
-    for idx, entry in enumerate(entries, start=1):
-        memory_id = str(entry.get("memory_id") or f"MEM-AUTO-{idx:06d}")
-        task_id = str(entry.get("task_id") or "")
-
-        connection.execute(
-            """
-            INSERT INTO memories (
-                memory_id, task_id, feature, agent_role, engine_version,
-                outcome, confidence, confidence_calibrated, root_cause,
-                fix_summary, repair_strategy, notes,
-                files_touched_json, assumptions_json, prevention_updates_json, raw_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+    connection.execute("DELETE FROM memory_days")
+    connection.execute("DELETE FROM daily_rollup")
+    connection.execute("DELETE FROM daily_counts")
+    connection.execute("DELETE FROM index_meta")
+    connection.execute("DELETE FROM index_shards")
+
+
+def rebuild_index(entries: Iterable[Dict[str, Any]], connection: sqlite3.Connection) -> None:
+    rebuild_index_records(((entry, None) for entry in entries), connection)
+
+
+@traced("rebuild_index")
+def rebuild_index_records(
+    records: Iterable[Tuple[Dict[str, Any], EntryLocation | None]], connection: sqlite3.Connection
+) -> int:
+    """Replace the index contents; secondary indexes are rebuilt once after the load."""
+    with bulk_load_pragmas(connection):
+        generation = index_generation(connection) + 1
+        clear_index(connection)
+        write_index_meta(connection, {"index_generation": generation})
+        drop_secondary_indexes(connection)
+        count = append_records(records, connection, start_index=1)
+        create_secondary_indexes(connection)
+    return count
+
+
+class RollupAccumulator:
+    """Per-day aggregates for a run of entries, in the row shapes of the rollup tables."""
+
+    def __init__(self) -> None:
+        self.memory_days: List[Tuple[str, str]] = []
+        # day -> [total, confidence sum, n, calibrated sum, n, time-to-green sum, n]
+        self.day_totals: Dict[str, List[float]] = {}
+        self.day_counts: Counter[Tuple[str, str, str]] = Counter()
+
+    def add(self, memory_id: str, entry: Dict[str, Any]) -> None:
+        day = parse_date(str(entry.get("timestamp_utc", "")))
+        if not day:
+            return
+        self.memory_days.append((memory_id, day))
+        totals = self.day_totals.setdefault(day, [0, 0.0, 0, 0.0, 0, 0.0, 0])
+        totals[0] += 1
+        for slot, field in ((1, "confidence"), (3, "confidence_calibrated"), (5, "time_to_green_minutes")):
+            value = entry.get(field)
+            if isinstance(value, (int, float)):
+                totals[slot] += float(value)
+                totals[slot + 1] += 1
+
+        self.day_counts[(day, "outcome", str(entry.get("outcome", "unknown")))] += 1
+        for tag in entry_failure_tags(entry):
+            self.day_counts[(day, "failure_tag", tag)] += 1
+        for subsystem in entry_subsystems(entry):
+            self.day_counts[(day, "subsystem", subsystem)] += 1
+
+    def total_rows(self) -> List[Tuple[Any, ...]]:
+        return [(day, *totals) for day, totals in sorted(self.day_totals.items())]
+
+    def count_rows(self) -> List[Tuple[Any, ...]]:
+        return [(*key, count) for key, count in self.day_counts.items()]
+
+    def flush(self, connection: sqlite3.Connection) -> None:
+        connection.executemany("INSERT OR IGNORE INTO memory_days (memory_id, day) VALUES (?, ?)", self.memory_days)
+        connection.executemany(UPSERT_DAILY_ROLLUP_SQL, self.total_rows())
+        connection.executemany(UPSERT_DAILY_COUNT_SQL, self.count_rows())
+
+
+class _RowBatch:
+    """Column-ordered rows staged for one executemany round trip per table."""
+
+    def __init__(self, auto_prefix: str = "MEM-AUTO") -> None:
+        self.auto_prefix = auto_prefix
+        self.clear()
+
+    def clear(self) -> None:
+        self.memories: List[Tuple[Any, ...]] = []
+        self.tags: List[Tuple[str, str]] = []
+        self.contracts: List[Tuple[str, str]] = []
+        self.patterns: List[Tuple[str, str]] = []
+        self.rollups = RollupAccumulator()
+
+    def add(self, entry: Dict[str, Any], idx: int, location: EntryLocation | None = None) -> None:
+        memory_id = str(entry.get("memory_id") or f"{self.auto_prefix}-{idx:06d}")
+        source_file, byte_offset, byte_length = location if location is not None else ("", None, None)
+
+        self.memories.append(
             (
                 memory_id,
-                task_id,
+                str(entry.get("task_id") or ""),
                 str(entry.get("feature", "")),
                 str(entry.get("agent_role", "")),
                 str(entry.get("engine_version", "")),
@@ -161,80 +533,428 @@ def rebuild_index(entries: List[Dict[str, Any]], connection: sqlite3.Connection)
                 float(entry.get("confidence", 0.0) or 0.0),
                 float(entry.get("confidence_calibrated", 0.0) or 0.0),
                 str(entry.get("root_cause", "")),
-                str(entry.get("fix_summary", "")),
-                str(entry.get("repair_strategy", "")),
-                str(entry.get("notes", "")),
-                json.dumps(entry.get("files_touched", []), ensure_ascii=False),
-                json.dumps(entry.get("assumptions", []), ensure_ascii=False),
-                json.dumps(entry.get("prevention_updates", []), ensure_ascii=False),
-                json.dumps(entry, ensure_ascii=False),
-            ),
-        )
-
-        connection.execute(
-            """
-            INSERT INTO memory_fts (
-                memory_id, task_id, feature, expected_behavior, actual_behavior,
-                fix_summary, notes, assumptions, prevention_updates
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                memory_id,
-                task_id,
-                str(entry.get("feature", "")),
                 str(entry.get("expected_behavior", "")),
                 str(entry.get("actual_behavior", "")),
                 str(entry.get("fix_summary", "")),
+                str(entry.get("repair_strategy", "")),
                 str(entry.get("notes", "")),
                 _join_text(entry.get("assumptions", [])),
                 _join_text(entry.get("prevention_updates", [])),
-            ),
+                source_file,
+                byte_offset,
+                byte_length,
+            )
+        )
+        self.tags.extend((memory_id, tag) for tag in _iter_tags(entry))
+        self.contracts.extend((memory_id, contract_id) for contract_id in _iter_strings(entry, "contract_ids_touched"))
+        self.patterns.extend((memory_id, pattern_id) for pattern_id in _iter_strings(entry, "pattern_ids_used"))
+        self.rollups.add(memory_id, entry)
+
+    def __len__(self) -> int:
+        return len(self.memories)
+
+    def flush(self, connection: sqlite3.Connection) -> None:
+        last_rowid = connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM memories").fetchone()[0]
+        connection.executemany(INSERT_MEMORY_SQL, self.memories)
+        connection.execute(INSERT_FTS_SQL, (last_rowid,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO memory_failure_tags (memory_id, failure_tag) VALUES (?, ?)", self.tags
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO memory_contract_ids (memory_id, contract_id) VALUES (?, ?)", self.contracts
         )
+        connection.executemany(
+            "INSERT OR IGNORE INTO memory_pattern_ids (memory_id, pattern_id) VALUES (?, ?)", self.patterns
+        )
+        self.rollups.flush(connection)
+        self.clear()
+
+
+def append_entries(entries: Iterable[Dict[str, Any]], connection: sqlite3.Connection, start_index: int) -> int:
+    return append_records(((entry, None) for entry in entries), connection, start_index)
+
+
+def append_records(
+    records: Iterable[Tuple[Dict[str, Any], EntryLocation | None]],
+    connection: sqlite3.Connection,
+    start_index: int,
+    batch_size: int = INSERT_BATCH_SIZE,
+) -> int:
+    """Insert (entry, location) records in executemany batches; returns the number written."""
+    batch = _RowBatch()
+    count = 0
+    for idx, (entry, location) in enumerate(records, start=start_index):
+        batch.add(entry, idx, location)
+        count += 1
+        if len(batch) >= batch_size:
+            batch.flush(connection)
+    if len(batch):
+        batch.flush(connection)
+    return count
+
+
+def _stream_records(stream: JsonlStream, source_file: str = "") -> Iterator[Tuple[Dict[str, Any], EntryLocation]]:
+    for record in stream:
+        yield record.entry, (source_file, record.offset, record.length)
+
+
+def fetch_entries(
+    memory_log_path: Path, rows: Iterable[Tuple[str, str, int | None, int | None]]
+) -> List[Dict[str, Any]]:
+    """Entries for (memory_id, source_file, byte_offset, byte_length) rows, read from an mmap of the log.
+
+    Raises LookupError when a row has no location or the bytes there are no longer that
+    entry (the log was rewritten since it was indexed).
+    """
+    entries: List[Dict[str, Any]] = []
+    try:
+        with LogMap(memory_log_path) as log_map:
+            for memory_id, source_file, byte_offset, byte_length in rows:
+                if byte_offset is None or byte_length is None:
+                    raise LookupError(f"Memory {memory_id} has no log location in the index")
+                entry = json.loads(log_map.line(source_file, byte_offset, byte_length))
+                if not isinstance(entry, dict) or str(entry.get("memory_id") or memory_id) != memory_id:
+                    raise LookupError(f"Memory {memory_id} is no longer at its indexed log location")
+                entries.append(entry)
+    except (OSError, ValueError) as exc:
+        raise LookupError(f"Cannot read indexed entry from {memory_log_path}: {exc}") from exc
+    return entries
 
-        for tag in _iter_tags(entry):
-            connection.execute(
-                "INSERT OR IGNORE INTO memory_failure_tags (memory_id, failure_tag) VALUES (?, ?)",
-                (memory_id, tag),
-            )
 
-        for contract_id in _iter_strings(entry, "contract_ids_touched"):
-            connection.execute(
-                "INSERT OR IGNORE INTO memory_contract_ids (memory_id, contract_id) VALUES (?, ?)",
-                (memory_id, contract_id),
-            )
+@dataclass
+class SyncResult:
+    mode: str
+    new_entries: int
+    indexed_entries: int
+    indexed_bytes: int
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def remove_database_files(db_path: Path) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+
+def sweep_stale_shadows(db_path: Path) -> None:
+    """Delete shadow files left behind by rebuilds whose process is gone."""
+    prefix = db_path.name + SHADOW_SUFFIX
+    for path in db_path.parent.glob(prefix + "*"):
+        pid = path.name[len(prefix):].split("-", 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            path.unlink(missing_ok=True)
+
+
+def can_rebuild_in_shadow(connection: sqlite3.Connection) -> bool:
+    return not connection.in_transaction and database_path(connection) is not None
+
+
+@traced("shadow_rebuild")
+def rebuild_in_shadow(memory_log_path: Path, connection: sqlite3.Connection, jobs: Optional[int] = None) -> SyncResult:
+    """Full rebuild into a private copy of the database, then publish it over the live one."""
+    db_path = database_path(connection)
+    assert db_path is not None
+    sweep_stale_shadows(db_path)
+    shadow_path = db_path.with_name(f"{db_path.name}{SHADOW_SUFFIX}{os.getpid()}")
+    remove_database_files(shadow_path)
+    shadow = sqlite3.connect(shadow_path)
+    try:
+        connection.backup(shadow)
+        for table in INDEX_TABLES:
+            shadow.execute(f"DROP TABLE IF EXISTS {table}")
+        ensure_schema(shadow)
+        result = sync_index(memory_log_path, shadow, full=True, jobs=jobs, in_place=True)
+        shadow.commit()
+        with span("publish_index"):
+            shadow.backup(connection)
+    finally:
+        shadow.close()
+        remove_database_files(shadow_path)
+    return result
+
+
+@traced("sync_index")
+def sync_index(
+    memory_log_path: Path,
+    connection: sqlite3.Connection,
+    full: bool = False,
+    jobs: Optional[int] = None,
+    in_place: bool = False,
+) -> SyncResult:
+    """Bring the index up to date with the log, touching only appended lines when possible.
+
+    Full rebuilds go through `rebuild_in_shadow()` unless `in_place` is set or the
+    connection cannot be shadowed (in-memory database, open transaction).
+    """
+    if not memory_log_path.exists():
+        raise FileNotFoundError(f"Memory log not found: {memory_log_path}")
+    if memory_log_path.is_dir():
+        return sync_sharded_index(memory_log_path, connection, full=full, jobs=jobs, in_place=in_place)
+
+    stat = memory_log_path.stat()
+    size = stat.st_size
+    meta = read_index_meta(connection)
+    indexed_bytes = int(meta.get("indexed_bytes", "-1"))
+    indexed_lines = int(meta.get("indexed_lines", "0"))
+    indexed_entries = int(meta.get("indexed_entries", "0"))
+
+    same_source = meta.get("source_path") == str(memory_log_path.resolve())
+    if meta.get("rollup_version") != ROLLUP_VERSION:
+        full = True
+    if not full and same_source and indexed_bytes == size and meta.get("source_mtime_ns") == str(stat.st_mtime_ns):
+        return SyncResult("unchanged", 0, indexed_entries, indexed_bytes)
+
+    digest = None
+    if not full and same_source and 0 <= indexed_bytes <= size:
+        resume, digest, prefix_sha256 = resume_prefix(memory_log_path, indexed_bytes)
+        if prefix_sha256 != meta.get("prefix_sha256"):
+            digest = None
+
+    if digest is not None:
+        if resume < indexed_bytes:
+            # The re-read unterminated line is already indexed; it is only counted again.
+            indexed_lines -= 1
+        stream = JsonlStream(memory_log_path, resume, size, first_line_no=indexed_lines + 1, digest=digest)
+        records = (record for record in _stream_records(stream) if record[1][1] >= indexed_bytes)
+        new_entries = append_records(records, connection, start_index=indexed_entries + 1)
+        mode = "incremental"
+    else:
+        if not in_place and can_rebuild_in_shadow(connection):
+            return rebuild_in_shadow(memory_log_path, connection, jobs)
+        digest = hashlib.sha256()
+        stream = JsonlStream(memory_log_path, 0, size, digest=digest)
+        new_entries = rebuild_index_records(_stream_records(stream), connection)
+        indexed_lines = 0
+        indexed_entries = 0
+        mode = "full"
+
+    write_index_meta(
+        connection,
+        {
+            "source_path": str(memory_log_path.resolve()),
+            "source_mtime_ns": stat.st_mtime_ns,
+            "indexed_bytes": stream.position,
+            "indexed_lines": indexed_lines + stream.lines_read,
+            "indexed_entries": indexed_entries + new_entries,
+            "prefix_sha256": digest.hexdigest(),
+            "rollup_version": ROLLUP_VERSION,
+        },
+    )
+    return SyncResult(mode, new_entries, indexed_entries + new_entries, stream.position)
+
+
+@dataclass
+class ShardTask:
+    """Index `path` from byte `start`; `start`, `lines` and `entries` describe what is already indexed."""
+
+    path: str
+    start: int = 0
+    prefix_sha256: str = ""
+    lines: int = 0
+    entries: int = 0
+
+
+@dataclass
+class ShardRows:
+    name: str
+    prefix_ok: bool
+    bytes: int
+    mtime_ns: int
+    lines: int
+    entries: int
+    new_entries: int
+    sha256: str
+    batches: List[_RowBatch] = field(default_factory=list)
+
+
+@traced("index_shard")
+def index_shard(task: ShardTask) -> ShardRows:
+    """Worker: parse a shard from `task.start` into insert batches, verifying the indexed prefix."""
+    path = Path(task.path)
+    stat = path.stat()
+    resume, digest, prefix_sha256 = resume_prefix(path, task.start)
+    if task.start and prefix_sha256 != task.prefix_sha256:
+        return ShardRows(path.name, False, stat.st_size, stat.st_mtime_ns, 0, 0, 0, "")
+
+    lines = task.lines - 1 if resume < task.start else task.lines
+    stream = JsonlStream(path, resume, stat.st_size, first_line_no=lines + 1, digest=digest, label="Memory log shard")
+    batches: List[_RowBatch] = []
+    batch = _RowBatch(auto_prefix=f"MEM-AUTO-{path.stem}")
+    new_entries = 0
+    try:
+        records = (record for record in _stream_records(stream, path.name) if record[1][1] >= task.start)
+        for idx, (entry, location) in enumerate(records, start=task.entries + 1):
+            batch.add(entry, idx, location)
+            new_entries += 1
+            if len(batch) >= INSERT_BATCH_SIZE:
+                batches.append(batch)
+                batch = _RowBatch(auto_prefix=batch.auto_prefix)
+    except ValueError as exc:
+        raise ValueError(f"{path.name}: {exc}") from exc
+    if len(batch):
+        batches.append(batch)
+    return ShardRows(
+        path.name,
+        True,
+        stream.position,
+        stat.st_mtime_ns,
+        lines + stream.lines_read,
+        task.entries + new_entries,
+        new_entries,
+        digest.hexdigest(),
+        batches,
+    )
 
-        for pattern_id in _iter_strings(entry, "pattern_ids_used"):
-            connection.execute(
-                "INSERT OR IGNORE INTO memory_pattern_ids (memory_id, pattern_id) VALUES (?, ?)",
-                (memory_id, pattern_id),
-            )
 
+def run_shard_tasks(tasks: List[ShardTask], jobs: Optional[int] = None) -> Iterator[ShardRows]:
+    """Run `index_shard` over the tasks, in a process pool when there is more than one; yields in task order."""
+    workers = min(len(tasks), max(1, jobs or os.cpu_count() or 1))
+    if workers <= 1:
+        yield from map(index_shard, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(index_shard, tasks)
+
+
+@traced("store_shard")
+def _store_shard(connection: sqlite3.Connection, rows: ShardRows) -> None:
+    for batch in rows.batches:
+        batch.flush(connection)
+    rows.batches = []
+    connection.execute(
+        "INSERT OR REPLACE INTO index_shards (name, bytes, mtime_ns, lines, entries, sha256) VALUES (?, ?, ?, ?, ?, ?)",
+        (rows.name, rows.bytes, rows.mtime_ns, rows.lines, rows.entries, rows.sha256),
+    )
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Build memory retrieval index from JSONL source of truth.")
-    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl")
-    parser.add_argument("--db-path", required=True, help="Path to SQLite output")
-    args = parser.parse_args()
 
-    memory_log_path = resolve_project_path(args.memory_log)
-    db_path = resolve_project_path(args.db_path)
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+@traced("sync_sharded_index")
+def sync_sharded_index(
+    log_dir: Path,
+    connection: sqlite3.Connection,
+    full: bool = False,
+    jobs: Optional[int] = None,
+    in_place: bool = False,
+) -> SyncResult:
+    """`sync_index` for a shard directory: only new or grown shards are parsed, in parallel."""
+    signature = log_signature(log_dir)
+    shards = log_files(log_dir)
+    meta = read_index_meta(connection)
+    if meta.get("source_path") != str(log_dir.resolve()) or meta.get("rollup_version") != ROLLUP_VERSION:
+        full = True
+
+    tasks: List[ShardTask] = []
+    if not full:
+        known = {
+            row[0]: row
+            for row in connection.execute("SELECT name, bytes, mtime_ns, lines, entries, sha256 FROM index_shards")
+        }
+        full = bool(set(known) - {path.name for path in shards})
+        for path in shards:
+            stat = path.stat()
+            row = known.get(path.name)
+            if row is None:
+                tasks.append(ShardTask(str(path)))
+            elif stat.st_size == row[1] and stat.st_mtime_ns == row[2]:
+                continue
+            elif stat.st_size >= row[1]:
+                tasks.append(ShardTask(str(path), row[1], row[5], row[3], row[4]))
+            else:
+                full = True
+
+    if full and not in_place and can_rebuild_in_shadow(connection):
+        return rebuild_in_shadow(log_dir, connection, jobs)
+    if full:
+        with bulk_load_pragmas(connection):
+            generation = index_generation(connection) + 1
+            clear_index(connection)
+            write_index_meta(connection, {"index_generation": generation})
+            drop_secondary_indexes(connection)
+            new_entries = 0
+            for rows in run_shard_tasks([ShardTask(str(path)) for path in shards], jobs):
+                _store_shard(connection, rows)
+                new_entries += rows.new_entries
+            create_secondary_indexes(connection)
+        mode = "full"
+    elif tasks:
+        results = list(run_shard_tasks(tasks, jobs))
+        if not all(rows.prefix_ok for rows in results):
+            return sync_sharded_index(log_dir, connection, full=True, jobs=jobs, in_place=in_place)
+        for rows in results:
+            _store_shard(connection, rows)
+        new_entries = sum(rows.new_entries for rows in results)
+        mode = "incremental"
+    else:
+        new_entries = 0
+        mode = "unchanged"
+
+    indexed_entries, indexed_bytes = connection.execute(
+        "SELECT COALESCE(SUM(entries), 0), COALESCE(SUM(bytes), 0) FROM index_shards"
+    ).fetchone()
+    write_index_meta(
+        connection,
+        {
+            "source_path": str(log_dir.resolve()),
+            "source_signature": signature,
+            "indexed_bytes": indexed_bytes,
+            "indexed_entries": indexed_entries,
+            "indexed_shards": len(shards),
+            "rollup_version": ROLLUP_VERSION,
+        },
+    )
+    return SyncResult(mode, new_entries, int(indexed_entries), int(indexed_bytes))
 
-    entries = load_jsonl(memory_log_path)
 
+@dataclass
+class IndexBuildResult:
+    mode: str
+    new_entries: int
+    memories: int
+    failure_tags: int
+    db_path: Path
+
+
+def build_index(
+    memory_log_path: Path, db_path: Path, full: bool = False, jobs: Optional[int] = None
+) -> IndexBuildResult:
+    """Programmatic entry point: refresh (or fully rebuild) the index at db_path."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
     with sqlite3.connect(db_path) as conn:
         ensure_schema(conn)
-        rebuild_index(entries, conn)
+        result = sync_index(memory_log_path, conn, full=full, jobs=jobs)
         conn.commit()
 
         count = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
         tags = conn.execute("SELECT COUNT(*) FROM memory_failure_tags").fetchone()[0]
+    return IndexBuildResult(result.mode, result.new_entries, count, tags, db_path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build memory retrieval index from JSONL source of truth.")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--db-path", required=True, help="Path to SQLite output")
+    parser.add_argument("--full", action="store_true", help="Force a full rebuild instead of an incremental refresh")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for shard indexing (default: CPU count)")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    result = build_index(
+        resolve_project_path(args.memory_log), resolve_project_path(args.db_path), full=args.full, jobs=args.jobs
+    )
 
-    print(f"[INDEX][PASS] Indexed memories: {count}")
-    print(f"[INDEX][PASS] Indexed failure tags: {tags}")
-    print(f"[INDEX][PASS] Database: {db_path}")
+    print(f"[INDEX][PASS] Refresh mode: {result.mode} (+{result.new_entries} entries)")
+    print(f"[INDEX][PASS] Indexed memories: {result.memories}")
+    print(f"[INDEX][PASS] Indexed failure tags: {result.failure_tags}")
+    print(f"[INDEX][PASS] Database: {result.db_path}")
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
@@ -0,0 +1,123 @@
+"""
+Line-level FTS5 index of the contract/pattern docs, stored next to the memory index.
+
+Each non-blank line of every source doc becomes one searchable `doc_fts` row keyed by
+path, line number and the nearest section heading (markdown `#` headings, or the enclosing
+`*_id:` item / top-level key for YAML). `doc_sources` records mtime, size and SHA-256
+per doc so a refresh only re-ingests docs whose content actually changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+YAML_ITEM_ID = re.compile(r"^\s*-\s*([a-z_]*_id)\s*:\s*\"?([^\"]+)\"?\s*$")
+YAML_TOP_KEY = re.compile(r"^([A-Za-z0-9_]+)\s*:")
+PREFIX_MIN_LEN = 4
+
+
+def ensure_doc_schema(connection: sqlite3.Connection) -> None:
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS doc_sources (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        );
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS doc_fts USING fts5(
+            path UNINDEXED,
+            line_no UNINDEXED,
+            section UNINDEXED,
+            text
+        );
+        """
+    )
+
+
+def iter_doc_lines(path: Path, content: str) -> Iterator[Tuple[int, str, str]]:
+    """Yield (line_no, section, stripped_text) for every non-blank line."""
+    is_yaml = path.suffix.lower() in (".yaml", ".yml")
+    section = ""
+    for line_no, line in enumerate(content.splitlines(), start=1):
+        text = line.strip()
+        if not text:
+            continue
+        if is_yaml:
+            item = YAML_ITEM_ID.match(line)
+            top = YAML_TOP_KEY.match(line)
+            if item:
+                section = item.group(2).strip()
+            elif top:
+                section = top.group(1)
+        elif text.startswith("#"):
+            section = text.lstrip("#").strip()
+        yield line_no, section, text
+
+
+def refresh_doc_index(connection: sqlite3.Connection, paths: Iterable[Path]) -> int:
+    """Re-ingest docs whose mtime/size changed and whose hash differs; returns docs rewritten."""
+    known = {
+        row[0]: (row[1], row[2], row[3])
+        for row in connection.execute("SELECT path, mtime_ns, size, sha256 FROM doc_sources")
+    }
+    wanted = set()
+    rewritten = 0
+
+    for path in paths:
+        key = str(path)
+        if not path.exists():
+            continue
+        wanted.add(key)
+        stat = path.stat()
+        previous = known.get(key)
+        if previous is not None and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+            continue
+
+        data = path.read_bytes()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if previous is None or previous[2] != sha256:
+            content = data.decode("utf-8", errors="ignore")
+            connection.execute("DELETE FROM doc_fts WHERE path = ?", (key,))
+            connection.executemany(
+                "INSERT INTO doc_fts (path, line_no, section, text) VALUES (?, ?, ?, ?)",
+                [(key, line_no, section, text) for line_no, section, text in iter_doc_lines(path, content)],
+            )
+            rewritten += 1
+        connection.execute(
+            "INSERT OR REPLACE INTO doc_sources (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+            (key, stat.st_mtime_ns, stat.st_size, sha256),
+        )
+
+    for stale in set(known) - wanted:
+        connection.execute("DELETE FROM doc_fts WHERE path = ?", (stale,))
+        connection.execute("DELETE FROM doc_sources WHERE path = ?", (stale,))
+    return rewritten
+
+
+def fts_match_query(terms: List[str]) -> str:
+    """OR together query terms; long terms match as prefixes, short ones ("hp", "ui") exactly."""
+    return " OR ".join(f"{term}*" if len(term) >= PREFIX_MIN_LEN else f'"{term}"' for term in terms)
+
+
+def query_doc_index(connection: sqlite3.Connection, terms: List[str], top_k: int) -> List[Tuple[str, str]]:
+    """Rank doc lines by BM25 over OR-ed terms; returns (path, "L<n>: <line>") pairs."""
+    if not terms:
+        return []
+    fts_query = fts_match_query(terms)
+    rows = connection.execute(
+        """
+        SELECT path, line_no, text
+        FROM doc_fts
+        WHERE doc_fts MATCH ?
+        ORDER BY bm25(doc_fts) ASC
+        LIMIT ?
+        """,
+        (fts_query, top_k),
+    ).fetchall()
+    return [(path, f"L{line_no}: {text}") for path, line_no, text in rows]
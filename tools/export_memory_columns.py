@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Export memory_log.jsonl into a columnar store for vectorized analytics.
+
+Each column is a little-endian `.npy` file (written with the standard library, so the
+export itself does not need numpy) described by `manifest.json`:
+
+- `day` (int32 days since 1970-01-01, -1 when `timestamp_utc` is missing or invalid)
+- `outcome`, `agent_role`, `task_id`: dictionary-encoded codes; the value lists are in
+  the manifest under `dictionaries`
+- `confidence`, `confidence_calibrated`, `time_to_green_minutes`: float32, NaN if absent
+- `failure_tag_*` and `subsystem_*`: multi-valued columns as CSR pairs
+  (`*_offsets` of length rows + 1 and dictionary-encoded `*_codes`)
+- `line_file` / `line_offset` / `line_length`: where each entry's line lives in the
+  log; `line_file` indexes the manifest's `source_files` (one name for a single-file
+  log, the shard names for a shard directory)
+
+With `--parquet` and pyarrow installed, the same table is also written as
+`memory_columns.parquet` with dictionary-typed categorical columns.
+
+`columnar_rollups()` computes the per-day aggregates of build_memory_index.py with numpy
+bincounts over memory-mapped columns; generate_daily_report.py uses it for `--columns`.
+
+Usage:
+  python tools/export_memory_columns.py \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --out-dir res://ai_library/docs/memory_columns \
+    [--parquet]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from build_memory_index import entry_failure_tags, entry_subsystems, parse_date, resolve_project_path
+from jsonl_stream import JsonlRecord, JsonlStream, log_files, log_signature
+from tracing import add_trace_arguments, run_main, traced
+
+COLUMNS_VERSION = 2
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_DESCR = {"b": "|i1", "h": "<i2", "i": "<i4", "q": "<i8", "f": "<f4"}
+CATEGORICAL = ("outcome", "agent_role", "task_id")
+MULTI_VALUED = ("failure_tag", "subsystem")
+MEASURES = ("confidence", "confidence_calibrated", "time_to_green_minutes")
+
+
+class Dictionary:
+    """Value -> code mapping in first-seen order."""
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    @property
+    def values(self) -> List[str]:
+        return list(self.codes)
+
+
+def code_typecode(size: int) -> str:
+    if size <= 127:
+        return "b"
+    if size <= 32767:
+        return "h"
+    return "i"
+
+
+def write_npy(path: Path, values: array) -> None:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    header = repr({"descr": NPY_DESCR[values.typecode], "fortran_order": False, "shape": (len(values),)})
+    pad = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header_bytes = (header + " " * pad + "\n").encode("latin1")
+    with path.open("wb") as handle:
+        handle.write(NPY_MAGIC + len(header_bytes).to_bytes(2, "little") + header_bytes)
+        values.tofile(handle)
+
+
+def _measure(entry: Dict[str, Any], field: str) -> float:
+    value = entry.get(field)
+    return float(value) if isinstance(value, (int, float)) else math.nan
+
+
+@traced("export_columns")
+def export_columns(memory_log_path: Path, out_dir: Path, parquet: bool = False) -> Dict[str, Any]:
+    """Write every column plus manifest.json; returns the manifest."""
+    signature = log_signature(memory_log_path)
+    source_files = log_files(memory_log_path)
+    dictionaries = {name: Dictionary() for name in CATEGORICAL + MULTI_VALUED}
+    day = array("i")
+    categorical = {name: array("i") for name in CATEGORICAL}
+    measures = {name: array("f") for name in MEASURES}
+    offsets = {name: array("q", [0]) for name in MULTI_VALUED}
+    codes = {name: array("i") for name in MULTI_VALUED}
+    line_file = array("i")
+    line_offset = array("q")
+    line_length = array("i")
+
+    for file_code, record in _iter_records(source_files):
+        entry = record.entry
+        parsed = parse_date(str(entry.get("timestamp_utc", "")))
+        day.append(date.fromisoformat(parsed).toordinal() - EPOCH_ORDINAL if parsed else -1)
+        categorical["outcome"].append(dictionaries["outcome"].encode(str(entry.get("outcome", "unknown"))))
+        categorical["agent_role"].append(dictionaries["agent_role"].encode(str(entry.get("agent_role", ""))))
+        categorical["task_id"].append(dictionaries["task_id"].encode(str(entry.get("task_id") or "")))
+        for name in MEASURES:
+            measures[name].append(_measure(entry, name))
+
+        values = {"failure_tag": entry_failure_tags(entry), "subsystem": entry_subsystems(entry)}
+        for name in MULTI_VALUED:
+            codes[name].extend(dictionaries[name].encode(value) for value in values[name])
+            offsets[name].append(len(codes[name]))
+
+        line_file.append(file_code)
+        line_offset.append(record.offset)
+        line_length.append(record.length)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    columns: Dict[str, array] = {
+        "day": day,
+        "line_file": array(code_typecode(len(source_files)), line_file),
+        "line_offset": line_offset,
+        "line_length": line_length,
+    }
+    for name in CATEGORICAL:
+        columns[name] = array(code_typecode(len(dictionaries[name].codes)), categorical[name])
+    columns.update(measures)
+    for name in MULTI_VALUED:
+        columns[f"{name}_offsets"] = offsets[name]
+        columns[f"{name}_codes"] = array(code_typecode(len(dictionaries[name].codes)), codes[name])
+    for name, values in columns.items():
+        write_npy(out_dir / f"{name}.npy", values)
+
+    manifest = {
+        "version": COLUMNS_VERSION,
+        "rows": len(day),
+        "source_path": str(memory_log_path.resolve()),
+        "source_signature": signature,
+        "source_files": [path.name for path in source_files],
+        "columns": {name: {"file": f"{name}.npy", "dtype": NPY_DESCR[values.typecode]} for name, values in columns.items()},
+        "dictionaries": {name: dictionary.values for name, dictionary in dictionaries.items()},
+    }
+    if parquet:
+        manifest["parquet"] = write_parquet(out_dir, columns, {**manifest["dictionaries"], "line_file": manifest["source_files"]})
+    tmp_path = out_dir / "manifest.json.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, out_dir / "manifest.json")
+    return manifest
+
+
+def _iter_records(source_files: List[Path]) -> Iterator[Tuple[int, JsonlRecord]]:
+    for file_code, path in enumerate(source_files):
+        for record in JsonlStream(path, 0, path.stat().st_size):
+            yield file_code, record
+
+
+def write_parquet(out_dir: Path, columns: Dict[str, array], dictionaries: Dict[str, List[str]]) -> str | None:
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError:
+        print("[COLUMNS][WARN] pyarrow not installed; skipping Parquet output.", file=sys.stderr)
+        return None
+
+    def categorical(name: str, values: array) -> Any:
+        return pa.DictionaryArray.from_arrays(pa.array(values, type=pa.int32()), pa.array(dictionaries[name]))
+
+    def multi_valued(name: str) -> Any:
+        flat = categorical(name, columns[f"{name}_codes"])
+        return pa.ListArray.from_arrays(pa.array(columns[f"{name}_offsets"], type=pa.int32()), flat)
+
+    days = [date.fromordinal(EPOCH_ORDINAL + d) if d >= 0 else None for d in columns["day"]]
+    table = pa.table(
+        {
+            "day": pa.array(days, type=pa.date32()),
+            **{name: categorical(name, columns[name]) for name in CATEGORICAL},
+            **{name: pa.array(columns[name], type=pa.float32(), from_pandas=True) for name in MEASURES},
+            "failure_tags": multi_valued("failure_tag"),
+            "subsystems": multi_valued("subsystem"),
+            "line_file": categorical("line_file", columns["line_file"]),
+            "line_offset": pa.array(columns["line_offset"], type=pa.int64()),
+            "line_length": pa.array(columns["line_length"], type=pa.int32()),
+        }
+    )
+    pq.write_table(table, out_dir / "memory_columns.parquet")
+    return "memory_columns.parquet"
+
+
+def read_manifest(out_dir: Path) -> Dict[str, Any] | None:
+    try:
+        manifest = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and manifest.get("version") == COLUMNS_VERSION else None
+
+
+def ensure_columns(memory_log_path: Path, out_dir: Path) -> Dict[str, Any]:
+    """Re-export when the manifest is missing or was built from a different log state."""
+    manifest = read_manifest(out_dir)
+    if (
+        manifest is not None
+        and manifest.get("source_path") == str(memory_log_path.resolve())
+        and manifest.get("source_signature") == log_signature(memory_log_path)
+    ):
+        return manifest
+    return export_columns(memory_log_path, out_dir)
+
+
+def load_columns(out_dir: Path, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    if np is None:
+        raise RuntimeError("numpy is required for columnar reporting")
+    return {name: np.load(out_dir / spec["file"], mmap_mode="r") for name, spec in manifest["columns"].items()}
+
+
+def _day_string(day: int) -> str:
+    return date.fromordinal(EPOCH_ORDINAL + int(day)).isoformat()
+
+
+@traced("columnar_rollups")
+def columnar_rollups(
+    out_dir: Path, manifest: Dict[str, Any], date_from: str, date_to: str
+) -> Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]], List[Tuple[int, int]]]:
+    """Per-day (total_rows, count_rows) in the daily_rollup/daily_counts shapes, plus the
+    (file name, offset, length) log spans of the selected rows."""
+    cols = load_columns(out_dir, manifest)
+    lo = date.fromisoformat(date_from).toordinal() - EPOCH_ORDINAL
+    hi = date.fromisoformat(date_to).toordinal() - EPOCH_ORDINAL
+    day = np.asarray(cols["day"])
+    mask = (day >= lo) & (day <= hi)
+    selected = np.nonzero(mask)[0]
+    if selected.size == 0:
+        return [], [], []
+
+    days, inverse = np.unique(day[selected], return_inverse=True)
+    n_days = len(days)
+    labels = [_day_string(d) for d in days]
+    totals = np.bincount(inverse, minlength=n_days)
+    measure_columns = []
+    for name in MEASURES:
+        values = np.asarray(cols[name])[selected].astype(np.float64)
+        present = ~np.isnan(values)
+        measure_columns.append(np.bincount(inverse[present], weights=values[present], minlength=n_days))
+        measure_columns.append(np.bincount(inverse[present], minlength=n_days))
+    total_rows = []
+    for i in range(n_days):
+        row: List[Any] = [labels[i], int(totals[i])]
+        for sums, present_counts in zip(measure_columns[::2], measure_columns[1::2]):
+            row += [float(sums[i]), int(present_counts[i])]
+        total_rows.append(tuple(row))
+
+    def counts(dimension: str, day_index: Any, value_codes: Any) -> List[Tuple[Any, ...]]:
+        size = max(1, len(manifest["dictionaries"][dimension]))
+        pairs = np.bincount(day_index * size + value_codes, minlength=n_days * size)
+        names = manifest["dictionaries"][dimension]
+        return [(labels[i // size], dimension, names[i % size], int(pairs[i])) for i in np.nonzero(pairs)[0]]
+
+    outcome_codes = np.asarray(cols["outcome"])[selected].astype(np.int64)
+    count_rows = counts("outcome", inverse, outcome_codes)
+
+    row_day = np.full(len(day), -1, dtype=np.int64)
+    row_day[selected] = inverse
+    for name in MULTI_VALUED:
+        offsets = np.asarray(cols[f"{name}_offsets"])
+        item_row = np.repeat(np.arange(len(day)), np.diff(offsets))
+        item_day = row_day[item_row]
+        keep = item_day >= 0
+        item_codes = np.asarray(cols[f"{name}_codes"]).astype(np.int64)[keep]
+        count_rows.extend(counts(name, item_day[keep], item_codes))
+
+    files = [manifest["source_files"][code] for code in np.asarray(cols["line_file"])[selected].tolist()]
+    offsets = np.asarray(cols["line_offset"])[selected].tolist()
+    lengths = np.asarray(cols["line_length"])[selected].tolist()
+    spans = list(zip(files, offsets, lengths))
+    return total_rows, count_rows, spans
+
+
+def read_entries(memory_log_path: Path, spans: List[Tuple[str, int, int]]) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    handles: Dict[str, BinaryIO] = {}
+    try:
+        for name, offset, length in spans:
+            if name not in handles:
+                path = memory_log_path / name if memory_log_path.is_dir() else memory_log_path
+                handles[name] = path.open("rb")
+            handle = handles[name]
+            handle.seek(offset)
+            entries.append(json.loads(handle.read(length)))
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export memory_log.jsonl into columnar .npy (and Parquet) files.")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--out-dir", default="res://ai_library/docs/memory_columns", help="Output directory")
+    parser.add_argument("--parquet", action="store_true", help="Also write memory_columns.parquet (needs pyarrow)")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    out_dir = resolve_project_path(args.out_dir)
+    manifest = export_columns(resolve_project_path(args.memory_log), out_dir, parquet=args.parquet)
+    print(f"[COLUMNS][PASS] Rows: {manifest['rows']}")
+    print(f"[COLUMNS][PASS] Columns: {len(manifest['columns'])}")
+    if manifest.get("parquet"):
+        print(f"[COLUMNS][PASS] Parquet: {out_dir / manifest['parquet']}")
+    print(f"[COLUMNS][PASS] Output: {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
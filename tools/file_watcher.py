@@ -0,0 +1,185 @@
+"""
+File watchers for ai_pipeline_daemon.
+
+Watch targets are project-relative paths: a plain file (`package.json`) or a directory
+ending in `/` (`src/data/`), which is watched recursively. Both watchers expose the
+same `wait(timeout)` call returning the sorted relative file paths that changed.
+
+On Linux the inotify watcher reacts within milliseconds and does not wake up while
+idle; everywhere else (or if inotify is unavailable) the polling watcher compares
+(mtime_ns, size) snapshots every `poll_seconds`.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+Fingerprint = Optional[Tuple[int, int]]
+
+
+def _split_targets(targets: List[str]) -> Tuple[Set[str], List[str]]:
+    files = {t for t in targets if not t.endswith("/")}
+    dirs = [t for t in targets if t.endswith("/")]
+    return files, dirs
+
+
+def file_fingerprint(path: Path) -> Fingerprint:
+    if not path.exists() or not path.is_file():
+        return None
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class PollingWatcher:
+    """Snapshot-diff watcher; the portable fallback."""
+
+    def __init__(self, root: Path, targets: List[str], poll_seconds: float) -> None:
+        self.root = root
+        self.files, self.dirs = _split_targets(targets)
+        self.poll_seconds = poll_seconds
+        self.previous = self.snapshot()
+
+    def snapshot(self) -> Dict[str, Fingerprint]:
+        snap: Dict[str, Fingerprint] = {rel: file_fingerprint(self.root / rel) for rel in self.files}
+        for rel_dir in self.dirs:
+            base = self.root / rel_dir
+            if not base.is_dir():
+                continue
+            for dirpath, _, filenames in os.walk(base):
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    snap[path.relative_to(self.root).as_posix()] = file_fingerprint(path)
+        return snap
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        time.sleep(self.poll_seconds if timeout is None else min(timeout, self.poll_seconds))
+        current = self.snapshot()
+        keys = set(self.previous) | set(current)
+        changed = sorted(key for key in keys if self.previous.get(key) != current.get(key))
+        self.previous = current
+        return changed
+
+    def close(self) -> None:
+        return None
+
+
+class InotifyWatcher:
+    """Linux inotify watcher; files are watched through their parent directory so
+    atomic replace-by-rename is still observed."""
+
+    def __init__(self, root: Path, targets: List[str]) -> None:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = root
+        self.files, self.dirs = _split_targets(targets)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Path] = {}
+
+        for rel in self.files:
+            parent = (root / rel).parent
+            if parent.is_dir():
+                self._add_watch(parent)
+        for rel_dir in self.dirs:
+            base = root / rel_dir
+            if base.is_dir():
+                self._add_tree(base)
+
+    def _add_watch(self, directory: Path) -> None:
+        if directory in self.watches.values():
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def _add_tree(self, base: Path) -> List[str]:
+        """Watch `base` and its subdirectories; returns files already inside them."""
+        found: List[str] = []
+        for dirpath, _, filenames in os.walk(base):
+            self._add_watch(Path(dirpath))
+            found.extend(self._relative(Path(dirpath) / name) for name in filenames)
+        return found
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    def _is_target(self, rel: str) -> bool:
+        return rel in self.files or any(rel.startswith(rel_dir) for rel_dir in self.dirs)
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        changed: Set[str] = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.files)
+                    changed.update(self.dirs)
+                    continue
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                rel = self._relative(path)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._is_target(rel + "/"):
+                        changed.update(self._add_tree(path))
+                    continue
+                if self._is_target(rel):
+                    changed.add(rel)
+        return sorted(changed)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def create_watcher(root: Path, targets: List[str], poll_seconds: float, mode: str = "auto") -> PollingWatcher | InotifyWatcher:
+    """Build the requested watcher; "auto" prefers inotify and falls back to polling."""
+    if mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, targets)
+        except (OSError, AttributeError):
+            if mode == "inotify":
+                raise
+    elif mode == "inotify":
+        raise OSError("inotify is only available on Linux")
+    return PollingWatcher(root, targets, poll_seconds)
@@ -1,22 +1,44 @@
 #!/usr/bin/env python3
 """
-Generate a daily metrics report from memory_log.jsonl.
+Generate a daily (or date-range) metrics report from memory_log.jsonl.
+
+Aggregates come from the per-day rollup tables maintained by build_memory_index.py, so
+a 90-day range costs a few SQL queries after the index is refreshed. Range reports add
+daily and weekly trend tables. With `--db-path ""` (or when the index was built from a
+different log) the log is scanned instead. With `--columns DIR` the metrics are computed
+with numpy over the columnar export of tools/export_memory_columns.py, refreshing the
+export first if the log changed.
 
 Usage:
   python tools/generate_daily_report.py \
     --memory-log res://ai_library/docs/memory_log.jsonl \
     --date 2026-02-16 \
     --out res://ai_library/docs/reports/daily_metrics_2026-02-16.md
+
+  python tools/generate_daily_report.py \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --from 2026-02-01 --to 2026-02-28
 """
 
 from __future__ import annotations
 
 import argparse
-import json
+import sqlite3
+import sys
 from collections import Counter
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from build_memory_index import RollupAccumulator, ensure_schema, fetch_entries, parse_date, read_index_meta, sync_index
+from export_memory_columns import columnar_rollups, ensure_columns, read_entries
+from jsonl_stream import iter_jsonl
+from tracing import add_trace_arguments, run_main, span, traced
+
+DEFAULT_DB_PATH = "res://ai_library/docs/ai_memory_index.db"
+TOP_N = 5
+WEEKLY_TREND_MIN_DAYS = 15
 
 
 def resolve_project_path(raw_path: str) -> Path:
@@ -27,84 +49,192 @@ def resolve_project_path(raw_path: str) -> Path:
     return Path(value)
 
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    if not path.exists():
-        raise FileNotFoundError(f"Memory log not found: {path}")
+@dataclass
+class RollupData:
+    total_rows: List[Tuple[Any, ...]]
+    count_rows: List[Tuple[Any, ...]]
+    source: str
+    task_entries: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@traced("load_rollups")
+def load_rollups_from_log(memory_log_path: Path, date_from: str, date_to: str) -> RollupData:
+    rollups = RollupAccumulator()
+    task_entries: List[Dict[str, Any]] = []
+    for entry in iter_jsonl(memory_log_path):
+        day = parse_date(str(entry.get("timestamp_utc", "")))
+        if not day or not date_from <= day <= date_to:
+            continue
+        rollups.add(str(entry.get("memory_id", "")), entry)
+        if date_from == date_to:
+            task_entries.append(entry)
+    return RollupData(rollups.total_rows(), rollups.count_rows(), "log scan", task_entries)
+
+
+@traced("load_rollups")
+def load_rollups_from_index(db_path: Path, memory_log_path: Path, date_from: str, date_to: str) -> RollupData:
+    """Refresh the index, then read the range from its rollup tables."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
+        indexed_source = read_index_meta(conn).get("source_path")
+        if indexed_source is not None and indexed_source != str(memory_log_path.resolve()):
+            raise LookupError(f"Memory index {db_path} was built from {indexed_source}")
+        sync_index(memory_log_path, conn)
+        conn.commit()
+
+        total_rows = conn.execute(
+            """
+            SELECT day, total, confidence_sum, confidence_n, calibrated_sum, calibrated_n,
+                   time_to_green_sum, time_to_green_n
+            FROM daily_rollup
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day
+            """,
+            (date_from, date_to),
+        ).fetchall()
+        count_rows = conn.execute(
+            "SELECT day, dimension, name, count FROM daily_counts WHERE day BETWEEN ? AND ?",
+            (date_from, date_to),
+        ).fetchall()
+        task_entries: List[Dict[str, Any]] = []
+        if date_from == date_to:
+            rows = conn.execute(
+                """
+                SELECT m.memory_id, m.source_file, m.byte_offset, m.byte_length
+                FROM memory_days d
+                JOIN memories m ON m.memory_id = d.memory_id
+                WHERE d.day = ?
+                ORDER BY m.rowid
+                """,
+                (date_from,),
+            ).fetchall()
+            task_entries = fetch_entries(memory_log_path, rows)
+    return RollupData(total_rows, count_rows, "memory index", task_entries)
+
+
+@traced("load_rollups")
+def load_rollups_from_columns(columns_dir: Path, memory_log_path: Path, date_from: str, date_to: str) -> RollupData:
+    manifest = ensure_columns(memory_log_path, columns_dir)
+    total_rows, count_rows, spans = columnar_rollups(columns_dir, manifest, date_from, date_to)
+    task_entries = read_entries(memory_log_path, spans) if date_from == date_to else []
+    return RollupData(total_rows, count_rows, "columnar export", task_entries)
+
+
+def top_counts(counter: Counter[str], limit: Optional[int] = TOP_N) -> List[Tuple[str, int]]:
+    ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    return ranked if limit is None else ranked[:limit]
+
+
+def _averages(rows: Iterable[Tuple[Any, ...]]) -> Tuple[int, float, float, float]:
+    sums = [0.0] * 7
+    for row in rows:
+        for i, value in enumerate(row[1:8]):
+            sums[i] += value
+
+    def avg(total: float, count: float) -> float:
+        return total / count if count else 0.0
+
+    return int(sums[0]), avg(sums[1], sums[2]), avg(sums[3], sums[4]), avg(sums[5], sums[6])
+
+
+def _trend_row(label: str, rows: List[Tuple[Any, ...]], tags: Counter[str]) -> Dict[str, Any]:
+    total, avg_confidence, avg_calibrated, avg_time_to_green = _averages(rows)
+    top_tag = top_counts(tags, 1)
+    return {
+        "label": label,
+        "total": total,
+        "avg_confidence": avg_confidence,
+        "avg_calibrated": avg_calibrated,
+        "avg_time_to_green": avg_time_to_green,
+        "top_tag": top_tag[0] if top_tag else None,
+    }
 
-    rows: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as handle:
-        for line_no, line in enumerate(handle, start=1):
-            text = line.strip()
-            if not text:
-                continue
-            obj = json.loads(text)
-            if not isinstance(obj, dict):
-                raise ValueError(f"Line {line_no} is not an object")
-            rows.append(obj)
-    return rows
 
+def iso_week(day: str) -> str:
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
 
-def parse_date(ts: str) -> str:
-    try:
-        return datetime.fromisoformat(ts.replace("Z", "+00:00")).date().isoformat()
-    except Exception:
-        return ""
 
+def summarize_rollups(total_rows: List[Tuple[Any, ...]], count_rows: List[Tuple[Any, ...]]) -> Dict[str, Any]:
+    counters: Dict[str, Counter[str]] = {"outcome": Counter(), "failure_tag": Counter(), "subsystem": Counter()}
+    day_tags: Dict[str, Counter[str]] = {}
+    for day, dimension, name, count in count_rows:
+        counters.setdefault(dimension, Counter())[name] += count
+        if dimension == "failure_tag":
+            day_tags.setdefault(day, Counter())[name] += count
 
-def summarize(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-    outcomes = Counter(str(e.get("outcome", "unknown")) for e in entries)
-    tag_counter: Counter[str] = Counter()
-    subsystem_counter: Counter[str] = Counter()
-
-    confidence_vals: List[float] = []
-    calibrated_vals: List[float] = []
-    time_to_green_vals: List[float] = []
+    total, avg_confidence, avg_calibrated, avg_time_to_green = _averages(total_rows)
+    ordered = sorted(total_rows, key=lambda row: row[0])
+    daily = [_trend_row(row[0], [row], day_tags.get(row[0], Counter())) for row in ordered]
 
-    for entry in entries:
-        for tag in entry.get("failure_tags", []):
-            tag_counter[str(tag)] += 1
-
-        for file_path in entry.get("files_touched", []):
-            path = str(file_path)
-            marker = "systems/"
-            if marker in path:
-                subsystem = path.split(marker, maxsplit=1)[1].split("/", maxsplit=1)[0]
-                subsystem_counter[subsystem] += 1
-
-        if isinstance(entry.get("confidence"), (int, float)):
-            confidence_vals.append(float(entry["confidence"]))
-        if isinstance(entry.get("confidence_calibrated"), (int, float)):
-            calibrated_vals.append(float(entry["confidence_calibrated"]))
-        if isinstance(entry.get("time_to_green_minutes"), (int, float)):
-            time_to_green_vals.append(float(entry["time_to_green_minutes"]))
-
-    def avg(values: List[float]) -> float:
-        return sum(values) / len(values) if values else 0.0
+    weeks: Dict[str, List[Tuple[Any, ...]]] = {}
+    week_tags: Dict[str, Counter[str]] = {}
+    for row in ordered:
+        week = iso_week(row[0])
+        weeks.setdefault(week, []).append(row)
+        week_tags.setdefault(week, Counter()).update(day_tags.get(row[0], Counter()))
+    weekly = [_trend_row(week, rows, week_tags[week]) for week, rows in weeks.items()]
 
     return {
-        "total": len(entries),
-        "outcomes": outcomes,
-        "top_tags": tag_counter.most_common(5),
-        "top_subsystems": subsystem_counter.most_common(5),
-        "avg_confidence": avg(confidence_vals),
-        "avg_calibrated": avg(calibrated_vals),
-        "avg_time_to_green": avg(time_to_green_vals),
+        "total": total,
+        "outcomes": counters["outcome"],
+        "top_tags": top_counts(counters["failure_tag"]),
+        "top_subsystems": top_counts(counters["subsystem"]),
+        "avg_confidence": avg_confidence,
+        "avg_calibrated": avg_calibrated,
+        "avg_time_to_green": avg_time_to_green,
+        "active_days": len(ordered),
+        "daily_trend": daily,
+        "weekly_trend": weekly,
     }
 
 
-def build_markdown(date_str: str, summary: Dict[str, Any], entries: List[Dict[str, Any]]) -> str:
+def summarize(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    rollups = RollupAccumulator()
+    for entry in entries:
+        rollups.add(str(entry.get("memory_id", "")), entry)
+    return summarize_rollups(rollups.total_rows(), rollups.count_rows())
+
+
+def _trend_table(rows: List[Dict[str, Any]], heading: str) -> List[str]:
+    lines = [
+        f"| {heading} | Reflections | Avg confidence | Avg calibrated | Avg time-to-green (min) | Top failure tag |",
+        "|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        tag = f"{row['top_tag'][0]} ({row['top_tag'][1]})" if row["top_tag"] else "-"
+        lines.append(
+            f"| {row['label']} | {row['total']} | {row['avg_confidence']:.2f} | {row['avg_calibrated']:.2f} | {row['avg_time_to_green']:.1f} | {tag} |"
+        )
+    return lines
+
+
+@traced("render")
+def build_markdown(
+    date_str: str,
+    summary: Dict[str, Any],
+    entries: List[Dict[str, Any]],
+    date_to: Optional[str] = None,
+) -> str:
+    is_range = date_to is not None and date_to != date_str
     lines: List[str] = []
-    lines.append(f"# Daily AI Metrics Report - {date_str}")
+    if is_range:
+        lines.append(f"# AI Metrics Report - {date_str} to {date_to}")
+    else:
+        lines.append(f"# Daily AI Metrics Report - {date_str}")
     lines.append("")
     lines.append("## Snapshot")
     lines.append(f"- Total task reflections: {summary['total']}")
+    if is_range:
+        lines.append(f"- Days with reflections: {summary['active_days']}")
     lines.append(f"- Avg confidence: {summary['avg_confidence']:.2f}")
     lines.append(f"- Avg calibrated confidence: {summary['avg_calibrated']:.2f}")
     lines.append(f"- Avg time-to-green (min): {summary['avg_time_to_green']:.1f}")
     lines.append("")
 
     lines.append("## Outcome Distribution")
-    for name, count in summary["outcomes"].items():
+    for name, count in top_counts(summary["outcomes"], None):
         lines.append(f"- {name}: {count}")
     lines.append("")
 
@@ -124,13 +254,26 @@ def build_markdown(date_str: str, summary: Dict[str, Any], entries: List[Dict[st
         lines.append("- None")
     lines.append("")
 
-    lines.append("## Task Rows")
-    for entry in entries:
-        lines.append(
-            f"- {entry.get('task_id', 'N/A')} | {entry.get('feature', 'N/A')} | outcome={entry.get('outcome', 'N/A')} | confidence={entry.get('confidence', 'N/A')}"
-        )
+    if is_range:
+        lines.append("## Daily Trend")
+        if summary["daily_trend"]:
+            lines.extend(_trend_table(summary["daily_trend"], "Day"))
+        else:
+            lines.append("- No reflections in range.")
+        lines.append("")
+        span_days = (date.fromisoformat(date_to) - date.fromisoformat(date_str)).days + 1
+        if span_days >= WEEKLY_TREND_MIN_DAYS:
+            lines.append("## Weekly Trend")
+            lines.extend(_trend_table(summary["weekly_trend"], "ISO week"))
+            lines.append("")
+    else:
+        lines.append("## Task Rows")
+        for entry in entries:
+            lines.append(
+                f"- {entry.get('task_id', 'N/A')} | {entry.get('feature', 'N/A')} | outcome={entry.get('outcome', 'N/A')} | confidence={entry.get('confidence', 'N/A')}"
+            )
+        lines.append("")
 
-    lines.append("")
     lines.append("## Notes")
     lines.append("- Use this report to drive top-3 failure-tag weekly prevention actions.")
     lines.append("- Compare confidence vs calibrated confidence to detect overconfidence drift.")
@@ -138,33 +281,96 @@ def build_markdown(date_str: str, summary: Dict[str, Any], entries: List[Dict[st
     return "\n".join(lines) + "\n"
 
 
+@dataclass
+class ReportResult:
+    date: str
+    date_to: str
+    entries: int
+    output_path: Path
+    summary: Dict[str, Any]
+    source: str
+
+
+def generate_report(
+    memory_log_path: Path,
+    target_date: str,
+    output_path: Path | None = None,
+    date_to: str | None = None,
+    db_path: Path | None = None,
+    columns_dir: Path | None = None,
+) -> ReportResult:
+    """Programmatic entry point: write the report for target_date (through date_to) and return its summary."""
+    date_to = date_to or target_date
+    data: RollupData | None = None
+    if columns_dir is not None:
+        try:
+            data = load_rollups_from_columns(columns_dir, memory_log_path, target_date, date_to)
+        except RuntimeError as exc:
+            print(f"[REPORT][WARN] {exc}; falling back to the memory index or log scan.", file=sys.stderr)
+    if data is None and db_path is not None:
+        try:
+            data = load_rollups_from_index(db_path, memory_log_path, target_date, date_to)
+        except (LookupError, sqlite3.DatabaseError):
+            data = None
+    if data is None:
+        data = load_rollups_from_log(memory_log_path, target_date, date_to)
+
+    summary = summarize_rollups(data.total_rows, data.count_rows)
+    markdown = build_markdown(target_date, summary, data.task_entries, date_to)
+
+    if output_path is None:
+        name = f"daily_metrics_{target_date}.md" if date_to == target_date else f"metrics_{target_date}_to_{date_to}.md"
+        output_path = resolve_project_path(f"res://ai_library/docs/reports/{name}")
+    with span("write"):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(markdown, encoding="utf-8")
+    return ReportResult(target_date, date_to, summary["total"], output_path, summary, data.source)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Generate daily AI quality metrics report from memory log.")
-    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
     parser.add_argument("--date", help="Date in YYYY-MM-DD (UTC). Defaults to today UTC")
+    parser.add_argument("--from", dest="date_from", help="First day of a range report (YYYY-MM-DD, UTC)")
+    parser.add_argument("--to", dest="date_to", help="Last day of a range report (YYYY-MM-DD, UTC)")
     parser.add_argument("--out", help="Output markdown path")
+    parser.add_argument(
+        "--db-path",
+        default=DEFAULT_DB_PATH,
+        help="SQLite memory index whose rollups are used (empty string scans the log instead)",
+    )
+    parser.add_argument("--columns", help="Columnar export directory to compute the metrics from (needs numpy)")
+    add_trace_arguments(parser)
     args = parser.parse_args()
 
-    memory_log_path = resolve_project_path(args.memory_log)
-    target_date = args.date or datetime.now(timezone.utc).date().isoformat()
-
-    all_entries = load_jsonl(memory_log_path)
-    entries = [entry for entry in all_entries if parse_date(str(entry.get("timestamp_utc", ""))) == target_date]
-
-    summary = summarize(entries)
-    markdown = build_markdown(target_date, summary, entries)
-
-    output_path = resolve_project_path(args.out) if args.out else resolve_project_path(
-        f"res://ai_library/docs/reports/daily_metrics_{target_date}.md"
+    if args.date and (args.date_from or args.date_to):
+        parser.error("--date cannot be combined with --from/--to")
+    date_from = args.date_from or args.date_to or args.date or datetime.now(timezone.utc).date().isoformat()
+    date_to = args.date_to or date_from
+    try:
+        if date.fromisoformat(date_from) > date.fromisoformat(date_to):
+            parser.error("--from must not be after --to")
+    except ValueError as exc:
+        parser.error(f"Invalid date: {exc}")
+
+    result = generate_report(
+        resolve_project_path(args.memory_log),
+        date_from,
+        resolve_project_path(args.out) if args.out else None,
+        date_to=date_to,
+        db_path=resolve_project_path(args.db_path) if args.db_path else None,
+        columns_dir=resolve_project_path(args.columns) if args.columns else None,
     )
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(markdown, encoding="utf-8")
 
-    print(f"[REPORT][PASS] Date: {target_date}")
-    print(f"[REPORT][PASS] Entries: {len(entries)}")
-    print(f"[REPORT][PASS] Output: {output_path}")
+    if result.date_to == result.date:
+        print(f"[REPORT][PASS] Date: {result.date}")
+    else:
+        print(f"[REPORT][PASS] Range: {result.date} to {result.date_to}")
+    print(f"[REPORT][PASS] Entries: {result.entries}")
+    print(f"[REPORT][PASS] Source: {result.source}")
+    print(f"[REPORT][PASS] Output: {result.output_path}")
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
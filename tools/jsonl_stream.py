@@ -0,0 +1,217 @@
+"""
+Streaming JSONL reader shared by the tools/ scripts.
+
+Entries are parsed lazily one line at a time so callers can build generator
+pipelines over memory_log.jsonl without materializing the whole log. Reading can
+start at a byte offset (for incremental consumers) and stop at an end offset (to
+ignore a concurrent writer's partial append: with an end bound, an unterminated last
+line is read only if it already parses, so a torn line is left for the next pass).
+
+A memory log is either a single JSONL file or a shard directory (for example
+`memory_log/2026-02.jsonl`, see memory_shards.py). `log_files()` lists the files of
+either layout in read order; `iter_jsonl()`, `load_jsonl()` and `iter_jsonl_reverse()`
+read a shard directory as if it were one concatenated log. `LogMap` serves single lines
+by byte range from memory maps of the log files.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+from tracing import traced
+
+REVERSE_BLOCK_BYTES = 64 * 1024
+SHARD_SUFFIX = ".jsonl"
+
+
+def log_files(path: Path) -> List[Path]:
+    """The JSONL files making up a memory log: the file itself, or a directory's shards by name."""
+    if path.is_dir():
+        return sorted(child for child in path.iterdir() if child.is_file() and child.name.endswith(SHARD_SUFFIX))
+    return [path]
+
+
+def log_signature(path: Path) -> str:
+    """Cheap change marker for a log of either layout: name, size and mtime of every file."""
+    parts = []
+    for file_path in log_files(path):
+        stat = file_path.stat()
+        parts.append(f"{file_path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts)
+
+
+class JsonlRecord(NamedTuple):
+    line_no: int
+    offset: int
+    length: int
+    entry: Dict[str, Any]
+    text: str
+
+
+class JsonlStream:
+    """Iterable over the JSON object lines of `path` in the byte range [offset, end).
+
+    After (or during) iteration `lines_read` and `position` report how far the stream
+    got, including blank lines, so incremental consumers can persist a resume point.
+    When `digest` is given it is updated with every consumed byte.
+
+    With `end` set, a last line without a newline that is not yet a whole JSON object is
+    treated as a writer's append in progress: it is neither parsed, counted nor hashed,
+    and `position` stays at the end of the last complete line. A log whose final entry
+    merely lacks the newline is read to `end`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int = 0,
+        end: int | None = None,
+        first_line_no: int = 1,
+        digest: Any = None,
+        label: str = "Memory log",
+    ) -> None:
+        if not path.exists():
+            raise FileNotFoundError(f"{label} not found: {path}")
+        self.path = path
+        self.offset = offset
+        self.end = end
+        self.first_line_no = first_line_no
+        self.digest = digest
+        self.lines_read = 0
+        self.position = offset
+
+    def __iter__(self) -> Iterator[JsonlRecord]:
+        end = self.end
+        with self.path.open("rb") as handle:
+            handle.seek(self.offset)
+            for line_no, raw in enumerate(handle, start=self.first_line_no):
+                if end is not None and (
+                    self.position + len(raw) > end or (not raw.endswith(b"\n") and not _complete_tail(raw))
+                ):
+                    break
+                start = self.position
+                self.position += len(raw)
+                self.lines_read += 1
+                if self.digest is not None:
+                    self.digest.update(raw)
+                text = raw.decode("utf-8").strip()
+                if not text:
+                    continue
+                try:
+                    obj = json.loads(text)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Invalid JSON at line {line_no}: {exc}") from exc
+                if not isinstance(obj, dict):
+                    raise ValueError(f"Line {line_no} is not a JSON object")
+                yield JsonlRecord(line_no, start, len(raw), obj, text)
+
+
+def _complete_tail(raw: bytes) -> bool:
+    """True when an unterminated last line already holds a whole JSON object."""
+    try:
+        return isinstance(json.loads(raw), dict)
+    except ValueError:
+        return False
+
+
+def iter_jsonl(path: Path, offset: int = 0, label: str = "Memory log") -> Iterator[Dict[str, Any]]:
+    if path.is_dir():
+        for shard in log_files(path):
+            yield from iter_jsonl(shard, label=f"{label} shard")
+        return
+    for record in JsonlStream(path, offset=offset, label=label):
+        yield record.entry
+
+
+class LogMap:
+    """Read-only memory maps of a log's files, for fetching lines by (file, offset, length).
+
+    `source_file` is the shard name inside a shard directory, or "" for a single-file log.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def __enter__(self) -> "LogMap":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+
+    def line(self, source_file: str, offset: int, length: int) -> bytes:
+        mapped = self._maps.get(source_file)
+        if mapped is None:
+            file_path = self.path / source_file if source_file else self.path
+            with file_path.open("rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[source_file] = mapped
+        if offset < 0 or length < 0 or offset + length > len(mapped):
+            raise ValueError(f"Byte range {offset}+{length} is outside {source_file or self.path.name}")
+        return mapped[offset : offset + length]
+
+
+@traced("load_jsonl")
+def load_jsonl(path: Path, label: str = "Memory log") -> List[Dict[str, Any]]:
+    return list(iter_jsonl(path, label=label))
+
+
+def iter_lines_reverse(path: Path, block_size: int = REVERSE_BLOCK_BYTES) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, raw_line) pairs from the end of `path` backwards, reading fixed-size blocks."""
+    with path.open("rb") as handle:
+        handle.seek(0, 2)
+        position = handle.tell()
+        carry = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            handle.seek(position)
+            chunk = handle.read(step) + carry
+            parts = chunk.split(b"\n")
+            carry = parts[0]
+            offset = position + len(carry) + 1
+            complete: List[Tuple[int, bytes]] = []
+            for part in parts[1:]:
+                complete.append((offset, part))
+                offset += len(part) + 1
+            yield from reversed(complete)
+        if carry:
+            yield 0, carry
+
+
+def iter_jsonl_reverse(
+    path: Path, needles: Sequence[str] | None = None, label: str = "Memory log"
+) -> Iterator[JsonlRecord]:
+    """Yield records newest-first; lines containing none of `needles` are skipped without parsing.
+
+    Line numbers are unknown when scanning backwards, so records carry line_no=0 and
+    errors are reported by byte offset instead.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"{label} not found: {path}")
+    if path.is_dir():
+        for shard in reversed(log_files(path)):
+            yield from iter_jsonl_reverse(shard, needles, label=f"{label} shard {shard.name}")
+        return
+    markers = [needle.encode("utf-8") for needle in needles] if needles is not None else None
+    for offset, raw in iter_lines_reverse(path):
+        if markers is not None and not any(marker in raw for marker in markers):
+            continue
+        text = raw.decode("utf-8").strip()
+        if not text:
+            continue
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{label}: invalid JSON at byte offset {offset}: {exc}") from exc
+        if not isinstance(obj, dict):
+            raise ValueError(f"{label}: line at byte offset {offset} is not a JSON object")
+        yield JsonlRecord(0, offset, len(raw), obj, text)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Lock-safe group-commit appender for the memory log.
+
+Agent lanes (coder, validator, planner, ...) append reflections through
+`MemoryAppender.append()` / `append_many()` instead of opening memory_log.jsonl
+themselves:
+
+- every entry is checked with the gate's compiled memory-entry validator (required
+  fields, allowed failure tags, gate policy) before anything is written; a call whose
+  entries fail validation or reuse an indexed memory_id is rejected as a whole
+- writers in the same process queue up while a commit is in flight; the next leader
+  writes everything queued so far with one write + fsync per file (group commit)
+- each commit holds an exclusive advisory lock (`fcntl.flock`) on a sidecar file next
+  to the log (`memory_log.jsonl.lock`, or `memory_log.lock` for a shard directory), so
+  separate processes never interleave their lines
+- with a database path, the committed rows are pushed straight into the SQLite index.
+  The appender keeps the SHA-256 of the log prefix it last indexed, so a push extends
+  `index_meta` without rehashing the log; when the log or index moved on underneath it
+  (another writer without an index, a rewrite) it falls back to
+  build_memory_index.sync_index.
+
+A shard directory (see memory_shards.py) is appended to by month of `timestamp_utc`;
+its index pushes always go through sync_index. Shard appends do not update
+manifest.json; run `memory_shards.py manifest` before relying on `verify`.
+
+Usage:
+  python tools/memory_appender.py \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --entry-file reflection.json \
+    [--db-path res://ai_library/docs/ai_memory_index.db]
+
+  # JSONL on stdin, appended as one group commit
+  cat reflections.jsonl | python tools/memory_appender.py --memory-log ... --entry-file -
+
+Exit code:
+  0 = appended
+  1 = rejected (validation or duplicate memory_id)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ai_gate_check import memory_entry_validator
+from build_memory_index import (
+    ROLLUP_VERSION,
+    EntryLocation,
+    append_records,
+    ensure_schema,
+    hash_file_prefix,
+    read_index_meta,
+    resolve_project_path,
+    sync_index,
+    write_index_meta,
+)
+from memory_shards import shard_path_for
+from tracing import add_trace_arguments, run_main, span
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: only in-process serialization
+    fcntl = None  # type: ignore[assignment]
+
+LOCK_SUFFIX = ".lock"
+
+
+class AppendRejected(ValueError):
+    """Raised when entries fail validation or would duplicate an indexed memory_id."""
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+@dataclass
+class AppendResult:
+    memory_ids: List[str]
+    files: List[Path]
+    # Entries written by the group commit that carried this call (>= len(memory_ids)).
+    batch_entries: int
+    # "none" without a database, "pushed" for a direct push, else the sync_index mode.
+    index_mode: str
+
+
+@dataclass
+class _Pending:
+    entries: List[Dict[str, Any]]
+    lines: List[str]
+    done: bool = False
+    result: Optional[AppendResult] = None
+    error: Optional[BaseException] = None
+    memory_ids: List[str] = field(default_factory=list)
+
+
+def lock_path_for(memory_log_path: Path) -> Path:
+    return memory_log_path.with_name(memory_log_path.name + LOCK_SUFFIX)
+
+
+@contextmanager
+def log_lock(memory_log_path: Path) -> Iterator[None]:
+    """Exclusive advisory lock shared by every appender of this log, across processes."""
+    lock_path = lock_path_for(memory_log_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def encode_entry(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def validate_entries(entries: List[Dict[str, Any]]) -> List[str]:
+    validator = memory_entry_validator()
+    errors: List[str] = []
+    seen: Dict[str, int] = {}
+    for number, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            errors.append(f"Entry {number}: not a JSON object")
+            continue
+        errors.extend(f"Entry {number} {error}" for error in validator(entry))
+        memory_id = str(entry.get("memory_id", ""))
+        if memory_id in seen:
+            errors.append(f"Entry {number}: memory_id '{memory_id}' repeats entry {seen[memory_id]}")
+        seen.setdefault(memory_id, number)
+    return errors
+
+
+def _needs_separator(path: Path) -> bool:
+    """True when the file is non-empty and its last line is not newline-terminated."""
+    try:
+        with path.open("rb") as handle:
+            handle.seek(-1, os.SEEK_END)
+            return handle.read(1) != b"\n"
+    except OSError:
+        return False
+
+
+def _append_fsync(path: Path, payload: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class MemoryAppender:
+    """Thread-safe appender for one memory log; reuse one instance per process."""
+
+    def __init__(self, memory_log_path: Path, db_path: Optional[Path] = None) -> None:
+        self.memory_log_path = memory_log_path
+        self.db_path = db_path
+        self._cond = threading.Condition()
+        self._queue: List[_Pending] = []
+        self._committing = False
+        self._connection: Optional[sqlite3.Connection] = None
+        # (byte length, sha256 of that prefix) of the log as last indexed by this appender.
+        self._indexed_prefix: Optional[Tuple[int, Any]] = None
+
+    def __enter__(self) -> "MemoryAppender":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._cond:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def append(self, entry: Dict[str, Any]) -> AppendResult:
+        return self.append_many([entry])
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> AppendResult:
+        """Validate and durably append `entries`; blocks until their group commit is done."""
+        errors = validate_entries(entries)
+        if errors:
+            raise AppendRejected(errors)
+        pending = _Pending(entries, [encode_entry(entry) for entry in entries])
+        with self._cond:
+            self._queue.append(pending)
+            while not pending.done:
+                if self._committing:
+                    self._cond.wait()
+                    continue
+                batch, self._queue = self._queue, []
+                self._committing = True
+                self._cond.release()
+                try:
+                    self._commit(batch)
+                except BaseException as exc:
+                    for item in batch:
+                        item.error = item.error or exc
+                finally:
+                    self._cond.acquire()
+                    self._committing = False
+                    for item in batch:
+                        item.done = True
+                    self._cond.notify_all()
+        if pending.error is not None:
+            raise pending.error
+        assert pending.result is not None
+        return pending.result
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            assert self.db_path is not None
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            ensure_schema(self._connection)
+        return self._connection
+
+    def _reject_indexed_duplicates(self, batch: List[_Pending]) -> List[_Pending]:
+        """Fail pending calls whose memory_ids are already indexed (or taken earlier in the batch)."""
+        taken: set[str] = set()
+        if self.db_path is not None:
+            ids = [str(entry.get("memory_id", "")) for item in batch for entry in item.entries]
+            conn = self._db()
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT memory_id FROM memories WHERE memory_id IN ({marks})", chunk)
+                taken.update(row[0] for row in rows)
+        accepted: List[_Pending] = []
+        for item in batch:
+            ids = [str(entry.get("memory_id", "")) for entry in item.entries]
+            clashes = [memory_id for memory_id in ids if memory_id in taken]
+            if clashes:
+                item.error = AppendRejected(
+                    [f"memory_id '{memory_id}' is already in the memory log" for memory_id in clashes]
+                )
+                continue
+            taken.update(ids)
+            item.memory_ids = ids
+            accepted.append(item)
+        return accepted
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        with span("group_commit", entries=sum(len(item.entries) for item in batch)), log_lock(self.memory_log_path):
+            accepted = self._reject_indexed_duplicates(batch)
+            if not accepted:
+                return
+            if self.memory_log_path.is_dir():
+                files = self._write_shards(accepted)
+                index_mode = self._sync_index()
+            else:
+                files = [self.memory_log_path]
+                index_mode = self._write_single(accepted)
+            total = sum(len(item.entries) for item in accepted)
+            for item in accepted:
+                item.result = AppendResult(item.memory_ids, files, total, index_mode)
+
+    def _write_shards(self, accepted: List[_Pending]) -> List[Path]:
+        groups: Dict[Path, List[str]] = {}
+        for item in accepted:
+            for entry, line in zip(item.entries, item.lines):
+                groups.setdefault(shard_path_for(self.memory_log_path, entry), []).append(line)
+        with span("write"):
+            for path, lines in sorted(groups.items()):
+                prefix = "\n" if path.exists() and _needs_separator(path) else ""
+                _append_fsync(path, (prefix + "\n".join(lines) + "\n").encode("utf-8"))
+        return sorted(groups)
+
+    def _write_single(self, accepted: List[_Pending]) -> str:
+        path = self.memory_log_path
+        size_before = path.stat().st_size if path.exists() else 0
+        separator = size_before > 0 and _needs_separator(path)
+        push = self.db_path is not None and not separator and self._can_push(size_before)
+        lines = [line for item in accepted for line in item.lines]
+        payload = (("\n" if separator else "") + "\n".join(lines) + "\n").encode("utf-8")
+        with span("write"):
+            _append_fsync(path, payload)
+        if self.db_path is None:
+            return "none"
+        if not push:
+            return self._sync_index()
+
+        conn = self._db()
+        meta = read_index_meta(conn)
+        stat = path.stat()
+        _, digest = self._indexed_prefix  # type: ignore[misc]
+        digest.update(payload)
+        entries = [entry for item in accepted for entry in item.entries]
+        locations: List[EntryLocation] = []
+        offset = size_before
+        for line in lines:
+            length = len(line.encode("utf-8")) + 1
+            locations.append(("", offset, length))
+            offset += length
+        with span("push_index", entries=len(entries)):
+            try:
+                count = append_records(zip(entries, locations), conn, start_index=int(meta["indexed_entries"]) + 1)
+                write_index_meta(
+                    conn,
+                    {
+                        "source_mtime_ns": stat.st_mtime_ns,
+                        "indexed_bytes": stat.st_size,
+                        "indexed_lines": int(meta["indexed_lines"]) + len(lines),
+                        "indexed_entries": int(meta["indexed_entries"]) + count,
+                        "prefix_sha256": digest.hexdigest(),
+                    },
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                self._indexed_prefix = None
+                raise
+        self._indexed_prefix = (stat.st_size, digest)
+        return "pushed"
+
+    def _can_push(self, size_before: int) -> bool:
+        """True when the index covers exactly the log bytes whose digest this appender holds."""
+        if self._indexed_prefix is None:
+            self._sync_index()
+        if self._indexed_prefix is None:
+            return False
+        meta = read_index_meta(self._db())
+        indexed_bytes, digest = self._indexed_prefix
+        return (
+            indexed_bytes == size_before
+            and meta.get("source_path") == str(self.memory_log_path.resolve())
+            and meta.get("rollup_version") == ROLLUP_VERSION
+            and meta.get("indexed_bytes") == str(size_before)
+            and meta.get("prefix_sha256") == digest.hexdigest()
+        )
+
+    def _sync_index(self) -> str:
+        """Bring the index up to date the regular way and remember the digest of what it covers."""
+        if self.db_path is None or not self.memory_log_path.exists():
+            return "none"
+        conn = self._db()
+        result = sync_index(self.memory_log_path, conn)
+        conn.commit()
+        self._indexed_prefix = None
+        if not self.memory_log_path.is_dir():
+            digest = hash_file_prefix(self.memory_log_path, result.indexed_bytes)
+            if read_index_meta(conn).get("prefix_sha256") == digest.hexdigest():
+                self._indexed_prefix = (result.indexed_bytes, digest)
+        return result.mode
+
+
+def read_entry_file(raw_path: str) -> List[Dict[str, Any]]:
+    """A JSON object or array, or JSONL with one entry per line; `-` reads stdin."""
+    text = sys.stdin.read() if raw_path == "-" else resolve_project_path(raw_path).read_text(encoding="utf-8")
+    stripped = text.strip()
+    if not stripped:
+        return []
+    try:
+        value = json.loads(stripped)
+        return value if isinstance(value, list) else [value]
+    except json.JSONDecodeError:
+        pass
+    entries = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON at line {line_no}: {exc}") from exc
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Append validated entries to the memory log under a file lock.")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--entry", action="append", default=[], help="Entry as a JSON object (repeatable)")
+    parser.add_argument("--entry-file", action="append", default=[], help="JSON or JSONL file of entries; - for stdin")
+    parser.add_argument("--db-path", help="SQLite memory index to push the new rows into")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        entries = [json.loads(raw) for raw in args.entry]
+        for raw_path in args.entry_file:
+            entries.extend(read_entry_file(raw_path))
+    except (OSError, ValueError) as exc:
+        print(f"[APPEND][FAIL] {exc}")
+        return 1
+    if not entries:
+        parser.error("no entries given; use --entry or --entry-file")
+
+    memory_log_path = resolve_project_path(args.memory_log)
+    db_path = resolve_project_path(args.db_path) if args.db_path else None
+    try:
+        with MemoryAppender(memory_log_path, db_path) as appender:
+            result = appender.append_many(entries)
+    except AppendRejected as exc:
+        for error in exc.errors:
+            print(f"[APPEND][FAIL] {error}")
+        return 1
+
+    print(f"[APPEND][PASS] Appended {len(result.memory_ids)} entries: {', '.join(result.memory_ids)}")
+    print(f"[APPEND][PASS] Files: {', '.join(str(path) for path in result.files)}")
+    if db_path is not None:
+        print(f"[APPEND][PASS] Index refresh: {result.index_mode}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
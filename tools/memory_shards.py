@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Time-sharded memory log layout.
+
+A sharded log is a directory of monthly JSONL files named after the UTC month of each
+entry's `timestamp_utc` (`memory_log/2026-02.jsonl`; entries without a parseable
+timestamp go to `undated.jsonl`) plus `manifest.json`, which records the byte size,
+line and entry counts and SHA-256 of every shard. Every tool that takes `--memory-log`
+also accepts the directory (see jsonl_stream.log_files); build_memory_index.py indexes
+changed shards in parallel.
+
+Usage:
+  # Split an existing single-file log into shards
+  python tools/memory_shards.py split \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --out-dir res://ai_library/docs/memory_log
+
+  # Recompute the manifest after shards were edited or appended to
+  python tools/memory_shards.py manifest --log-dir res://ai_library/docs/memory_log
+
+  # Check shards against the manifest (exit 1 on mismatch)
+  python tools/memory_shards.py verify --log-dir res://ai_library/docs/memory_log
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List
+
+from build_memory_index import HASH_CHUNK_BYTES, parse_date, resolve_project_path
+from jsonl_stream import JsonlStream, log_files
+from tracing import add_trace_arguments, run_main, traced
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+UNDATED_SHARD = "undated.jsonl"
+
+
+def shard_name_for(entry: Dict[str, Any]) -> str:
+    day = parse_date(str(entry.get("timestamp_utc", "")))
+    return f"{day[:7]}.jsonl" if day else UNDATED_SHARD
+
+
+def shard_path_for(log_dir: Path, entry: Dict[str, Any]) -> Path:
+    return log_dir / shard_name_for(entry)
+
+
+def describe_shard(path: Path) -> Dict[str, Any]:
+    digest = hashlib.sha256()
+    stream = JsonlStream(path, digest=digest, label="Memory log shard")
+    entries = sum(1 for _ in stream)
+    return {
+        "name": path.name,
+        "bytes": stream.position,
+        "lines": stream.lines_read,
+        "entries": entries,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def read_manifest(log_dir: Path) -> Dict[str, Any] | None:
+    try:
+        manifest = json.loads((log_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and manifest.get("version") == MANIFEST_VERSION else None
+
+
+@traced("write_manifest")
+def write_manifest(log_dir: Path, shards: List[Dict[str, Any]] | None = None) -> Dict[str, Any]:
+    if shards is None:
+        shards = [describe_shard(path) for path in log_files(log_dir)]
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "shards": shards,
+        "total_entries": sum(shard["entries"] for shard in shards),
+        "total_bytes": sum(shard["bytes"] for shard in shards),
+    }
+    tmp_path = log_dir / f"{MANIFEST_NAME}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, log_dir / MANIFEST_NAME)
+    return manifest
+
+
+@traced("verify_manifest")
+def verify_manifest(log_dir: Path) -> List[str]:
+    """Differences between the shards on disk and the manifest; empty when they agree."""
+    manifest = read_manifest(log_dir)
+    if manifest is None:
+        return [f"Shard manifest missing or unreadable: {log_dir / MANIFEST_NAME}"]
+    recorded = {shard["name"]: shard for shard in manifest.get("shards", [])}
+    problems: List[str] = []
+    for path in log_files(log_dir):
+        expected = recorded.pop(path.name, None)
+        if expected is None:
+            problems.append(f"{path.name}: not in manifest")
+            continue
+        actual = describe_shard(path)
+        for key in ("bytes", "entries", "sha256"):
+            if actual[key] != expected.get(key):
+                problems.append(f"{path.name}: {key} is {actual[key]}, manifest says {expected.get(key)}")
+    problems.extend(f"{name}: listed in manifest but missing" for name in sorted(recorded))
+    return problems
+
+
+@traced("split_log")
+def split_log(memory_log_path: Path, out_dir: Path) -> Dict[str, Any]:
+    """Copy each line of a single-file log into its month shard, keeping the original bytes.
+
+    The whole file is read, including a final entry without its newline; the split fails
+    (before the manifest is written) if the shards do not hold exactly the source's entries.
+    """
+    if out_dir.exists() and log_files(out_dir):
+        raise FileExistsError(f"Shard directory already contains shards: {out_dir}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    handles: Dict[str, BinaryIO] = {}
+    entries = 0
+    try:
+        with memory_log_path.open("rb") as source:
+            for record in JsonlStream(memory_log_path):
+                entries += 1
+                name = shard_name_for(record.entry)
+                if name not in handles:
+                    handles[name] = (out_dir / name).open("wb", buffering=HASH_CHUNK_BYTES)
+                source.seek(record.offset)
+                raw = source.read(record.length)
+                handles[name].write(raw if raw.endswith(b"\n") else raw + b"\n")
+    finally:
+        for handle in handles.values():
+            handle.close()
+    shards = [describe_shard(path) for path in log_files(out_dir)]
+    sharded = sum(shard["entries"] for shard in shards)
+    if sharded != entries:
+        raise ValueError(f"Shards hold {sharded} entries but {memory_log_path} has {entries}; manifest not written")
+    return write_manifest(out_dir, shards)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Manage the time-sharded memory log layout.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    split = commands.add_parser("split", help="Split a single-file memory log into monthly shards")
+    split.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl")
+    split.add_argument("--out-dir", required=True, help="Shard directory to create")
+    for name, help_text in (("manifest", "Recompute manifest.json"), ("verify", "Check shards against manifest.json")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--log-dir", required=True, help="Shard directory")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == "split":
+        out_dir = resolve_project_path(args.out_dir)
+        try:
+            manifest = split_log(resolve_project_path(args.memory_log), out_dir)
+        except (OSError, ValueError) as exc:
+            print(f"[SHARDS][FAIL] {exc}")
+            return 1
+    elif args.command == "manifest":
+        out_dir = resolve_project_path(args.log_dir)
+        manifest = write_manifest(out_dir)
+    else:
+        problems = verify_manifest(resolve_project_path(args.log_dir))
+        for problem in problems:
+            print(f"[SHARDS][FAIL] {problem}")
+        if problems:
+            return 1
+        print("[SHARDS][PASS] Shards match manifest.")
+        return 0
+
+    print(f"[SHARDS][PASS] Shards: {len(manifest['shards'])}")
+    print(f"[SHARDS][PASS] Entries: {manifest['total_entries']}")
+    print(f"[SHARDS][PASS] Manifest: {out_dir / MANIFEST_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
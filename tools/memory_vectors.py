@@ -0,0 +1,261 @@
+"""
+Offline hashed-feature vector index over the memories in ai_memory_index.db.
+
+Every memory is embedded without any model or network access: word tokens (including
+short ones such as "hp" or "ui") and character trigrams of longer words are hashed
+into a fixed number of signed buckets, weighted by 1 + log(tf) and L2-normalized.
+Trigrams let "inconsistent" match "inconsistency" or "consistently", which prefix
+FTS matching misses. Feature hashing needs no global vocabulary refit, so appended
+memories are embedded on their own and written to the end of the matrix.
+
+The matrix lives next to the database (`ai_memory_index.db` -> `ai_memory_index.vectors`)
+as a small header followed by float32 rows; row i belongs to `memory_fts` rowid i + 1.
+The header records the index generation the rows were built from, so a full rebuild
+of the SQLite index forces a rewrite, and a search against a different generation
+returns no vector hits (callers fall back to BM25) until the file is rebuilt. Writers
+hold an exclusive advisory lock on `ai_memory_index.vectors.lock` (as memory_appender
+does for the log), so concurrent refreshes never interleave rows. With numpy installed
+the matrix is memory-mapped and scored with one matrix-vector product; otherwise a
+pure-Python scan is used.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+import sqlite3
+import struct
+import zlib
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: writers are not serialized
+    fcntl = None  # type: ignore[assignment]
+
+from build_memory_index import index_generation
+from tracing import traced
+
+VECTOR_DIM = 256
+VECTOR_SUFFIX = ".vectors"
+LOCK_SUFFIX = ".lock"
+HEADER = struct.Struct("<8sIIQ8x")
+MAGIC = b"GDMVEC01"
+TRIGRAM_MIN_LEN = 4
+TRIGRAM_WEIGHT = 0.5
+EMBED_BATCH_SIZE = 5000
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "the", "to", "was", "with",
+}
+
+FTS_TEXT_SQL = """
+    SELECT rowid, task_id, feature, expected_behavior, actual_behavior,
+           fix_summary, notes, assumptions, prevention_updates
+    FROM memory_fts
+    WHERE rowid > ?
+    ORDER BY rowid
+"""
+
+
+def tokenize_text(text: str, min_len: int = 2) -> List[str]:
+    return [
+        tok
+        for tok in re.split(r"[^a-zA-Z0-9_]+", text.lower())
+        if len(tok) >= min_len and tok not in STOPWORDS
+    ]
+
+
+def _features(text: str) -> Dict[str, float]:
+    counts: Dict[str, float] = {}
+    for token in tokenize_text(text):
+        parts = [part for part in token.split("_") if len(part) >= 2 and part not in STOPWORDS]
+        words = [token] + parts if len(parts) > 1 else [token]
+        for word in words:
+            counts["w:" + word] = counts.get("w:" + word, 0.0) + 1.0
+        for part in parts:
+            if len(part) >= TRIGRAM_MIN_LEN:
+                padded = f"<{part}>"
+                for i in range(len(padded) - 2):
+                    key = "c:" + padded[i:i + 3]
+                    counts[key] = counts.get(key, 0.0) + TRIGRAM_WEIGHT
+    return counts
+
+
+def embed_sparse(text: str, dim: int = VECTOR_DIM) -> Dict[int, float]:
+    """Normalized hashed-feature embedding as {bucket: weight}; empty for contentless text."""
+    buckets: Dict[int, float] = {}
+    for feature, tf in _features(text).items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if (h >> 31) & 1 else -1.0
+        weight = 1.0 + math.log(tf) if tf >= 1.0 else tf
+        bucket = h % dim
+        buckets[bucket] = buckets.get(bucket, 0.0) + sign * weight
+    norm = math.sqrt(sum(value * value for value in buckets.values()))
+    if norm == 0.0:
+        return {}
+    return {bucket: value / norm for bucket, value in buckets.items() if value}
+
+
+def embed_dense(text: str, dim: int = VECTOR_DIM) -> array:
+    row = array("f", bytes(4 * dim))
+    for bucket, value in embed_sparse(text, dim).items():
+        row[bucket] = value
+    return row
+
+
+def vector_path_for(connection: sqlite3.Connection) -> Optional[Path]:
+    """Sidecar path for the connection's main database, or None for in-memory databases."""
+    for _, name, filename in connection.execute("PRAGMA database_list"):
+        if name == "main":
+            return Path(filename).with_suffix(VECTOR_SUFFIX) if filename else None
+    return None
+
+
+@contextmanager
+def vector_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock shared by every writer of the vector file, across processes."""
+    with path.with_name(path.name + LOCK_SUFFIX).open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def read_header(path: Path) -> Optional[Tuple[int, int, int]]:
+    """(dim, generation, rows) of an existing vector file, or None if absent/foreign."""
+    try:
+        with path.open("rb") as handle:
+            raw = handle.read(HEADER.size)
+            size = os.fstat(handle.fileno()).st_size
+    except OSError:
+        return None
+    if len(raw) != HEADER.size:
+        return None
+    magic, dim, _, generation = HEADER.unpack(raw)
+    if magic != MAGIC or dim <= 0:
+        return None
+    return dim, generation, (size - HEADER.size) // (4 * dim)
+
+
+def _iter_memory_rows(connection: sqlite3.Connection, after_rowid: int) -> Iterable[Tuple[int, str]]:
+    for row in connection.execute(FTS_TEXT_SQL, (after_rowid,)):
+        yield row[0], " ".join(str(value) for value in row[1:] if value)
+
+
+def _write_rows(handle, rows: Iterable[Tuple[int, str]], next_rowid: int, dim: int) -> int:
+    buffer = array("f")
+    written = 0
+    for rowid, text in rows:
+        if rowid != next_rowid + written:
+            raise ValueError(f"memory_fts rowids are not contiguous at {rowid}")
+        buffer.extend(embed_dense(text, dim))
+        written += 1
+        if written % EMBED_BATCH_SIZE == 0:
+            buffer.tofile(handle)
+            buffer = array("f")
+    buffer.tofile(handle)
+    return written
+
+
+@traced("sync_vectors")
+def sync_vectors(connection: sqlite3.Connection, path: Optional[Path] = None, dim: int = VECTOR_DIM) -> str:
+    """Bring the vector file in line with memory_fts; returns "unchanged", "appended" or "rebuilt"."""
+    path = path or vector_path_for(connection)
+    if path is None:
+        return "unchanged"
+    generation = index_generation(connection)
+    total = connection.execute("SELECT COUNT(*) FROM memory_fts").fetchone()[0]
+    header = read_header(path)
+    if header is not None and header[0] == dim and header[1] == generation and header[2] == total:
+        return "unchanged"
+
+    with vector_lock(path):
+        # Another writer may have caught up while this one waited for the lock.
+        header = read_header(path)
+        if header is not None and header[0] == dim and header[1] == generation and header[2] <= total:
+            rows = header[2]
+            if rows == total:
+                return "unchanged"
+            with path.open("r+b") as handle:
+                handle.truncate(HEADER.size + rows * 4 * dim)
+                handle.seek(0, os.SEEK_END)
+                _write_rows(handle, _iter_memory_rows(connection, rows), rows + 1, dim)
+            return "appended"
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(HEADER.pack(MAGIC, dim, 0, generation))
+            _write_rows(handle, _iter_memory_rows(connection, 0), 1, dim)
+        os.replace(tmp_path, path)
+    return "rebuilt"
+
+
+def _top_k_numpy(path: Path, dim: int, rows: int, query: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+    matrix = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER.size, shape=(rows, dim))
+    dense = np.zeros(dim, dtype=np.float32)
+    for bucket, value in query.items():
+        dense[bucket] = value
+    scores = matrix @ dense
+    k = min(k, rows)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(i) + 1, float(scores[i])) for i in top]
+
+
+def _iter_scores_python(path: Path, dim: int, rows: int, query: Dict[int, float]) -> Iterator[Tuple[float, int]]:
+    items = sorted(query.items())
+    with path.open("rb") as handle:
+        handle.seek(HEADER.size)
+        rowid = 1
+        while rowid <= rows:
+            chunk = array("f")
+            chunk.fromfile(handle, min(EMBED_BATCH_SIZE, rows - rowid + 1) * dim)
+            for base in range(0, len(chunk), dim):
+                yield sum(chunk[base + bucket] * value for bucket, value in items), rowid
+                rowid += 1
+
+
+def _top_k_python(path: Path, dim: int, rows: int, query: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+    return [(rowid, score) for score, rowid in heapq.nlargest(k, _iter_scores_python(path, dim, rows, query))]
+
+
+@traced("search_vectors")
+def search_vectors(
+    connection: sqlite3.Connection,
+    text: str,
+    top_k: int,
+    min_score: float = 0.0,
+    path: Optional[Path] = None,
+) -> List[Tuple[int, float]]:
+    """Top-k (memory_fts rowid, cosine) pairs for `text`, best first.
+
+    Empty when the vector file was built from another index generation: its rows would
+    name the wrong rowids.
+    """
+    path = path or vector_path_for(connection)
+    header = read_header(path) if path is not None else None
+    if header is None or header[2] == 0 or top_k <= 0:
+        return []
+    dim, generation, rows = header
+    if generation != index_generation(connection):
+        return []
+    query = embed_sparse(text, dim)
+    if not query:
+        return []
+    scan = _top_k_numpy if np is not None else _top_k_python
+    return [(rowid, score) for rowid, score in scan(path, dim, rows, query, top_k) if score > min_score]
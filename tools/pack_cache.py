@@ -0,0 +1,149 @@
+"""
+Persistent LRU cache of rendered evidence packs, stored in the memory index database.
+
+A pack is keyed by the query's normalized tokens (sorted, so word order does not matter),
+a hash of the loaded task packet, top-k and the index generation tag. The tag combines
+the rebuild counter bumped by every full rebuild with the indexed entry count and the
+contract-doc and task-packet hashes, so appended memories or edited docs never serve a
+stale pack. `peek()` reads without writing (read-only connections); `record_use()` then
+does the bookkeeping on a writable one.
+Entries carry a last-used timestamp; the least recently used ones are evicted once the
+table exceeds its bound. Hit and miss totals are kept in `pack_cache_stats`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from build_memory_index import index_generation, read_index_meta
+
+PACK_CACHE_MAX_ENTRIES = 256
+
+
+@dataclass
+class CachedPack:
+    query: str
+    report: str
+    memory_hits: int
+    tag_hits: int
+    contract_hits: int
+
+
+def ensure_pack_cache_schema(connection: sqlite3.Connection) -> None:
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS pack_cache (
+            cache_key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            report TEXT NOT NULL,
+            memory_hits INTEGER NOT NULL,
+            tag_hits INTEGER NOT NULL,
+            contract_hits INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            use_count INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_pack_cache_last_used ON pack_cache(last_used);
+
+        CREATE TABLE IF NOT EXISTS pack_cache_stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def generation_tag(connection: sqlite3.Connection) -> str:
+    meta = read_index_meta(connection)
+    sources = hashlib.sha256()
+    for path, sha256 in connection.execute("SELECT path, sha256 FROM doc_sources ORDER BY path"):
+        sources.update(f"{path}\0{sha256}\n".encode("utf-8"))
+    # Lineage sections depend on the task graph, so packet edits invalidate packs too.
+    for path, sha256 in connection.execute("SELECT path, sha256 FROM task_sources ORDER BY path"):
+        sources.update(f"task\0{path}\0{sha256}\n".encode("utf-8"))
+    return f"{index_generation(connection)}:{meta.get('indexed_entries', '0')}:{sources.hexdigest()[:16]}"
+
+
+def cache_key(tokens: List[str], task_packet: Dict[str, Any], top_k: int, generation: str) -> str:
+    packet_hash = hashlib.sha256(json.dumps(task_packet, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    parts = [" ".join(sorted(tokens)), packet_hash, str(top_k), generation]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _count(connection: sqlite3.Connection, name: str) -> None:
+    connection.execute(
+        """
+        INSERT INTO pack_cache_stats (name, value) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1
+        """,
+        (name,),
+    )
+
+
+def peek(connection: sqlite3.Connection, key: str) -> Optional[CachedPack]:
+    row = connection.execute(
+        "SELECT query, report, memory_hits, tag_hits, contract_hits FROM pack_cache WHERE cache_key = ?",
+        (key,),
+    ).fetchone()
+    return CachedPack(*row) if row is not None else None
+
+
+def record_use(connection: sqlite3.Connection, key: str, hit: bool, commit: bool = True) -> None:
+    """Count a hit (and mark the entry used) or a miss for `key`."""
+    if hit:
+        connection.execute(
+            "UPDATE pack_cache SET last_used = ?, use_count = use_count + 1 WHERE cache_key = ?",
+            (time.time(), key),
+        )
+    _count(connection, "hits" if hit else "misses")
+    if commit:
+        connection.commit()
+
+
+def lookup(connection: sqlite3.Connection, key: str, commit: bool = True) -> Optional[CachedPack]:
+    """Return the cached pack for `key` and mark it used, counting the hit or miss.
+
+    Batch callers pass commit=False and commit once after the last pack.
+    """
+    pack = peek(connection, key)
+    record_use(connection, key, pack is not None, commit=commit)
+    return pack
+
+
+def store(
+    connection: sqlite3.Connection,
+    key: str,
+    pack: CachedPack,
+    max_entries: int = PACK_CACHE_MAX_ENTRIES,
+    commit: bool = True,
+) -> None:
+    now = time.time()
+    connection.execute(
+        """
+        INSERT OR REPLACE INTO pack_cache (
+            cache_key, query, report, memory_hits, tag_hits, contract_hits, created_at, last_used
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (key, pack.query, pack.report, pack.memory_hits, pack.tag_hits, pack.contract_hits, now, now),
+    )
+    connection.execute(
+        """
+        DELETE FROM pack_cache
+        WHERE cache_key NOT IN (SELECT cache_key FROM pack_cache ORDER BY last_used DESC LIMIT ?)
+        """,
+        (max(0, max_entries),),
+    )
+    if commit:
+        connection.commit()
+
+
+def cache_stats(connection: sqlite3.Connection) -> Dict[str, int]:
+    stats = {name: int(value) for name, value in connection.execute("SELECT name, value FROM pack_cache_stats")}
+    entries = connection.execute("SELECT COUNT(*) FROM pack_cache").fetchone()[0]
+    return {"hits": stats.get("hits", 0), "misses": stats.get("misses", 0), "entries": int(entries)}
@@ -0,0 +1,148 @@
+"""
+Dependency-aware step scheduler for ai_pipeline_daemon.
+
+A pipeline is a list of `Step`s; `after` names the steps that must pass first,
+`inputs` lists the project files the step reads and `outputs` the files it writes. `run_dag()` runs every step whose
+dependencies have passed on a bounded thread pool, skips the transitive dependents
+of a failed step, and returns per-step records (with wall time) in declaration order.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class StepOutcome:
+    ok: bool
+    code: int
+    output: str
+    cached: bool = False
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Step:
+    name: str
+    command: str
+    inputs: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    # In-process implementation; when set, runners call it instead of spawning `command`.
+    action: Optional[Callable[[], StepOutcome]] = None
+
+
+StepRunner = Callable[[Step], StepOutcome]
+
+
+def validate_dag(steps: List[Step]) -> None:
+    names = [step.name for step in steps]
+    if len(names) != len(set(names)):
+        raise ValueError("Pipeline step names must be unique")
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        for dep in step.after:
+            if dep not in by_name:
+                raise ValueError(f"Step '{step.name}' depends on unknown step '{dep}'")
+
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].after:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in names:
+        visit(name)
+
+
+def dependents_of(steps: List[Step], failed: str) -> Set[str]:
+    """All steps that transitively depend on `failed`."""
+    result: Set[str] = set()
+    frontier = [failed]
+    while frontier:
+        current = frontier.pop()
+        for step in steps:
+            if current in step.after and step.name not in result:
+                result.add(step.name)
+                frontier.append(step.name)
+    return result
+
+
+def run_dag(steps: List[Step], runner: StepRunner, max_workers: int = 4) -> Dict[str, Any]:
+    validate_dag(steps)
+    records: Dict[str, Dict[str, Any]] = {}
+    passed: Set[str] = set()
+    skipped: Dict[str, str] = {}
+    started: Set[str] = set()
+    running: Dict[Future, Step] = {}
+    started_at = time.perf_counter()
+
+    def timed(step: Step) -> Tuple[StepOutcome, float]:
+        began = time.perf_counter()
+        outcome = runner(step)
+        return outcome, time.perf_counter() - began
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while True:
+            for step in steps:
+                if step.name in started or step.name in skipped:
+                    continue
+                if all(dep in passed for dep in step.after):
+                    started.add(step.name)
+                    running[pool.submit(timed, step)] = step
+
+            if not running:
+                break
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    outcome, wall = future.result()
+                except Exception as exc:  # runner crashed; treat as a failed step
+                    outcome, wall = StepOutcome(False, -1, f"{type(exc).__name__}: {exc}"), 0.0
+                records[step.name] = {
+                    "name": step.name,
+                    "ok": outcome.ok,
+                    "code": outcome.code,
+                    "output": outcome.output,
+                    "status": "passed" if outcome.ok else "failed",
+                    "cached": outcome.cached,
+                    "wall_seconds": round(wall, 3),
+                }
+                if outcome.details:
+                    records[step.name]["details"] = outcome.details
+                if outcome.ok:
+                    passed.add(step.name)
+                else:
+                    for name in dependents_of(steps, step.name):
+                        skipped.setdefault(name, step.name)
+
+    for name, cause in skipped.items():
+        records[name] = {
+            "name": name,
+            "ok": False,
+            "code": None,
+            "output": f"Skipped: dependency '{cause}' failed.",
+            "status": "skipped",
+            "cached": False,
+            "wall_seconds": 0.0,
+        }
+
+    ordered = [records[step.name] for step in steps if step.name in records]
+    return {
+        "ok": all(record["ok"] for record in ordered),
+        "wall_seconds": round(time.perf_counter() - started_at, 3),
+        "steps": ordered,
+    }
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Thin client for tools/rag_server.py with the same flags as rag_context_pack.py.
+
+Only the standard library is imported on the fast path. If the server is not
+reachable the pack is generated in-process instead (disable with --no-fallback).
+Batches (--queries-file) are not proxied; run rag_context_pack.py directly for those.
+Relative paths are resolved against the client's working directory before they are
+sent, since the server's working directory may differ.
+
+Usage:
+  python tools/rag_client.py \
+    --query "jump apex inconsistent" \
+    --task-packet res://ai_library/tasks/current_task.yaml \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --db-path res://ai_library/docs/ai_memory_index.db \
+    --out res://ai_library/docs/evidence_packs/current_task.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_SERVER = "http://127.0.0.1:8765"
+
+
+def resolve_project_path(raw_path: str) -> Path:
+    value = raw_path.strip()
+    if value.startswith("res://"):
+        project_root = Path(__file__).resolve().parents[1]
+        return project_root / value[len("res://"):]
+    return Path(value)
+
+
+def absolute_path(raw_path: str | None) -> str | None:
+    """`raw_path` as an absolute path for the server, which has its own working directory."""
+    return str(resolve_project_path(raw_path).resolve()) if raw_path else raw_path
+
+
+def request_pack(server: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        server.rstrip("/") + "/pack",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return json.loads(exc.read() or b'{"ok": false, "error": "empty error response"}')
+
+
+def fallback_argv(args: argparse.Namespace) -> List[str]:
+    argv = ["--query", args.query, "--memory-log", args.memory_log, "--db-path", args.db_path, "--top-k", str(args.top_k)]
+    if args.task_packet:
+        argv += ["--task-packet", args.task_packet]
+    if args.out:
+        argv += ["--out", args.out]
+    if args.no_cache:
+        argv.append("--no-cache")
+    if args.verbose:
+        argv.append("--verbose")
+    return argv
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Request a hybrid-RAG evidence pack from rag_server.py.")
+    parser.add_argument("--query", required=True, help="Issue/problem query text")
+    parser.add_argument("--task-packet", help="Path to task packet YAML")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--db-path", required=True, help="Path to SQLite memory index")
+    parser.add_argument("--out", help="Output markdown file path")
+    parser.add_argument("--top-k", type=int, default=8, help="Top-K memory snippets")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Base URL of rag_server.py")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds")
+    parser.add_argument("--no-fallback", action="store_true", help="Fail instead of running in-process")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the pack instead of using the pack cache")
+    parser.add_argument("--verbose", action="store_true", help="Print the pack-cache status to stderr")
+    args = parser.parse_args()
+
+    payload = {
+        "query": args.query,
+        "task_packet": absolute_path(args.task_packet),
+        "memory_log": absolute_path(args.memory_log),
+        "db_path": absolute_path(args.db_path),
+        "top_k": args.top_k,
+        "no_cache": args.no_cache,
+    }
+
+    try:
+        response = request_pack(args.server, payload, args.timeout)
+    except (urllib.error.URLError, ConnectionError, TimeoutError) as exc:
+        if args.no_fallback:
+            print(f"[RAG][FAIL] Server unreachable at {args.server}: {exc}")
+            return 1
+        print(f"[RAG][WARN] Server unreachable at {args.server}; generating in-process.", file=sys.stderr)
+        from rag_context_pack import main as run_in_process
+
+        return run_in_process(fallback_argv(args))
+
+    if not response.get("ok"):
+        print(f"[RAG][FAIL] {response.get('error', 'unknown server error')}")
+        return 1
+
+    if args.verbose:
+        print(f"[RAG][INFO] Pack cache {response.get('cache', 'off')} (server)", file=sys.stderr)
+    report = str(response["report"])
+    if args.out:
+        out_path = resolve_project_path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(report, encoding="utf-8")
+        print(f"[RAG][PASS] Evidence pack written: {out_path} ({response.get('elapsed_ms', 0):.1f} ms)")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
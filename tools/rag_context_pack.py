@@ -2,6 +2,22 @@
 """
 Hybrid retrieval for AI tasks: combines indexed memory retrieval + contract evidence snippets.
 
+Memory matches fuse two rankings with reciprocal rank fusion: BM25 over the FTS5 index
+and cosine similarity over the offline hashed-feature vectors in tools/memory_vectors.py,
+so differently phrased reflections are still found when few query words match exactly.
+Lineage matches come from the task graph (tools/task_graph.py) built from every packet
+under ai_library/tasks: memories of the task's transitive ancestors and of tasks that
+depend on the same contract IDs, ranked by BM25 against the query, then by closeness.
+Rendered packs are cached in the index database (tools/pack_cache.py); pass --verbose to
+see whether a call was served from the cache, or --no-cache to bypass it.
+
+For many packs in a row, run tools/rag_server.py once and use tools/rag_client.py with
+the same flags to skip interpreter, YAML and index startup on every call. When the
+queries are known up front (a milestone's worth of packs), pass --queries-file instead:
+the index is refreshed and opened once, every lookup runs over that one connection with
+its statements kept prepared, rendering can fan out over --jobs threads, and a timing
+summary is printed (and written as JSON with --summary).
+
 Usage:
   python tools/rag_context_pack.py \
     --query "jump apex inconsistent" \
@@ -9,19 +25,37 @@ Usage:
     --memory-log res://ai_library/docs/memory_log.jsonl \
     --db-path res://ai_library/docs/ai_memory_index.db \
     --out res://ai_library/docs/evidence_packs/current_task.md
+
+  # One pack per line of a JSONL file: {"query", "out", optional "task_packet", "top_k"}
+  python tools/rag_context_pack.py \
+    --queries-file res://ai_library/docs/evidence_packs/milestone_queries.jsonl \
+    --task-packet res://ai_library/tasks/current_task.yaml \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --db-path res://ai_library/docs/ai_memory_index.db \
+    --jobs 4 --summary res://ai_library/docs/evidence_packs/batch_summary.json
 """
 
 from __future__ import annotations
 
 import argparse
-import re
+import json
 import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import yaml  # type: ignore
 
-from build_memory_index import ensure_schema, load_jsonl, rebuild_index, resolve_project_path
+from build_memory_index import enable_mmap, ensure_schema, resolve_project_path, sync_index
+from contract_doc_index import ensure_doc_schema, fts_match_query, query_doc_index, refresh_doc_index
+from jsonl_stream import JsonlStream, log_signature
+from memory_vectors import search_vectors, sync_vectors, tokenize_text
+from pack_cache import CachedPack, cache_key, cache_stats, ensure_pack_cache_schema, generation_tag, lookup, peek, store
+from task_graph import ensure_task_schema, extract_task_links, refresh_task_graph, task_lineage, task_packet_paths
+from tracing import add_trace_arguments, run_main, span, traced
 
 DOC_CANDIDATES = [
     "res://ai_library/docs/style_guide.md",
@@ -32,6 +66,8 @@ DOC_CANDIDATES = [
     "res://ai_library/docs/patterns.catalog.yaml",
 ]
 
+TASK_PACKET_DIRS = ["res://ai_library/tasks"]
+
 FAILURE_TAGS = {
     "input_contract_violation",
     "physics_loop_misuse",
@@ -52,38 +88,107 @@ FAILURE_TAGS = {
     "content_pipeline_mismatch",
 }
 
+RRF_K = 60
+CANDIDATE_FACTOR = 4
+VECTOR_MIN_SCORE = 0.1
+# The IN (...) lookups vary in placeholder count, so a batch sees many distinct statements;
+# keep them all prepared on the shared connection instead of sqlite3's default 128.
+BATCH_STATEMENT_CACHE = 512
+# Bound on "?" placeholders per IN (...) list, well under SQLite's variable limit.
+SQL_IN_CHUNK = 900
+ANCESTOR_HEADER_LIMIT = 20
+
 
 def tokenize(query: str) -> List[str]:
-    return [tok for tok in re.split(r"[^a-zA-Z0-9_]+", query.lower()) if len(tok) >= 4]
+    return tokenize_text(query)
+
+
+@traced("refresh_index")
+def refresh_index(conn: sqlite3.Connection, memory_log_path: Path) -> None:
+    """Bring memories and contract-doc lines up to date; cheap when nothing changed."""
+    sync_index(memory_log_path, conn)
+    conn.commit()
+    sync_vectors(conn)
+    refresh_doc_index(conn, [resolve_project_path(doc) for doc in DOC_CANDIDATES])
+    refresh_task_graph(conn, task_packet_paths(resolve_project_path(path) for path in TASK_PACKET_DIRS))
+    conn.commit()
+
+
+def source_signature(memory_log_path: Path) -> str:
+    """Cheap change marker (names, sizes, mtimes) over everything `refresh_index` reads."""
+    parts = [log_signature(memory_log_path)]
+    docs = [resolve_project_path(doc) for doc in DOC_CANDIDATES]
+    packets = task_packet_paths(resolve_project_path(path) for path in TASK_PACKET_DIRS)
+    for path in docs + packets:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts)
 
 
 def ensure_index(db_path: Path, memory_log_path: Path) -> None:
     with sqlite3.connect(db_path) as conn:
         ensure_schema(conn)
-        count = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
-        if count == 0:
-            rebuild_index(load_jsonl(memory_log_path), conn)
-            conn.commit()
+        ensure_doc_schema(conn)
+        ensure_task_schema(conn)
+        ensure_pack_cache_schema(conn)
+        refresh_index(conn, memory_log_path)
 
 
+def bm25_candidates(conn: sqlite3.Connection, tokens: List[str], limit: int) -> List[str]:
+    sql = """
+        SELECT memory_id
+        FROM memory_fts
+        WHERE memory_fts MATCH ?
+        ORDER BY bm25(memory_fts) ASC
+        LIMIT ?
+    """
+    return [row[0] for row in conn.execute(sql, (fts_match_query(tokens), limit))]
+
+
+def vector_candidates(conn: sqlite3.Connection, query: str, limit: int) -> List[str]:
+    hits = search_vectors(conn, query, limit, min_score=VECTOR_MIN_SCORE)
+    if not hits:
+        return []
+    placeholders = ",".join("?" for _ in hits)
+    sql = f"SELECT rowid, memory_id FROM memory_fts WHERE rowid IN ({placeholders})"
+    ids = dict(conn.execute(sql, [rowid for rowid, _ in hits]))
+    return [ids[rowid] for rowid, _ in hits if rowid in ids]
+
+
+def fuse_rankings(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion: sum 1 / (k + rank) over every ranking an id appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking, start=1):
+            scores[memory_id] = scores.get(memory_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+@traced("query_memory")
 def query_memory(conn: sqlite3.Connection, query: str, top_k: int) -> List[Tuple[Any, ...]]:
     clean_tokens = tokenize(query)
     if not clean_tokens:
         return []
 
-    fts_query = " OR ".join(f"{tok}*" for tok in clean_tokens)
-    sql = """
-        SELECT m.memory_id, m.task_id, m.feature, m.outcome, m.confidence, m.fix_summary,
-               bm25(memory_fts) AS score
-        FROM memory_fts
-        JOIN memories m ON m.memory_id = memory_fts.memory_id
-        WHERE memory_fts MATCH ?
-        ORDER BY score ASC
-        LIMIT ?
+    limit = top_k * CANDIDATE_FACTOR
+    fused = fuse_rankings([bm25_candidates(conn, clean_tokens, limit), vector_candidates(conn, query, limit)])[:top_k]
+    if not fused:
+        return []
+
+    placeholders = ",".join("?" for _ in fused)
+    sql = f"""
+        SELECT memory_id, task_id, feature, outcome, confidence, fix_summary
+        FROM memories
+        WHERE memory_id IN ({placeholders})
     """
-    return conn.execute(sql, (fts_query, top_k)).fetchall()
+    rows = {row[0]: row for row in conn.execute(sql, [memory_id for memory_id, _ in fused])}
+    return [(*rows[memory_id], score) for memory_id, score in fused if memory_id in rows]
 
 
+@traced("query_tags")
 def query_tags(conn: sqlite3.Connection, query: str, top_k: int) -> List[Tuple[Any, ...]]:
     requested = [tag for tag in FAILURE_TAGS if tag in query]
     if not requested:
@@ -101,6 +206,61 @@ def query_tags(conn: sqlite3.Connection, query: str, top_k: int) -> List[Tuple[A
     return conn.execute(sql, (*requested, top_k)).fetchall()
 
 
+def _chunks(values: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(values), SQL_IN_CHUNK):
+        yield values[start : start + SQL_IN_CHUNK]
+
+
+@traced("query_lineage")
+def query_lineage(
+    conn: sqlite3.Connection,
+    query: str,
+    task_id: str,
+    lineage: Dict[str, Tuple[str, int]],
+    dep_contracts: List[str],
+    top_k: int,
+) -> List[Tuple[Any, ...]]:
+    """Memories of lineage tasks and memories touching `dep_contracts`, best first.
+
+    Candidates come from indexed joins only (memories.task_id, memory_contract_ids) and
+    keep their BM25 score when they match the query. Query matches rank first, then
+    ancestors before contract peers, nearer ancestors first, then higher confidence.
+    """
+    candidates: Dict[int, Tuple[Any, ...]] = {}
+    columns = "m.rowid, m.memory_id, m.task_id, m.feature, m.outcome, m.confidence, m.fix_summary"
+    for chunk in _chunks(list(lineage)):
+        sql = f"SELECT {columns} FROM memories m WHERE m.task_id IN ({','.join('?' for _ in chunk)})"
+        for rowid, *row in conn.execute(sql, chunk):
+            candidates[rowid] = (*row, *lineage[row[1]])
+    for chunk in _chunks(dep_contracts):
+        sql = f"""
+            SELECT {columns}, c.contract_id
+            FROM memory_contract_ids c
+            JOIN memories m ON m.memory_id = c.memory_id
+            WHERE c.contract_id IN ({','.join('?' for _ in chunk)}) AND m.task_id <> ?
+        """
+        for rowid, *row, contract_id in conn.execute(sql, (*chunk, task_id)):
+            candidates.setdefault(rowid, (*row, f"contract={contract_id}", 0))
+    if not candidates:
+        return []
+
+    scores: Dict[int, float] = {}
+    tokens = tokenize(query)
+    if tokens:
+        # One pass over the match set; FTS5 re-runs the full-text query per probe for
+        # "rowid IN (...)", which is far slower once there are more than a few candidates.
+        sql = "SELECT rowid, bm25(memory_fts) FROM memory_fts WHERE memory_fts MATCH ?"
+        for rowid, score in conn.execute(sql, (fts_match_query(tokens),)):
+            if rowid in candidates:
+                scores[rowid] = score
+
+    def rank(rowid: int) -> Tuple[Any, ...]:
+        relation, depth, confidence = candidates[rowid][6], candidates[rowid][7], candidates[rowid][4]
+        return (rowid not in scores, scores.get(rowid, 0.0), relation != "ancestor", depth, -(confidence or 0.0))
+
+    return [candidates[rowid] for rowid in sorted(candidates, key=rank)[:top_k]]
+
+
 def load_task_packet(path: Path | None) -> Dict[str, Any]:
     if path is None or not path.exists():
         return {}
@@ -109,41 +269,12 @@ def load_task_packet(path: Path | None) -> Dict[str, Any]:
     return data if isinstance(data, dict) else {}
 
 
-def extract_task_links(task_packet: Dict[str, Any]) -> Tuple[str, List[str], List[str]]:
-    task = task_packet.get("task", {}) if isinstance(task_packet.get("task"), dict) else {}
-    task_id = str(task.get("task_id", ""))
-    dep_tasks = task.get("depends_on_task_ids", [])
-    dep_contracts = task.get("depends_on_contract_ids", [])
-    dep_tasks = [str(item) for item in dep_tasks] if isinstance(dep_tasks, list) else []
-    dep_contracts = [str(item) for item in dep_contracts] if isinstance(dep_contracts, list) else []
-    return task_id, dep_tasks, dep_contracts
-
-
-def pull_contract_evidence(query: str, top_k: int = 8) -> List[Tuple[str, str]]:
-    terms = tokenize(query)
-    if not terms:
-        return []
-
-    scored: List[Tuple[int, str, str]] = []
-    for doc in DOC_CANDIDATES:
-        path = resolve_project_path(doc)
-        if not path.exists():
-            continue
-        content = path.read_text(encoding="utf-8", errors="ignore")
-        lines = content.splitlines()
-        for idx, line in enumerate(lines, start=1):
-            text = line.lower()
-            score = sum(1 for term in terms if term in text)
-            if score > 0:
-                snippet = line.strip()
-                if not snippet:
-                    continue
-                scored.append((score, str(path), f"L{idx}: {snippet}"))
-
-    scored.sort(key=lambda item: item[0], reverse=True)
-    return [(path, snippet) for _, path, snippet in scored[:top_k]]
+@traced("pull_contract_evidence")
+def pull_contract_evidence(conn: sqlite3.Connection, query: str, top_k: int = 8) -> List[Tuple[str, str]]:
+    return query_doc_index(conn, tokenize(query), top_k)
 
 
+@traced("render")
 def build_output(
     query: str,
     task_id: str,
@@ -152,6 +283,8 @@ def build_output(
     contract_hits: List[Tuple[str, str]],
     dep_tasks: List[str],
     dep_contracts: List[str],
+    lineage_hits: List[Tuple[Any, ...]] | None = None,
+    ancestor_tasks: List[str] | None = None,
 ) -> str:
     lines: List[str] = []
     lines.append("# Evidence Context Pack")
@@ -160,6 +293,10 @@ def build_output(
     lines.append(f"- Task ID: {task_id or 'N/A'}")
     lines.append(f"- Dependent Task IDs: {', '.join(dep_tasks) if dep_tasks else 'None'}")
     lines.append(f"- Dependent Contract IDs: {', '.join(dep_contracts) if dep_contracts else 'None'}")
+    ancestors = ", ".join((ancestor_tasks or [])[:ANCESTOR_HEADER_LIMIT]) or "None"
+    if ancestor_tasks and len(ancestor_tasks) > ANCESTOR_HEADER_LIMIT:
+        ancestors += f" (+{len(ancestor_tasks) - ANCESTOR_HEADER_LIMIT} more)"
+    lines.append(f"- Ancestor Task IDs (transitive): {ancestors}")
     lines.append("")
 
     lines.append("## Memory Matches")
@@ -172,6 +309,17 @@ def build_output(
             )
     lines.append("")
 
+    lines.append("## Lineage Matches")
+    if not lineage_hits:
+        lines.append("- No memories from ancestor or contract-sharing tasks.")
+    else:
+        for memory_id, hit_task_id, feature, outcome, confidence, fix_summary, relation, depth in lineage_hits:
+            via = f"ancestor depth={depth}" if relation == "ancestor" else relation
+            lines.append(
+                f"- [{memory_id}] task={hit_task_id} via={via} outcome={outcome} confidence={confidence:.2f} | {feature} | fix={fix_summary}"
+            )
+    lines.append("")
+
     lines.append("## Failure Tag Matches")
     if not tag_hits:
         lines.append("- No explicit failure-tag matches in query.")
@@ -196,51 +344,366 @@ def build_output(
     return "\n".join(lines) + "\n"
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Generate hybrid-RAG evidence pack for AI task execution.")
-    parser.add_argument("--query", required=True, help="Issue/problem query text")
-    parser.add_argument("--task-packet", help="Path to task packet YAML")
-    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl")
-    parser.add_argument("--db-path", required=True, help="Path to SQLite memory index")
-    parser.add_argument("--out", help="Output markdown file path")
-    parser.add_argument("--top-k", type=int, default=8, help="Top-K memory snippets")
-    args = parser.parse_args()
+@dataclass
+class PackResult:
+    report: str
+    task_id: str
+    memory_hits: int
+    tag_hits: int
+    contract_hits: int
+    cache_status: str = "off"
+
+
+@dataclass
+class PackEvidence:
+    """Everything a pack is rendered from; rendering needs no database access."""
+
+    query: str
+    task_id: str
+    memory_hits: List[Tuple[Any, ...]]
+    tag_hits: List[Tuple[Any, ...]]
+    contract_hits: List[Tuple[str, str]]
+    dep_tasks: List[str]
+    dep_contracts: List[str]
+    lineage_hits: List[Tuple[Any, ...]]
+    ancestor_tasks: List[str]
+
+    def render(self) -> str:
+        return build_output(
+            query=self.query,
+            task_id=self.task_id,
+            memory_hits=self.memory_hits,
+            tag_hits=self.tag_hits,
+            contract_hits=self.contract_hits,
+            dep_tasks=self.dep_tasks,
+            dep_contracts=self.dep_contracts,
+            lineage_hits=self.lineage_hits,
+            ancestor_tasks=self.ancestor_tasks,
+        )
+
+
+def lookup_cached_pack(
+    conn: sqlite3.Connection,
+    query: str,
+    task_packet: Dict[str, Any],
+    top_k: int,
+    generation: str,
+    commit: bool = True,
+    record: bool = True,
+) -> Tuple[str, PackResult | None]:
+    """Cache key for the pack plus the cached result, if there is one.
+
+    With record=False nothing is written (for read-only connections); the caller counts
+    the hit or miss with pack_cache.record_use() on a writable connection.
+    """
+    key = cache_key(tokenize(query), task_packet, top_k, generation)
+    cached = lookup(conn, key, commit=commit) if record else peek(conn, key)
+    if cached is None:
+        return key, None
+    # Queries sharing a token multiset share a pack; only the echoed query line differs.
+    report = cached.report.replace(f"- Query: {cached.query}\n", f"- Query: {query}\n", 1)
+    task_id = extract_task_links(task_packet)[0]
+    return key, PackResult(report, task_id, cached.memory_hits, cached.tag_hits, cached.contract_hits, "hit")
 
-    memory_log_path = resolve_project_path(args.memory_log)
-    db_path = resolve_project_path(args.db_path)
+
+def gather_evidence(conn: sqlite3.Connection, query: str, task_packet: Dict[str, Any], top_k: int) -> PackEvidence:
+    task_id, dep_tasks, dep_contracts = extract_task_links(task_packet)
+    lineage = task_lineage(conn, task_id, dep_tasks, dep_contracts)
+    return PackEvidence(
+        query,
+        task_id,
+        query_memory(conn, query, top_k),
+        query_tags(conn, query.lower(), top_k),
+        pull_contract_evidence(conn, query, top_k=top_k),
+        dep_tasks,
+        dep_contracts,
+        query_lineage(conn, query, task_id, lineage, dep_contracts, top_k),
+        [task for task, (relation, _) in lineage.items() if relation == "ancestor"],
+    )
+
+
+def finish_pack(
+    conn: sqlite3.Connection, key: str, evidence: PackEvidence, report: str, commit: bool = True
+) -> PackResult:
+    """Wrap a freshly rendered pack, storing it in the pack cache when `key` is set."""
+    result = PackResult(
+        report, evidence.task_id, len(evidence.memory_hits), len(evidence.tag_hits), len(evidence.contract_hits)
+    )
+    if key:
+        pack = CachedPack(evidence.query, report, result.memory_hits, result.tag_hits, result.contract_hits)
+        store(conn, key, pack, commit=commit)
+        result.cache_status = "miss"
+    return result
+
+
+def generate_pack(
+    conn: sqlite3.Connection,
+    query: str,
+    task_packet: Dict[str, Any],
+    top_k: int,
+    use_cache: bool = True,
+) -> PackResult:
+    key = ""
+    if use_cache:
+        key, cached = lookup_cached_pack(conn, query, task_packet, top_k, generation_tag(conn))
+        if cached is not None:
+            return cached
+    evidence = gather_evidence(conn, query, task_packet, top_k)
+    return finish_pack(conn, key, evidence, evidence.render())
+
+
+def build_pack(
+    query: str,
+    memory_log_path: Path,
+    db_path: Path,
+    task_packet_path: Path | None = None,
+    top_k: int = 8,
+    use_cache: bool = True,
+) -> PackResult:
+    """Programmatic entry point: refresh the index and render one evidence pack."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
     ensure_index(db_path, memory_log_path)
-
-    task_packet_path = resolve_project_path(args.task_packet) if args.task_packet else None
     task_packet = load_task_packet(task_packet_path)
-    task_id, dep_tasks, dep_contracts = extract_task_links(task_packet)
 
+    with enable_mmap(sqlite3.connect(db_path)) as conn:
+        return generate_pack(conn, query, task_packet, top_k, use_cache)
+
+
+def print_cache_status(db_path: Path, status: str) -> None:
     with sqlite3.connect(db_path) as conn:
-        memory_hits = query_memory(conn, args.query, args.top_k)
-        tag_hits = query_tags(conn, args.query.lower(), args.top_k)
-
-    contract_hits = pull_contract_evidence(args.query, top_k=args.top_k)
-
-    report = build_output(
-        query=args.query,
-        task_id=task_id,
-        memory_hits=memory_hits,
-        tag_hits=tag_hits,
-        contract_hits=contract_hits,
-        dep_tasks=dep_tasks,
-        dep_contracts=dep_contracts,
+        stats = cache_stats(conn)
+    print(
+        f"[RAG][INFO] Pack cache {status}; hits={stats['hits']} misses={stats['misses']} entries={stats['entries']}",
+        file=sys.stderr,
     )
 
-    if args.out:
-        out_path = resolve_project_path(args.out)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(report, encoding="utf-8")
+
+def write_report(out_path: Path, report: str) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(report, encoding="utf-8")
+
+
+@traced("write")
+def emit_pack(report: str, out: str | None) -> None:
+    if out:
+        out_path = resolve_project_path(out)
+        write_report(out_path, report)
         print(f"[RAG][PASS] Evidence pack written: {out_path}")
     else:
         print(report)
 
+
+@dataclass
+class BatchItem:
+    query: str
+    out: Path
+    task_packet: Path | None
+    top_k: int
+    lookup_ms: float = 0.0
+    render_ms: float = 0.0
+    result: PackResult | None = None
+
+
+@dataclass
+class BatchResult:
+    items: List[BatchItem]
+    setup_ms: float
+    lookup_ms: float
+    render_ms: float
+    wall_ms: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    packets_loaded: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        per_pack = sorted(item.lookup_ms + item.render_ms for item in self.items)
+        p95 = per_pack[min(len(per_pack) - 1, int(len(per_pack) * 0.95))] if per_pack else 0.0
+        return {
+            "packs": len(self.items),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "task_packets_loaded": self.packets_loaded,
+            "wall_ms": round(self.wall_ms, 3),
+            "setup_ms": round(self.setup_ms, 3),
+            "lookup_ms": round(self.lookup_ms, 3),
+            "render_ms": round(self.render_ms, 3),
+            "pack_p95_ms": round(p95, 3),
+            "items": [
+                {
+                    "query": item.query,
+                    "out": str(item.out),
+                    "cache": item.result.cache_status if item.result else "error",
+                    "lookup_ms": round(item.lookup_ms, 3),
+                    "render_ms": round(item.render_ms, 3),
+                }
+                for item in self.items
+            ],
+        }
+
+
+def read_queries_file(path: Path, default_task_packet: Path | None, default_top_k: int) -> List[BatchItem]:
+    """Parse a JSONL queries file; every line needs "query" and "out", "task_packet" and "top_k" are optional."""
+    items: List[BatchItem] = []
+    outputs: Dict[Path, int] = {}
+    for record in JsonlStream(path, label="Queries file"):
+        entry = record.entry
+        query = entry.get("query")
+        out = entry.get("out")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError(f"Queries file line {record.line_no}: missing non-empty 'query'")
+        if not isinstance(out, str) or not out.strip():
+            raise ValueError(f"Queries file line {record.line_no}: missing non-empty 'out'")
+        out_path = resolve_project_path(out)
+        if out_path in outputs:
+            raise ValueError(f"Queries file line {record.line_no}: 'out' repeats line {outputs[out_path]}: {out}")
+        outputs[out_path] = record.line_no
+        raw_packet = entry.get("task_packet")
+        task_packet = resolve_project_path(str(raw_packet)) if raw_packet else default_task_packet
+        try:
+            top_k = int(entry.get("top_k", default_top_k))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Queries file line {record.line_no}: invalid 'top_k': {exc}") from exc
+        items.append(BatchItem(query, out_path, task_packet, top_k))
+    return items
+
+
+def _render_and_write(item: BatchItem, evidence: PackEvidence | None) -> str:
+    started = time.perf_counter()
+    report = evidence.render() if evidence is not None else item.result.report  # type: ignore[union-attr]
+    write_report(item.out, report)
+    item.render_ms = (time.perf_counter() - started) * 1000.0
+    return report
+
+
+@traced("batch")
+def run_batch(
+    items: List[BatchItem],
+    memory_log_path: Path,
+    db_path: Path,
+    use_cache: bool = True,
+    jobs: int = 1,
+) -> BatchResult:
+    """Render and write every pack in `items` from one index refresh and one shared connection.
+
+    Lookups run in order on the calling thread (the connection is not shared across
+    threads); rendering and writing fan out over `jobs` threads; cache entries are stored
+    and committed once at the end.
+    """
+    started = time.perf_counter()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with span("batch:setup"):
+        ensure_index(db_path, memory_log_path)
+    setup_ms = (time.perf_counter() - started) * 1000.0
+
+    packets: Dict[Path | None, Dict[str, Any]] = {None: {}}
+    keys: List[str] = [""] * len(items)
+    evidence: List[Optional[PackEvidence]] = [None] * len(items)
+    conn = enable_mmap(sqlite3.connect(db_path, cached_statements=BATCH_STATEMENT_CACHE))
+    try:
+        lookup_started = time.perf_counter()
+        with span("batch:lookups", packs=len(items)):
+            generation = generation_tag(conn) if use_cache else ""
+            for index, item in enumerate(items):
+                item_started = time.perf_counter()
+                if item.task_packet not in packets:
+                    packets[item.task_packet] = load_task_packet(item.task_packet)
+                task_packet = packets[item.task_packet]
+                if use_cache:
+                    keys[index], item.result = lookup_cached_pack(
+                        conn, item.query, task_packet, item.top_k, generation, commit=False
+                    )
+                if item.result is None:
+                    evidence[index] = gather_evidence(conn, item.query, task_packet, item.top_k)
+                item.lookup_ms = (time.perf_counter() - item_started) * 1000.0
+        lookup_ms = (time.perf_counter() - lookup_started) * 1000.0
+
+        render_started = time.perf_counter()
+        with span("batch:render", jobs=jobs):
+            if jobs > 1:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    reports = list(pool.map(_render_and_write, items, evidence))
+            else:
+                reports = [_render_and_write(item, found) for item, found in zip(items, evidence)]
+        render_ms = (time.perf_counter() - render_started) * 1000.0
+
+        for index, (item, found, report) in enumerate(zip(items, evidence, reports)):
+            if found is not None:
+                item.result = finish_pack(conn, keys[index], found, report, commit=False)
+        conn.commit()
+    finally:
+        conn.close()
+
+    result = BatchResult(items, setup_ms, lookup_ms, render_ms, (time.perf_counter() - started) * 1000.0)
+    result.cache_hits = sum(1 for item in items if item.result and item.result.cache_status == "hit")
+    result.cache_misses = sum(1 for item in items if item.result and item.result.cache_status == "miss")
+    result.packets_loaded = len(packets) - 1
+    return result
+
+
+def print_batch_summary(result: BatchResult, summary_path: Path | None) -> None:
+    summary = result.summary()
+    print(
+        f"[RAG][PASS] Batch: {summary['packs']} packs in {summary['wall_ms'] / 1000:.2f}s "
+        f"(setup {summary['setup_ms']:.1f}ms, lookups {summary['lookup_ms']:.1f}ms, "
+        f"render+write {summary['render_ms']:.1f}ms, p95 pack {summary['pack_p95_ms']:.1f}ms)"
+    )
+    print(
+        f"[RAG][INFO] Task packets loaded: {summary['task_packets_loaded']}; "
+        f"pack cache hits={summary['cache_hits']} misses={summary['cache_misses']}"
+    )
+    if summary_path is not None:
+        write_report(summary_path, json.dumps(summary, indent=2))
+        print(f"[RAG][PASS] Batch summary written: {summary_path}")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate hybrid-RAG evidence pack for AI task execution.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--query", help="Issue/problem query text")
+    source.add_argument("--queries-file", help="JSONL of {query, out, task_packet?, top_k?}; writes one pack per line")
+    parser.add_argument("--task-packet", help="Path to task packet YAML (default for --queries-file lines without one)")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--db-path", required=True, help="Path to SQLite memory index")
+    parser.add_argument("--out", help="Output markdown file path")
+    parser.add_argument("--top-k", type=int, default=8, help="Top-K memory snippets")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the pack instead of using the pack cache")
+    parser.add_argument("--verbose", action="store_true", help="Print pack-cache hit/miss counters to stderr")
+    parser.add_argument("--jobs", type=int, default=1, help="Threads rendering and writing packs (--queries-file)")
+    parser.add_argument("--summary", help="Write the batch timing summary as JSON (--queries-file)")
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+
+    db_path = resolve_project_path(args.db_path)
+    task_packet_path = resolve_project_path(args.task_packet) if args.task_packet else None
+    if args.queries_file:
+        if args.out:
+            parser.error("--out applies to --query; give each --queries-file line its own 'out'")
+        try:
+            items = read_queries_file(resolve_project_path(args.queries_file), task_packet_path, args.top_k)
+        except (OSError, ValueError) as exc:
+            print(f"[RAG][FAIL] {exc}", file=sys.stderr)
+            return 1
+        batch = run_batch(
+            items, resolve_project_path(args.memory_log), db_path, use_cache=not args.no_cache, jobs=max(1, args.jobs)
+        )
+        print_batch_summary(batch, resolve_project_path(args.summary) if args.summary else None)
+        if args.verbose:
+            print_cache_status(db_path, "counters")
+        return 0
+
+    result = build_pack(
+        args.query,
+        resolve_project_path(args.memory_log),
+        db_path,
+        task_packet_path,
+        args.top_k,
+        use_cache=not args.no_cache,
+    )
+    emit_pack(result.report, args.out)
+    if args.verbose:
+        print_cache_status(db_path, result.cache_status)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Long-lived evidence-pack server for rag_context_pack.
+
+Keeps the SQLite connections and parsed task packets warm between
+requests and serves packs concurrently over localhost HTTP. Use tools/rag_client.py
+(same flags as rag_context_pack.py) to talk to it.
+
+Queries run on a pool of read-only connections. A single writer connection owns the
+index refresh and the pack-cache bookkeeping; it is only locked when the memory log,
+contract docs or task packets changed on disk, and for the short pack-cache write.
+
+Usage:
+  python tools/rag_server.py \
+    --memory-log res://ai_library/docs/memory_log.jsonl \
+    --db-path res://ai_library/docs/ai_memory_index.db \
+    [--host 127.0.0.1] [--port 8765] [--pool-size 4]
+
+Endpoints:
+  GET  /health  -> {"ok": true, ...}
+  POST /pack    <- {"query", "task_packet", "memory_log", "db_path", "top_k"}
+                -> {"ok": true, "report": "...", "elapsed_ms": 1.2}
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from build_memory_index import connect_reader, ensure_schema, resolve_project_path
+from contract_doc_index import ensure_doc_schema
+from pack_cache import ensure_pack_cache_schema, generation_tag, record_use
+from rag_context_pack import (
+    PackResult,
+    finish_pack,
+    gather_evidence,
+    load_task_packet,
+    lookup_cached_pack,
+    refresh_index,
+    source_signature,
+)
+from task_graph import ensure_task_schema
+from tracing import add_trace_arguments, run_main
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class EvidencePackService:
+    """Shared state behind the HTTP handler: read-only pool, one writer, packet cache."""
+
+    def __init__(self, memory_log_path: Path, db_path: Path, pool_size: int = 4) -> None:
+        self.memory_log_path = memory_log_path
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._signature = ""
+        self._packet_lock = threading.Lock()
+        self._packets: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = sqlite3.connect(db_path, check_same_thread=False)
+        ensure_schema(self._writer)
+        ensure_doc_schema(self._writer)
+        ensure_task_schema(self._writer)
+        ensure_pack_cache_schema(self._writer)
+        self.refresh_if_stale()
+
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            self._pool.put(connect_reader(db_path, check_same_thread=False))
+
+    def refresh_if_stale(self) -> None:
+        """Refresh the index when its sources changed; the stat check runs without the lock."""
+        if source_signature(self.memory_log_path) == self._signature:
+            return
+        with self._write_lock:
+            # Taken before the refresh, so a write landing mid-refresh is caught next time.
+            signature = source_signature(self.memory_log_path)
+            if signature != self._signature:
+                refresh_index(self._writer, self.memory_log_path)
+                self._signature = signature
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def task_packet(self, raw_path: str | None) -> Dict[str, Any]:
+        if not raw_path:
+            return {}
+        path = resolve_project_path(raw_path)
+        if not path.exists():
+            return {}
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._packet_lock:
+            cached = self._packets.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        packet = load_task_packet(path)
+        with self._packet_lock:
+            self._packets[path] = (key, packet)
+        return packet
+
+    def check_target(self, payload: Dict[str, Any]) -> None:
+        for field, bound in (("memory_log", self.memory_log_path), ("db_path", self.db_path)):
+            raw = payload.get(field)
+            if raw and resolve_project_path(str(raw)).resolve() != bound.resolve():
+                raise ValueError(f"Server is bound to {field}={bound}, request asked for {raw}")
+
+    def render(self, payload: Dict[str, Any]) -> PackResult:
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("Request missing non-empty 'query'")
+        self.check_target(payload)
+        top_k = int(payload.get("top_k", 8))
+        task_packet = self.task_packet(payload.get("task_packet"))
+
+        self.refresh_if_stale()
+        use_cache = not payload.get("no_cache")
+        key = ""
+        with self.connection() as conn:
+            if use_cache:
+                key, cached = lookup_cached_pack(conn, query, task_packet, top_k, generation_tag(conn), record=False)
+                if cached is not None:
+                    with self._write_lock:
+                        record_use(self._writer, key, hit=True)
+                    return cached
+            evidence = gather_evidence(conn, query, task_packet, top_k)
+        report = evidence.render()
+        if not key:
+            return finish_pack(self._writer, key, evidence, report)
+        with self._write_lock:
+            record_use(self._writer, key, hit=False, commit=False)
+            return finish_pack(self._writer, key, evidence, report)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._writer.close()
+
+
+def make_handler(service: EvidencePackService) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path != "/health":
+                self._send(404, {"ok": False, "error": f"Unknown path: {self.path}"})
+                return
+            self._send(
+                200,
+                {"ok": True, "memory_log": str(service.memory_log_path), "db_path": str(service.db_path)},
+            )
+
+        def do_POST(self) -> None:  # noqa: N802
+            if self.path != "/pack":
+                self._send(404, {"ok": False, "error": f"Unknown path: {self.path}"})
+                return
+            started = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("Request body must be a JSON object")
+                result = service.render(payload)
+            except (ValueError, FileNotFoundError) as exc:
+                self._send(400, {"ok": False, "error": str(exc)})
+                return
+            except Exception as exc:  # pragma: no cover - surfaced to the client
+                self._send(500, {"ok": False, "error": f"{type(exc).__name__}: {exc}"})
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self._send(
+                200,
+                {"ok": True, "report": result.report, "cache": result.cache_status, "elapsed_ms": round(elapsed_ms, 3)},
+            )
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve hybrid-RAG evidence packs from a warm process.")
+    parser.add_argument("--memory-log", required=True, help="Path to memory_log.jsonl or a shard directory")
+    parser.add_argument("--db-path", required=True, help="Path to SQLite memory index")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (localhost only by default)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port")
+    parser.add_argument("--pool-size", type=int, default=4, help="Reader connections shared by request threads")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    service = EvidencePackService(
+        resolve_project_path(args.memory_log),
+        resolve_project_path(args.db_path),
+        pool_size=args.pool_size,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"[RAG-SERVER] Listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[RAG-SERVER] Stopped by user.")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
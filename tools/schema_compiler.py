@@ -0,0 +1,431 @@
+"""
+Compile JSON Schemas into plain Python validator modules, cached on disk.
+
+`compile_schema_source()` turns a schema (the subset of draft 2020-12 used by this
+repo: type, enum, const, required, properties, additionalProperties, items,
+min/maxItems, uniqueItems, min/maxLength, pattern, format "date-time",
+minimum/maximum and their exclusive forms) into straight-line Python that returns
+a list of "<json path>: <problem>" strings. Unsupported keywords raise
+`SchemaCompileError` instead of being silently skipped.
+
+`load_validator()` keys the generated module on the SHA-256 of its sources, the
+compiler version and any overlay (`extra_key`), writes it under tools/.schema_cache/
+and imports it, so later runs (and the interpreter's own bytecode cache) skip
+compilation entirely; a cached module that no longer imports is regenerated. Within
+one process validators are memoized by that cache file, whose digest is only
+recomputed when the (mtime_ns, size) of a source file changes.
+
+`derive_task_packet_schema()` builds a schema from task_packet.template.yaml: every
+key in the template is required, value types follow the template values, and inline
+comments such as `# low | medium | high` become enums.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import importlib.util
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import yaml  # type: ignore
+
+COMPILER_VERSION = "1"
+CACHE_DIR = Path(__file__).resolve().parent / ".schema_cache"
+
+Validator = Callable[[Any], List[str]]
+
+ANNOTATION_KEYWORDS = {
+    "$schema", "$id", "$comment", "title", "description", "default", "examples",
+    "deprecated", "readOnly", "writeOnly",
+}
+STRING_KEYWORDS = {"minLength", "maxLength", "pattern", "format"}
+NUMBER_KEYWORDS = {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}
+ARRAY_KEYWORDS = {"items", "minItems", "maxItems", "uniqueItems"}
+OBJECT_KEYWORDS = {"required", "properties", "additionalProperties"}
+SUPPORTED_KEYWORDS = (
+    ANNOTATION_KEYWORDS | STRING_KEYWORDS | NUMBER_KEYWORDS | ARRAY_KEYWORDS | OBJECT_KEYWORDS
+    | {"type", "enum", "const"}
+)
+
+TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool)"
+    " or isinstance({v}, float) and {v}.is_integer())",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "array": "isinstance({v}, list)",
+    "object": "isinstance({v}, dict)",
+}
+
+MODULE_HEADER = '''"""Generated by tools/schema_compiler.py from {name}; do not edit."""
+
+import re
+from datetime import datetime
+
+_MISSING = object()
+_DATE_TIME = re.compile(r"^\\d{{4}}-\\d{{2}}-\\d{{2}}[Tt ]\\d{{2}}:\\d{{2}}:\\d{{2}}(\\.\\d+)?([Zz]|[+-]\\d{{2}}:\\d{{2}})$")
+
+
+def _is_date_time(value):
+    if not _DATE_TIME.match(value):
+        return False
+    try:
+        datetime.fromisoformat(value.upper().replace("Z", "+00:00").replace(" ", "T"))
+    except ValueError:
+        return False
+    return True
+
+
+def _short(value):
+    text = repr(value)
+    return text if len(text) <= 60 else text[:57] + "..."
+
+
+def _has_duplicates(items):
+    seen = set()
+    for item in items:
+        key = repr(item) if isinstance(item, (list, dict)) else (type(item).__name__, item)
+        if key in seen:
+            return True
+        seen.add(key)
+    return False
+
+'''
+
+
+class SchemaCompileError(ValueError):
+    pass
+
+
+class _Path:
+    """JSON path of the value being checked, as a Python expression evaluated only on error."""
+
+    def __init__(self, static: Optional[str], expr: Optional[str] = None) -> None:
+        self.static = static
+        self.expr = expr
+
+    def code(self) -> str:
+        return repr(self.static) if self.static is not None else self.expr or "'$'"
+
+    def prop(self, name: str) -> "_Path":
+        suffix = f".{name}"
+        if self.static is not None:
+            return _Path(self.static + suffix)
+        return _Path(None, f"{self.expr} + {suffix!r}")
+
+    def index(self, var: str) -> "_Path":
+        return _Path(None, f"{self.code()} + '[' + str({var}) + ']'")
+
+
+class _Emitter:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.constants: List[str] = []
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, expr: str) -> str:
+        name = f"_K{len(self.constants)}"
+        self.constants.append(f"{name} = {expr}")
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def error(self, depth: int, path: _Path, message_expr: str) -> None:
+        self.emit(depth, f"errors.append({path.code()} + ': ' + {message_expr})")
+
+    def node(self, schema: Any, value: str, path: _Path, depth: int) -> None:
+        if schema is True or schema == {}:
+            return
+        if schema is False:
+            self.error(depth, path, "'no value is allowed here'")
+            return
+        if not isinstance(schema, dict):
+            raise SchemaCompileError(f"Schema at {path.static or '$'} must be an object or boolean")
+        unsupported = sorted(set(schema) - SUPPORTED_KEYWORDS)
+        if unsupported:
+            raise SchemaCompileError(f"Unsupported schema keyword(s) at {path.static or '$'}: {', '.join(unsupported)}")
+
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            unknown = [name for name in types if name not in TYPE_CHECKS]
+            if unknown:
+                raise SchemaCompileError(f"Unknown type(s) at {path.static or '$'}: {', '.join(map(str, unknown))}")
+            check = " or ".join(TYPE_CHECKS[name].format(v=value) for name in types)
+            self.emit(depth, f"if not ({check}):")
+            expected = " or ".join(types)
+            self.error(depth + 1, path, f"'expected {expected}, got ' + type({value}).__name__")
+            self.emit(depth, "else:")
+            depth += 1
+            self.emit(depth, "pass")
+
+        if "enum" in schema:
+            values = schema["enum"]
+            hashable = all(isinstance(item, (str, int, float, bool)) or item is None for item in values)
+            allowed = self.constant(f"frozenset({values!r})" if hashable else repr(values))
+            self.emit(depth, f"if {value} not in {allowed}:")
+            self.error(depth + 1, path, f"_short({value}) + ' is not an allowed value'")
+        if "const" in schema:
+            expected_const = self.constant(repr(schema["const"]))
+            self.emit(depth, f"if {value} != {expected_const}:")
+            self.error(depth + 1, path, f"'must equal ' + _short({expected_const})")
+
+        if STRING_KEYWORDS & set(schema):
+            self.emit(depth, f"if isinstance({value}, str):")
+            self.string_checks(schema, value, path, depth + 1)
+        if NUMBER_KEYWORDS & set(schema):
+            self.emit(depth, f"if {TYPE_CHECKS['number'].format(v=value)}:")
+            self.number_checks(schema, value, path, depth + 1)
+        if ARRAY_KEYWORDS & set(schema):
+            self.emit(depth, f"if isinstance({value}, list):")
+            self.array_checks(schema, value, path, depth + 1)
+        if OBJECT_KEYWORDS & set(schema):
+            self.emit(depth, f"if isinstance({value}, dict):")
+            self.object_checks(schema, value, path, depth + 1)
+
+    def string_checks(self, schema: Dict[str, Any], value: str, path: _Path, depth: int) -> None:
+        self.emit(depth, "pass")
+        if "minLength" in schema:
+            self.emit(depth, f"if len({value}) < {int(schema['minLength'])}:")
+            self.error(depth + 1, path, repr(f"shorter than {schema['minLength']} characters"))
+        if "maxLength" in schema:
+            self.emit(depth, f"if len({value}) > {int(schema['maxLength'])}:")
+            self.error(depth + 1, path, repr(f"longer than {schema['maxLength']} characters"))
+        if "pattern" in schema:
+            regex = self.constant(f"re.compile({schema['pattern']!r})")
+            self.emit(depth, f"if not {regex}.search({value}):")
+            message = "must not be blank" if schema["pattern"] == r"\S" else f"does not match pattern {schema['pattern']}"
+            self.error(depth + 1, path, repr(message))
+        if schema.get("format") == "date-time":
+            self.emit(depth, f"if not _is_date_time({value}):")
+            self.error(depth + 1, path, f"_short({value}) + ' is not a valid date-time'")
+
+    def number_checks(self, schema: Dict[str, Any], value: str, path: _Path, depth: int) -> None:
+        self.emit(depth, "pass")
+        for keyword, op, text in (
+            ("minimum", "<", "below minimum"),
+            ("maximum", ">", "above maximum"),
+            ("exclusiveMinimum", "<=", "must be greater than"),
+            ("exclusiveMaximum", ">=", "must be less than"),
+        ):
+            if keyword in schema:
+                self.emit(depth, f"if {value} {op} {schema[keyword]!r}:")
+                self.error(depth + 1, path, repr(f"{text} {schema[keyword]}"))
+
+    def array_checks(self, schema: Dict[str, Any], value: str, path: _Path, depth: int) -> None:
+        self.emit(depth, "pass")
+        if "minItems" in schema:
+            self.emit(depth, f"if len({value}) < {int(schema['minItems'])}:")
+            message = "must not be empty" if schema["minItems"] == 1 else f"fewer than {schema['minItems']} items"
+            self.error(depth + 1, path, repr(message))
+        if "maxItems" in schema:
+            self.emit(depth, f"if len({value}) > {int(schema['maxItems'])}:")
+            self.error(depth + 1, path, repr(f"more than {schema['maxItems']} items"))
+        if schema.get("uniqueItems"):
+            self.emit(depth, f"if _has_duplicates({value}):")
+            self.error(depth + 1, path, "'items must be unique'")
+        if "items" in schema and schema["items"] not in (True, {}):
+            index = self.name("i")
+            item = self.name("item")
+            self.emit(depth, f"for {index}, {item} in enumerate({value}):")
+            self.emit(depth + 1, "pass")
+            self.node(schema["items"], item, path.index(index), depth + 1)
+
+    def object_checks(self, schema: Dict[str, Any], value: str, path: _Path, depth: int) -> None:
+        self.emit(depth, "pass")
+        properties: Dict[str, Any] = schema.get("properties", {})
+        for name in schema.get("required", []):
+            self.emit(depth, f"if {name!r} not in {value}:")
+            self.error(depth + 1, path, repr(f"missing required field '{name}'"))
+        for name, subschema in properties.items():
+            if subschema is True or subschema == {}:
+                continue
+            child = self.name("v")
+            self.emit(depth, f"{child} = {value}.get({name!r}, _MISSING)")
+            self.emit(depth, f"if {child} is not _MISSING:")
+            self.emit(depth + 1, "pass")
+            self.node(subschema, child, path.prop(name), depth + 1)
+
+        additional = schema.get("additionalProperties", True)
+        if additional is True or additional == {}:
+            return
+        known = self.constant(f"frozenset({sorted(properties)!r})")
+        extra = self.name("extra")
+        self.emit(depth, f"{extra} = [key for key in {value} if key not in {known}]")
+        if additional is False:
+            self.emit(depth, f"if {extra}:")
+            self.error(depth + 1, path, f"'unexpected field(s): ' + ', '.join(map(str, {extra}))")
+            return
+        key = self.name("key")
+        self.emit(depth, f"for {key} in {extra}:")
+        self.emit(depth + 1, "pass")
+        self.node(additional, f"{value}[{key}]", path.prop("*"), depth + 1)
+
+
+def compile_schema_source(schema: Any, name: str = "schema") -> str:
+    emitter = _Emitter()
+    emitter.node(schema, "value", _Path("$"), 1)
+    body = "\n".join(emitter.lines)
+    constants = "\n".join(emitter.constants)
+    return (
+        MODULE_HEADER.format(name=name)
+        + (constants + "\n\n" if constants else "")
+        + "\ndef validate(value):\n    errors = []\n"
+        + (body + "\n" if body else "")
+        + "    return errors\n"
+    )
+
+
+def apply_overlay(schema: Dict[str, Any], overlay: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge extra keywords into a copy of `schema`; paths are dotted property names,
+    with a `[]` suffix stepping into array items (e.g. "checks.required[].id")."""
+    merged = copy.deepcopy(schema)
+    for dotted, keywords in overlay.items():
+        node = merged
+        for part in dotted.split("."):
+            into_items = part.endswith("[]")
+            name = part[:-2] if into_items else part
+            node = node.setdefault("properties", {}).setdefault(name, {})
+            if into_items:
+                node = node.setdefault("items", {})
+        node.update(keywords)
+    return merged
+
+
+ENUM_COMMENT = re.compile(r"^\s*([A-Za-z0-9_]+)\s*:\s*[^#]*#\s*(.+\|.+)$")
+
+
+def _template_enums(template_text: str) -> Dict[str, List[str]]:
+    enums: Dict[str, List[str]] = {}
+    for line in template_text.splitlines():
+        match = ENUM_COMMENT.match(line)
+        if match:
+            enums[match.group(1)] = [option.strip() for option in match.group(2).split("|") if option.strip()]
+    return enums
+
+
+def _derive(value: Any, key: str, enums: Dict[str, List[str]]) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return {
+            "type": "object",
+            "required": list(value),
+            "properties": {name: _derive(item, name, enums) for name, item in value.items()},
+        }
+    if isinstance(value, list):
+        return {"type": "array", "items": _derive(value[0], key, enums)} if value else {"type": "array"}
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, int):
+        return {"type": "integer"}
+    if isinstance(value, float):
+        return {"type": "number"}
+    if isinstance(value, str):
+        return {"type": "string", "enum": enums[key]} if key in enums else {"type": "string"}
+    return {}
+
+
+def derive_task_packet_schema(template_text: str) -> Dict[str, Any]:
+    template = yaml.safe_load(template_text)
+    if not isinstance(template, dict):
+        raise SchemaCompileError("Task packet template must be a YAML object")
+    schema = _derive(template, "", _template_enums(template_text))
+    schema["title"] = "AI Task Packet (derived from task_packet.template.yaml)"
+    return schema
+
+
+# Validators by cache file path, and the path last computed for each (name, extra_key, sources).
+_LOADED: Dict[str, Validator] = {}
+_MODULE_PATHS: Dict[Tuple[str, str, str, Tuple[str, ...]], Tuple[Tuple[Tuple[int, int], ...], str]] = {}
+
+
+def _import_validator(module_path: Path, module_name: str) -> Validator:
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load generated validator {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.validate
+
+
+def load_validator(
+    name: str,
+    sources: Sequence[Path],
+    build_schema: Callable[[], Dict[str, Any]],
+    extra_key: str = "",
+    cache_dir: Path = CACHE_DIR,
+) -> Validator:
+    """Validator for the schema built from `sources`, compiled once and cached on disk."""
+    stamp = tuple((path.stat().st_mtime_ns, path.stat().st_size) for path in sources)
+    memo_key = (name, extra_key, str(cache_dir), tuple(str(path) for path in sources))
+    known = _MODULE_PATHS.get(memo_key)
+    if known is not None and known[0] == stamp and known[1] in _LOADED:
+        return _LOADED[known[1]]
+
+    digest = hashlib.sha256(f"{COMPILER_VERSION}\0{extra_key}".encode("utf-8"))
+    for path in sources:
+        digest.update(b"\0" + path.read_bytes())
+    # Overlays of one schema get their own files, so they do not evict each other.
+    variant = hashlib.sha256(extra_key.encode("utf-8")).hexdigest()[:8]
+    module_name = f"{name}_{variant}_{digest.hexdigest()[:16]}"
+    module_path = cache_dir / f"{module_name}.py"
+    _MODULE_PATHS[memo_key] = (stamp, str(module_path))
+    if str(module_path) in _LOADED:
+        return _LOADED[str(module_path)]
+
+    validator: Optional[Validator] = None
+    if module_path.exists():
+        try:
+            validator = _import_validator(module_path, module_name)
+        except (SyntaxError, ImportError, AttributeError):
+            validator = None  # corrupt or foreign cache file: regenerate it below
+    if validator is None:
+        source = compile_schema_source(build_schema(), name)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = module_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(source, encoding="utf-8")
+            os.replace(tmp_path, module_path)
+            for stale in cache_dir.glob(f"{name}_{variant}_*.py"):
+                if stale != module_path:
+                    stale.unlink(missing_ok=True)
+            validator = _import_validator(module_path, module_name)
+        except OSError:
+            namespace: Dict[str, Any] = {}
+            exec(compile(source, f"<{module_name}>", "exec"), namespace)
+            validator = namespace["validate"]
+
+    _LOADED[str(module_path)] = validator
+    return validator
+
+
+def load_json_schema_validator(
+    name: str, schema_path: Path, overlay: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Validator:
+    overlay = overlay or {}
+    return load_validator(
+        name,
+        [schema_path],
+        lambda: apply_overlay(json.loads(schema_path.read_text(encoding="utf-8")), overlay),
+        extra_key=json.dumps(overlay, sort_keys=True),
+    )
+
+
+def load_task_packet_validator(
+    name: str, template_path: Path, overlay: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Validator:
+    overlay = overlay or {}
+    return load_validator(
+        name,
+        [template_path],
+        lambda: apply_overlay(derive_task_packet_schema(template_path.read_text(encoding="utf-8")), overlay),
+        extra_key=json.dumps(overlay, sort_keys=True),
+    )
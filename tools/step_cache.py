@@ -0,0 +1,136 @@
+"""
+Content-hash cache for pipeline steps.
+
+A step's cache key is the SHA-256 of its command line plus the content hashes of its
+declared inputs. Passing results are recorded with the hashes of the step's outputs;
+a later run with the same key replays the recorded exit code and output instead of
+executing the step, as long as every output still exists with the recorded content.
+Failures are never cached so a broken step is always retried.
+
+File hashes are memoized by (mtime_ns, size) so unchanged inputs are not re-read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pipeline_dag import Step, StepOutcome, StepRunner
+
+CACHE_VERSION = 1
+MISSING = "missing"
+
+
+class StepCache:
+    def __init__(self, root: Path, path: Path, max_entries: int = 256) -> None:
+        self.root = root
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.file_hashes: Dict[str, List[Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+        self.steps = dict(data.get("steps", {}))
+        self.file_hashes = dict(data.get("file_hashes", {}))
+
+    def save(self) -> None:
+        with self._lock:
+            if len(self.steps) > self.max_entries:
+                newest = sorted(self.steps.items(), key=lambda item: item[1].get("recorded_at", ""), reverse=True)
+                self.steps = dict(newest[: self.max_entries])
+            payload = {"version": CACHE_VERSION, "steps": self.steps, "file_hashes": self.file_hashes}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def hash_file(self, rel: str) -> str:
+        path = self.root / rel
+        if not path.is_file():
+            return MISSING
+        stat = path.stat()
+        with self._lock:
+            memo = self.file_hashes.get(rel)
+        if memo is not None and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return str(memo[2])
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self.file_hashes[rel] = [stat.st_mtime_ns, stat.st_size, value]
+        return value
+
+    def expand(self, rels: List[str]) -> List[str]:
+        """Expand directory entries (ending in "/") into the files beneath them."""
+        files: List[str] = []
+        for rel in rels:
+            if not rel.endswith("/"):
+                files.append(rel)
+                continue
+            base = self.root / rel
+            for dirpath, _, filenames in os.walk(base):
+                for name in filenames:
+                    files.append((Path(dirpath) / name).relative_to(self.root).as_posix())
+        return sorted(files)
+
+    def key(self, step: Step) -> str:
+        digest = hashlib.sha256(step.command.encode("utf-8"))
+        for rel in self.expand(step.inputs):
+            digest.update(b"\0" + rel.encode("utf-8") + b"\0" + self.hash_file(rel).encode("ascii"))
+        return digest.hexdigest()
+
+    def lookup(self, step: Step, key: str) -> Optional[StepOutcome]:
+        with self._lock:
+            entry = self.steps.get(step.name)
+        if entry is None or entry.get("key") != key:
+            return None
+        for rel, recorded in entry.get("outputs", {}).items():
+            if self.hash_file(rel) != recorded:
+                return None
+        return StepOutcome(True, int(entry["code"]), str(entry["output"]), cached=True, details=entry.get("details", {}))
+
+    def store(self, step: Step, key: str, outcome: StepOutcome) -> None:
+        if not outcome.ok:
+            with self._lock:
+                self.steps.pop(step.name, None)
+            return
+        entry = {
+            "key": key,
+            "code": outcome.code,
+            "output": outcome.output,
+            "details": outcome.details,
+            "outputs": {rel: self.hash_file(rel) for rel in self.expand(step.outputs)},
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with self._lock:
+            self.steps[step.name] = entry
+
+
+def cached_runner(cache: StepCache, runner: StepRunner) -> StepRunner:
+    def run(step: Step) -> StepOutcome:
+        key = cache.key(step)
+        hit = cache.lookup(step, key)
+        if hit is not None:
+            return hit
+        outcome = runner(step)
+        cache.store(step, key, outcome)
+        return outcome
+
+    return run
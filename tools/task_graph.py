@@ -0,0 +1,265 @@
+"""
+Task dependency graph built from the task packets, stored next to the memory index.
+
+Every packet contributes its task's `depends_on_task_ids` (`task_edges`) and
+`depends_on_contract_ids` (`task_contracts`); `task_sources` records mtime, size and
+SHA-256 per packet so a refresh only re-reads packets that changed, as contract_doc_index
+does for docs. `task_closure` holds one (task_id, ancestor_id, depth) row per ancestor,
+depth being the shortest dependency path, so a task's whole lineage is one indexed read
+however deep the milestone chain is.
+
+The closure is maintained incrementally: when packets change, only the closure rows of
+their tasks and of those tasks' descendants are recomputed, parents first, each from the
+parents' existing rows. Tasks on a dependency cycle (and anything downstream of one) fall
+back to a depth-bounded recursive walk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import yaml  # type: ignore
+
+MAX_CYCLE_DEPTH = 64
+
+TASK_CLOSURE_SQL = """
+    INSERT INTO task_closure (task_id, ancestor_id, depth)
+    SELECT ?, ancestor_id, MIN(depth)
+    FROM (
+        SELECT depends_on AS ancestor_id, 1 AS depth FROM task_edges WHERE task_id = ?
+        UNION ALL
+        SELECT c.ancestor_id, c.depth + 1
+        FROM task_edges e
+        JOIN task_closure c ON c.task_id = e.depends_on
+        WHERE e.task_id = ?
+    )
+    WHERE ancestor_id <> ?
+    GROUP BY ancestor_id
+"""
+
+CYCLE_CLOSURE_SQL = """
+    WITH RECURSIVE walk(task_id, ancestor_id, depth) AS (
+        SELECT DISTINCT e.task_id, e.depends_on, 1
+        FROM task_edges e
+        JOIN closure_seeds s ON s.task_id = e.task_id
+        UNION
+        SELECT w.task_id, e.depends_on, w.depth + 1
+        FROM walk w
+        JOIN task_edges e ON e.task_id = w.ancestor_id
+        WHERE w.depth < ?
+    )
+    INSERT INTO task_closure (task_id, ancestor_id, depth)
+    SELECT task_id, ancestor_id, MIN(depth)
+    FROM walk
+    WHERE ancestor_id <> task_id
+    GROUP BY task_id, ancestor_id
+"""
+
+
+def ensure_task_schema(connection: sqlite3.Connection) -> None:
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS task_sources (
+            path TEXT PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS task_edges (
+            path TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            depends_on TEXT NOT NULL,
+            PRIMARY KEY (path, depends_on)
+        );
+
+        CREATE TABLE IF NOT EXISTS task_contracts (
+            path TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            contract_id TEXT NOT NULL,
+            PRIMARY KEY (path, contract_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS task_closure (
+            task_id TEXT NOT NULL,
+            ancestor_id TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (task_id, ancestor_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_task_edges_task_id ON task_edges(task_id);
+        CREATE INDEX IF NOT EXISTS idx_task_edges_depends_on ON task_edges(depends_on);
+        CREATE INDEX IF NOT EXISTS idx_task_contracts_contract_id ON task_contracts(contract_id);
+        CREATE INDEX IF NOT EXISTS idx_task_closure_ancestor ON task_closure(ancestor_id);
+        """
+    )
+
+
+def extract_task_links(task_packet: Dict[str, Any]) -> Tuple[str, List[str], List[str]]:
+    task = task_packet.get("task", {}) if isinstance(task_packet.get("task"), dict) else {}
+    task_id = str(task.get("task_id", ""))
+    dep_tasks = task.get("depends_on_task_ids", [])
+    dep_contracts = task.get("depends_on_contract_ids", [])
+    dep_tasks = [str(item) for item in dep_tasks] if isinstance(dep_tasks, list) else []
+    dep_contracts = [str(item) for item in dep_contracts] if isinstance(dep_contracts, list) else []
+    return task_id, dep_tasks, dep_contracts
+
+
+def task_packet_paths(directories: Iterable[Path]) -> List[Path]:
+    paths: List[Path] = []
+    for directory in directories:
+        if directory.is_dir():
+            paths.extend(path for path in directory.rglob("*") if path.suffix.lower() in (".yaml", ".yml"))
+    return sorted(paths)
+
+
+def _parse_packet(data: bytes) -> Tuple[str, List[str], List[str]]:
+    """Links of one packet; unreadable YAML counts as a packet without links."""
+    try:
+        packet = yaml.safe_load(data.decode("utf-8", errors="ignore"))
+    except yaml.YAMLError:
+        return "", [], []
+    return extract_task_links(packet) if isinstance(packet, dict) else ("", [], [])
+
+
+def _forget_packet(connection: sqlite3.Connection, key: str) -> None:
+    connection.execute("DELETE FROM task_edges WHERE path = ?", (key,))
+    connection.execute("DELETE FROM task_contracts WHERE path = ?", (key,))
+
+
+def refresh_task_graph(connection: sqlite3.Connection, paths: Iterable[Path]) -> int:
+    """Re-read packets whose mtime/size changed and whose hash differs; returns packets rewritten."""
+    known = {
+        row[0]: (row[1], row[2], row[3], row[4])
+        for row in connection.execute("SELECT path, task_id, mtime_ns, size, sha256 FROM task_sources")
+    }
+    wanted = set()
+    touched: Set[str] = set()
+    rewritten = 0
+
+    for path in paths:
+        key = str(path)
+        if not path.exists():
+            continue
+        wanted.add(key)
+        stat = path.stat()
+        previous = known.get(key)
+        if previous is not None and previous[1] == stat.st_mtime_ns and previous[2] == stat.st_size:
+            continue
+
+        data = path.read_bytes()
+        sha256 = hashlib.sha256(data).hexdigest()
+        task_id = previous[0] if previous is not None else ""
+        if previous is None or previous[3] != sha256:
+            task_id, dep_tasks, dep_contracts = _parse_packet(data)
+            _forget_packet(connection, key)
+            if task_id:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO task_edges (path, task_id, depends_on) VALUES (?, ?, ?)",
+                    [(key, task_id, dep) for dep in dep_tasks if dep and dep != task_id],
+                )
+                connection.executemany(
+                    "INSERT OR IGNORE INTO task_contracts (path, task_id, contract_id) VALUES (?, ?, ?)",
+                    [(key, task_id, contract) for contract in dep_contracts if contract],
+                )
+            touched.update(task for task in (task_id, previous[0] if previous else "") if task)
+            rewritten += 1
+        connection.execute(
+            "INSERT OR REPLACE INTO task_sources (path, task_id, mtime_ns, size, sha256) VALUES (?, ?, ?, ?, ?)",
+            (key, task_id, stat.st_mtime_ns, stat.st_size, sha256),
+        )
+
+    for stale in set(known) - wanted:
+        _forget_packet(connection, stale)
+        connection.execute("DELETE FROM task_sources WHERE path = ?", (stale,))
+        if known[stale][0]:
+            touched.add(known[stale][0])
+
+    if touched:
+        update_closure(connection, touched)
+    return rewritten
+
+
+def task_lineage(
+    connection: sqlite3.Connection, task_id: str, dep_tasks: List[str], dep_contracts: List[str]
+) -> Dict[str, Tuple[str, int]]:
+    """Tasks related to a packet, mapped to (relation, depth), nearest ancestors first.
+
+    Ancestors ("ancestor", shortest distance) are the packet's own dependencies plus their
+    closure, and the closure of `task_id` when the graph knows it; tasks depending on one
+    of `dep_contracts` follow as ("contract=<id>", 0).
+    """
+    ancestors: Dict[str, int] = {task: 1 for task in dep_tasks if task}
+    for ancestor_id, depth in connection.execute(
+        "SELECT ancestor_id, depth FROM task_closure WHERE task_id = ?", (task_id,)
+    ):
+        ancestors[ancestor_id] = min(depth, ancestors.get(ancestor_id, depth))
+    if dep_tasks:
+        placeholders = ",".join("?" for _ in dep_tasks)
+        sql = f"SELECT ancestor_id, MIN(depth) + 1 FROM task_closure WHERE task_id IN ({placeholders}) GROUP BY ancestor_id"
+        for ancestor_id, depth in connection.execute(sql, dep_tasks):
+            ancestors[ancestor_id] = min(depth, ancestors.get(ancestor_id, depth))
+    ancestors.pop(task_id, None)
+
+    lineage = {task: ("ancestor", depth) for task, depth in sorted(ancestors.items(), key=lambda item: (item[1], item[0]))}
+    if dep_contracts:
+        placeholders = ",".join("?" for _ in dep_contracts)
+        sql = f"""
+            SELECT task_id, MIN(contract_id)
+            FROM task_contracts
+            WHERE contract_id IN ({placeholders}) AND task_id <> ?
+            GROUP BY task_id
+            ORDER BY task_id
+        """
+        for peer, contract_id in connection.execute(sql, (*dep_contracts, task_id)):
+            lineage.setdefault(peer, (f"contract={contract_id}", 0))
+    return lineage
+
+
+def update_closure(connection: sqlite3.Connection, changed_tasks: Iterable[str]) -> int:
+    """Recompute closure rows of `changed_tasks` and their descendants; returns tasks recomputed."""
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS closure_seeds (task_id TEXT PRIMARY KEY)")
+    connection.execute("DELETE FROM closure_seeds")
+    connection.executemany("INSERT OR IGNORE INTO closure_seeds (task_id) VALUES (?)", [(task,) for task in changed_tasks])
+    # Edges into a task are recorded even before its own packet exists, so the closure
+    # already knows every descendant of a changed task.
+    connection.execute(
+        """
+        INSERT OR IGNORE INTO closure_seeds (task_id)
+        SELECT c.task_id FROM task_closure c JOIN closure_seeds s ON c.ancestor_id = s.task_id
+        """
+    )
+    affected = {row[0] for row in connection.execute("SELECT task_id FROM closure_seeds")}
+    recomputed = len(affected)
+    connection.execute("DELETE FROM task_closure WHERE task_id IN (SELECT task_id FROM closure_seeds)")
+
+    parents: Dict[str, Set[str]] = defaultdict(set)
+    children: Dict[str, Set[str]] = defaultdict(set)
+    for task_id, depends_on in connection.execute(
+        "SELECT DISTINCT e.task_id, e.depends_on FROM task_edges e JOIN closure_seeds s ON s.task_id = e.task_id"
+    ):
+        if depends_on in affected:
+            parents[task_id].add(depends_on)
+            children[depends_on].add(task_id)
+
+    # Parents first, so every parent's closure is final before its children read it.
+    ready = [task for task in affected if not parents[task]]
+    while ready:
+        task = ready.pop()
+        connection.execute(TASK_CLOSURE_SQL, (task, task, task, task))
+        connection.execute("DELETE FROM closure_seeds WHERE task_id = ?", (task,))
+        affected.discard(task)
+        for child in children[task]:
+            parents[child].discard(task)
+            if not parents[child]:
+                ready.append(child)
+
+    if affected:
+        # What is left sits on or below a cycle; closure_seeds now holds exactly those tasks.
+        connection.execute(CYCLE_CLOSURE_SQL, (MAX_CYCLE_DEPTH,))
+    return recomputed
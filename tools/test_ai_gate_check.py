@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Tests for ai_gate_check.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_gate_check import find_latest_memory_entry
+from build_memory_index import resolve_project_path
+from jsonl_stream import iter_jsonl
+
+SHIPPED_LOG = resolve_project_path("res://ai_library/docs/memory_log.jsonl")
+
+
+class ReverseScanTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.log = self.tmp / "memory_log.jsonl"
+        shutil.copyfile(SHIPPED_LOG, self.log)
+        self.template = next(iter_jsonl(SHIPPED_LOG))
+
+    def append(self, task_id: str, memory_id: str, ensure_ascii: bool) -> None:
+        entry = {**self.template, "task_id": task_id, "memory_id": memory_id}
+        with self.log.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, ensure_ascii=ensure_ascii) + "\n")
+
+    def test_escaped_task_ids_are_found(self) -> None:
+        cases = [
+            ("M2-Tö1", True),
+            ("M2-Tö2", False),
+            ('M2-"quoted"', True),
+            ("M2-back\\slash", False),
+        ]
+        for number, (task_id, ensure_ascii) in enumerate(cases, start=1):
+            self.append(task_id, f"MEM-ESC-{number}", ensure_ascii)
+
+        for number, (task_id, _) in enumerate(cases, start=1):
+            with self.subTest(task_id=task_id):
+                entry, source = find_latest_memory_entry(self.log, task_id, None)
+                self.assertEqual(source, "reverse log scan")
+                self.assertIsNotNone(entry)
+                self.assertEqual(entry["memory_id"], f"MEM-ESC-{number}")
+
+    def test_latest_entry_wins_and_unknown_task_is_none(self) -> None:
+        self.append("M2-T09", "MEM-OLD", True)
+        self.append("M2-T09", "MEM-NEW", True)
+        self.assertEqual(find_latest_memory_entry(self.log, "M2-T09", None)[0]["memory_id"], "MEM-NEW")
+        self.assertIsNone(find_latest_memory_entry(self.log, "M9-T99", None)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests for ai_pipeline_daemon.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import ai_pipeline_daemon
+
+
+class LoadToolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tools = Path(tempfile.mkdtemp()).resolve()
+        self.addCleanup(shutil.rmtree, self.tools, True)
+        sys.path.insert(0, str(self.tools))
+        self.addCleanup(sys.path.remove, str(self.tools))
+        for patcher in (
+            mock.patch.object(ai_pipeline_daemon, "TOOLS_DIR", self.tools),
+            mock.patch.object(ai_pipeline_daemon, "_TOOL_STAMPS", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.forget_modules)
+        self.write("fake_helper", "VALUE = 1\n")
+        self.write("fake_tool", "import fake_helper\n\ndef value():\n    return fake_helper.VALUE\n")
+
+    def forget_modules(self) -> None:
+        for name in ("fake_helper", "fake_tool"):
+            sys.modules.pop(name, None)
+
+    def write(self, name: str, source: str) -> None:
+        path = self.tools / f"{name}.py"
+        previous = path.stat().st_mtime_ns if path.exists() else 0
+        path.write_text(source, encoding="utf-8")
+        # Coarse filesystem clocks must still see a change.
+        stamp = max(path.stat().st_mtime_ns, previous + 1_000_000_000)
+        os.utime(path, ns=(stamp, stamp))
+
+    def test_helper_edit_reaches_the_tool(self) -> None:
+        tool = ai_pipeline_daemon.load_tool("fake_tool")
+        self.assertEqual(tool.value(), 1)
+        self.assertIs(ai_pipeline_daemon.load_tool("fake_tool"), tool)
+
+        self.write("fake_helper", "VALUE = 2\n")
+        self.assertEqual(ai_pipeline_daemon.load_tool("fake_tool").value(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
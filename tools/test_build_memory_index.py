@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for build_memory_index.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_memory_index import build_index, ensure_schema, fetch_entries, read_index_meta, resolve_project_path, sync_index
+from jsonl_stream import JsonlStream, iter_jsonl
+from memory_appender import MemoryAppender
+
+SHIPPED_INDEX = resolve_project_path("res://ai_library/docs/ai_memory_index.db")
+SHIPPED_LOG = resolve_project_path("res://ai_library/docs/memory_log.jsonl")
+
+
+class LegacyMigrationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def test_shipped_legacy_index_migrates_on_first_run(self) -> None:
+        db_path = self.tmp / "ai_memory_index.db"
+        shutil.copyfile(SHIPPED_INDEX, db_path)
+
+        result = build_index(SHIPPED_LOG, db_path)
+
+        entries = list(iter_jsonl(SHIPPED_LOG))
+        self.assertEqual(result.mode, "full")
+        self.assertEqual(result.memories, len(entries))
+        with sqlite3.connect(db_path) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(memories)")}
+            self.assertIn("byte_offset", columns)
+            self.assertNotIn("raw_json", columns)
+            self.assertEqual(read_index_meta(conn)["indexed_entries"], str(len(entries)))
+            rows = conn.execute("SELECT memory_id, source_file, byte_offset, byte_length FROM memories ORDER BY rowid").fetchall()
+        self.assertEqual(fetch_entries(SHIPPED_LOG, rows), entries)
+        self.assertEqual(build_index(SHIPPED_LOG, db_path).mode, "unchanged")
+
+    def test_migration_without_index_meta_keeps_schema_usable(self) -> None:
+        db_path = self.tmp / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE memories (memory_id TEXT PRIMARY KEY, task_id TEXT NOT NULL, raw_json TEXT)")
+            conn.execute("INSERT INTO memories VALUES ('MEM-1', 'T-1', '{}')")
+        with sqlite3.connect(db_path) as conn:
+            ensure_schema(conn)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM index_meta").fetchone()[0], 0)
+
+
+class TornAppendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.log = self.tmp / "memory_log.jsonl"
+        shutil.copyfile(SHIPPED_LOG, self.log)
+        self.complete_bytes = self.log.stat().st_size
+        self.entries = len(list(iter_jsonl(self.log)))
+
+    def test_stream_stops_before_partial_last_line(self) -> None:
+        with self.log.open("ab") as handle:
+            handle.write(b'{"memory_id":"MEM-PARTIAL","task_')
+        stream = JsonlStream(self.log, 0, self.log.stat().st_size)
+        self.assertEqual(len(list(stream)), self.entries)
+        self.assertEqual(stream.position, self.complete_bytes)
+
+    def test_sync_resumes_after_partial_line_completes(self) -> None:
+        entry = next(iter_jsonl(SHIPPED_LOG))
+        line = json.dumps({**entry, "memory_id": "MEM-PARTIAL"}).encode("utf-8") + b"\n"
+        with self.log.open("ab") as handle:
+            handle.write(line[:20])
+
+        with sqlite3.connect(self.tmp / "index.db") as conn:
+            ensure_schema(conn)
+            first = sync_index(self.log, conn)
+            self.assertEqual((first.indexed_entries, first.indexed_bytes), (self.entries, self.complete_bytes))
+
+            with self.log.open("ab") as handle:
+                handle.write(line[20:])
+            second = sync_index(self.log, conn)
+            self.assertEqual((second.mode, second.new_entries), ("incremental", 1))
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM memories WHERE memory_id = 'MEM-PARTIAL'").fetchone()[0], 1)
+            self.assertEqual(sync_index(self.log, conn).mode, "unchanged")
+
+    def assert_index_matches(self, conn: sqlite3.Connection, log: Path) -> None:
+        rows = conn.execute("SELECT memory_id, source_file, byte_offset, byte_length FROM memories ORDER BY rowid").fetchall()
+        self.assertEqual(fetch_entries(log, rows), list(iter_jsonl(log)))
+
+    def test_final_entry_without_newline_is_indexed(self) -> None:
+        self.log.write_bytes(self.log.read_bytes().rstrip(b"\n"))
+        db_path = self.tmp / "index.db"
+        with sqlite3.connect(db_path) as conn:
+            ensure_schema(conn)
+            first = sync_index(self.log, conn)
+            self.assertEqual((first.indexed_entries, first.indexed_bytes), (self.entries, self.log.stat().st_size))
+            self.assertEqual(sync_index(self.log, conn).mode, "unchanged")
+
+        # The appender terminates the open line before writing its own.
+        entry = {**next(iter_jsonl(SHIPPED_LOG)), "memory_id": "MEM-AFTER-OPEN-TAIL"}
+        with MemoryAppender(self.log, db_path) as appender:
+            self.assertEqual(appender.append(entry).index_mode, "incremental")
+
+        with sqlite3.connect(db_path) as conn:
+            meta = read_index_meta(conn)
+            self.assertEqual(meta["indexed_entries"], str(self.entries + 1))
+            self.assertEqual(meta["indexed_lines"], str(self.log.read_bytes().count(b"\n")))
+            self.assertEqual(sync_index(self.log, conn).mode, "unchanged")
+            self.assert_index_matches(conn, self.log)
+
+    def test_shard_final_entry_without_newline_is_reread_once(self) -> None:
+        shard_dir = self.tmp / "memory_log"
+        shard_dir.mkdir()
+        shard = shard_dir / "2026-02.jsonl"
+        shard.write_bytes(self.log.read_bytes().rstrip(b"\n"))
+        with sqlite3.connect(self.tmp / "shards.db") as conn:
+            ensure_schema(conn)
+            self.assertEqual(sync_index(shard_dir, conn).indexed_entries, self.entries)
+
+            entry = next(iter_jsonl(SHIPPED_LOG))
+            with shard.open("ab") as handle:
+                handle.write(b"\n" + json.dumps({**entry, "memory_id": "MEM-SHARD-NEW"}).encode("utf-8") + b"\n")
+            second = sync_index(shard_dir, conn)
+            self.assertEqual((second.new_entries, second.indexed_entries), (1, self.entries + 1))
+            lines = conn.execute("SELECT lines FROM index_shards").fetchone()[0]
+            self.assertEqual(lines, self.entries + 1)
+            self.assert_index_matches(conn, shard_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Tests for memory_appender.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+
+from build_memory_index import fetch_entries, resolve_project_path, sync_index
+from jsonl_stream import iter_jsonl
+from memory_appender import AppendRejected, AppendResult, MemoryAppender, log_lock
+
+SHIPPED_LOG = resolve_project_path("res://ai_library/docs/memory_log.jsonl")
+
+
+def wait_for(condition: Any, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for appender threads")
+        time.sleep(0.005)
+
+
+class MemoryAppenderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.log = self.tmp / "memory_log.jsonl"
+        self.db = self.tmp / "ai_memory_index.db"
+        shutil.copyfile(SHIPPED_LOG, self.log)
+        self.template = next(iter_jsonl(SHIPPED_LOG))
+        self.appender = MemoryAppender(self.log, self.db)
+        self.addCleanup(self.appender.close)
+
+    def entry(self, number: int) -> Dict[str, Any]:
+        return {**self.template, "memory_id": f"MEM-TEST-{number:03d}"}
+
+    def assert_index_matches_log(self) -> None:
+        with sqlite3.connect(self.db) as conn:
+            self.assertEqual(sync_index(self.log, conn).mode, "unchanged")
+            rows = conn.execute("SELECT memory_id, source_file, byte_offset, byte_length FROM memories ORDER BY rowid").fetchall()
+        self.assertEqual(fetch_entries(self.log, rows), list(iter_jsonl(self.log)))
+
+    def test_group_commit_pushes_rows_and_index_stays_in_sync(self) -> None:
+        self.assertEqual(self.appender.append(self.entry(0)).index_mode, "pushed")
+
+        results: Dict[int, AppendResult] = {}
+
+        def append(number: int) -> None:
+            results[number] = self.appender.append(self.entry(number))
+
+        # Hold the log lock so the first writer stalls mid-commit and the rest queue up.
+        threads: List[threading.Thread] = []
+        with log_lock(self.log):
+            threads.append(threading.Thread(target=append, args=(1,)))
+            threads[0].start()
+            wait_for(lambda: self.appender._committing)
+            for number in range(2, 6):
+                threads.append(threading.Thread(target=append, args=(number,)))
+                threads[-1].start()
+            wait_for(lambda: len(self.appender._queue) == 4)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results[1].batch_entries, 1)
+        self.assertEqual({results[number].batch_entries for number in range(2, 6)}, {4})
+        self.assertEqual({result.index_mode for result in results.values()}, {"pushed"})
+        ids = [entry["memory_id"] for entry in iter_jsonl(self.log)]
+        self.assertEqual(ids[-6:-4], ["MEM-TEST-000", "MEM-TEST-001"])
+        self.assertEqual(sorted(ids[-4:]), [f"MEM-TEST-{number:03d}" for number in range(2, 6)])
+        self.assert_index_matches_log()
+
+    def test_duplicate_memory_ids_are_rejected_without_writing(self) -> None:
+        self.appender.append(self.entry(1))
+        size = self.log.stat().st_size
+
+        with self.assertRaises(AppendRejected) as repeated:
+            self.appender.append_many([self.entry(2), self.entry(2)])
+        self.assertIn("repeats entry 1", repeated.exception.errors[0])
+
+        with self.assertRaises(AppendRejected) as indexed:
+            self.appender.append_many([self.entry(3), self.entry(1)])
+        self.assertEqual(indexed.exception.errors, ["memory_id 'MEM-TEST-001' is already in the memory log"])
+
+        with self.assertRaises(AppendRejected):
+            self.appender.append(self.template)
+
+        self.assertEqual(self.log.stat().st_size, size)
+        self.assertEqual(self.appender.append(self.entry(3)).memory_ids, ["MEM-TEST-003"])
+        self.assert_index_matches_log()
+
+    def test_invalid_entry_is_rejected(self) -> None:
+        entry = self.entry(1)
+        del entry["task_id"]
+        size = self.log.stat().st_size
+        with self.assertRaises(AppendRejected):
+            self.appender.append(entry)
+        self.assertEqual(self.log.stat().st_size, size)
+
+
+if __name__ == "__main__":
+    unittest.main()
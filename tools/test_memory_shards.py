@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Tests for memory_shards.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_memory_index import resolve_project_path
+from jsonl_stream import iter_jsonl
+from memory_shards import MANIFEST_NAME, split_log, verify_manifest
+
+SHIPPED_LOG = resolve_project_path("res://ai_library/docs/memory_log.jsonl")
+
+
+class SplitLogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.log = self.tmp / "memory_log.jsonl"
+        self.out_dir = self.tmp / "memory_log"
+
+    def test_final_entry_without_newline_is_kept(self) -> None:
+        self.log.write_bytes(SHIPPED_LOG.read_bytes().rstrip(b"\n"))
+        entries = list(iter_jsonl(self.log))
+
+        manifest = split_log(self.log, self.out_dir)
+
+        self.assertEqual(manifest["total_entries"], len(entries))
+        self.assertEqual(sorted(iter_jsonl(self.out_dir), key=str), sorted(entries, key=str))
+        self.assertEqual(verify_manifest(self.out_dir), [])
+
+    def test_torn_final_line_fails_the_split(self) -> None:
+        self.log.write_bytes(SHIPPED_LOG.read_bytes() + b'{"memory_id":"MEM-TORN","task_')
+        with self.assertRaises(ValueError):
+            split_log(self.log, self.out_dir)
+        self.assertFalse((self.out_dir / MANIFEST_NAME).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
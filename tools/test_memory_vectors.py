@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests for memory_vectors.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from build_memory_index import ensure_schema, resolve_project_path, sync_index
+from memory_vectors import read_header, search_vectors, sync_vectors, vector_lock, vector_path_for
+
+SHIPPED_LOG = resolve_project_path("res://ai_library/docs/memory_log.jsonl")
+QUERY = "player movement InputMap"
+
+
+class MemoryVectorsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.db = self.tmp / "ai_memory_index.db"
+        self.conn = sqlite3.connect(self.db)
+        self.addCleanup(self.conn.close)
+        ensure_schema(self.conn)
+        sync_index(SHIPPED_LOG, self.conn)
+        self.conn.commit()
+
+    def test_stale_generation_returns_no_vector_hits(self) -> None:
+        self.assertEqual(sync_vectors(self.conn), "rebuilt")
+        self.assertTrue(search_vectors(self.conn, QUERY, 5))
+
+        sync_index(SHIPPED_LOG, self.conn, full=True)
+        self.conn.commit()
+        self.assertEqual(search_vectors(self.conn, QUERY, 5), [])
+
+        self.assertEqual(sync_vectors(self.conn), "rebuilt")
+        self.assertTrue(search_vectors(self.conn, QUERY, 5))
+
+    def test_concurrent_refreshes_leave_one_aligned_file(self) -> None:
+        results = []
+
+        def refresh() -> None:
+            with sqlite3.connect(self.db) as conn:
+                results.append(sync_vectors(conn))
+
+        # Hold the lock so every refresher sees the missing file and then queues behind it.
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        with vector_lock(vector_path_for(self.conn)):
+            for thread in threads:
+                thread.start()
+            time.sleep(0.2)
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(sorted(results), ["rebuilt", "unchanged", "unchanged", "unchanged"])
+        total = self.conn.execute("SELECT COUNT(*) FROM memory_fts").fetchone()[0]
+        header = read_header(vector_path_for(self.conn))
+        self.assertEqual(header[2], total)
+        self.assertEqual(sync_vectors(self.conn), "unchanged")
+
+
+if __name__ == "__main__":
+    unittest.main()
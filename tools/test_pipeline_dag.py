@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for pipeline_dag.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import threading
+import unittest
+from typing import List
+
+from pipeline_dag import Step, StepOutcome, run_dag
+
+
+class RecordingRunner:
+    def __init__(self, failing: set[str] = frozenset(), crashing: set[str] = frozenset()) -> None:
+        self.failing = failing
+        self.crashing = crashing
+        self.ran: List[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, step: Step) -> StepOutcome:
+        with self._lock:
+            self.ran.append(step.name)
+        if step.name in self.crashing:
+            raise RuntimeError("runner blew up")
+        ok = step.name not in self.failing
+        return StepOutcome(ok, 0 if ok else 1, f"{step.name} output")
+
+
+def diamond() -> List[Step]:
+    return [
+        Step("lint", "lint"),
+        Step("build", "build", after=["lint"]),
+        Step("docs", "docs", after=["lint"]),
+        Step("package", "package", after=["build", "docs"]),
+        Step("publish", "publish", after=["package"]),
+        Step("audit", "audit"),
+    ]
+
+
+class RunDagTest(unittest.TestCase):
+    def test_all_steps_pass_in_declaration_order(self) -> None:
+        runner = RecordingRunner()
+        report = run_dag(diamond(), runner, max_workers=3)
+        self.assertTrue(report["ok"])
+        self.assertEqual([record["name"] for record in report["steps"]], [step.name for step in diamond()])
+        self.assertEqual({record["status"] for record in report["steps"]}, {"passed"})
+        self.assertLess(runner.ran.index("build"), runner.ran.index("package"))
+        self.assertLess(runner.ran.index("docs"), runner.ran.index("package"))
+
+    def test_failed_step_skips_transitive_dependents_only(self) -> None:
+        runner = RecordingRunner(failing={"build"})
+        report = run_dag(diamond(), runner, max_workers=2)
+        status = {record["name"]: record for record in report["steps"]}
+
+        self.assertFalse(report["ok"])
+        self.assertEqual(status["build"]["status"], "failed")
+        for name in ("package", "publish"):
+            self.assertEqual(status[name]["status"], "skipped")
+            self.assertIsNone(status[name]["code"])
+            self.assertIn("'build' failed", status[name]["output"])
+        for name in ("lint", "docs", "audit"):
+            self.assertEqual(status[name]["status"], "passed")
+        self.assertNotIn("package", runner.ran)
+        self.assertNotIn("publish", runner.ran)
+        self.assertEqual([record["name"] for record in report["steps"]], [step.name for step in diamond()])
+
+    def test_crashing_runner_counts_as_failure(self) -> None:
+        report = run_dag(diamond(), RecordingRunner(crashing={"lint"}))
+        status = {record["name"]: record["status"] for record in report["steps"]}
+        self.assertEqual(status["lint"], "failed")
+        self.assertEqual({status[name] for name in ("build", "docs", "package", "publish")}, {"skipped"})
+        self.assertEqual(status["audit"], "passed")
+
+    def test_cycle_is_rejected_before_anything_runs(self) -> None:
+        steps = [
+            Step("a", "a", after=["c"]),
+            Step("b", "b", after=["a"]),
+            Step("c", "c", after=["b"]),
+            Step("d", "d"),
+        ]
+        runner = RecordingRunner()
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            run_dag(steps, runner)
+        self.assertEqual(runner.ran, [])
+
+    def test_unknown_dependency_and_duplicate_names_are_rejected(self) -> None:
+        with self.assertRaisesRegex(ValueError, "unknown step 'missing'"):
+            run_dag([Step("a", "a", after=["missing"])], RecordingRunner())
+        with self.assertRaisesRegex(ValueError, "unique"):
+            run_dag([Step("a", "a"), Step("a", "a")], RecordingRunner())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests for schema_compiler.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict
+
+import schema_compiler
+from schema_compiler import apply_overlay, load_validator
+
+SCHEMA = {
+    "type": "object",
+    "required": ["task_id"],
+    "properties": {"task_id": {"type": "string"}, "outcome": {"type": "string"}},
+}
+
+
+class LoadValidatorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.cache_dir = self.tmp / "cache"
+        self.schema_path = self.tmp / "schema.json"
+        self.schema_path.write_text(json.dumps(SCHEMA), encoding="utf-8")
+        self.name = f"schema_test_{self.tmp.name}"
+
+    def load(self, overlay: Dict[str, Dict[str, Any]]) -> Any:
+        return load_validator(
+            self.name,
+            [self.schema_path],
+            lambda: apply_overlay(json.loads(self.schema_path.read_text(encoding="utf-8")), overlay),
+            extra_key=json.dumps(overlay, sort_keys=True),
+            cache_dir=self.cache_dir,
+        )
+
+    def test_overlays_of_one_schema_get_their_own_validators(self) -> None:
+        entry = {"task_id": "M1-T01", "outcome": "maybe"}
+        plain = self.load({})
+        strict = self.load({"outcome": {"enum": ["success", "failure"]}})
+
+        self.assertEqual(plain(entry), [])
+        self.assertTrue(strict(entry))
+        self.assertIs(self.load({}), plain)
+        self.assertEqual(len(list(self.cache_dir.glob(f"{self.name}_*.py"))), 2)
+
+    def test_corrupt_cached_module_is_regenerated(self) -> None:
+        self.load({})
+        (module_path,) = self.cache_dir.glob(f"{self.name}_*.py")
+        module_path.write_text("def validate(value:\n", encoding="utf-8")
+        # A fresh process has no in-memory validators and imports the cached file.
+        schema_compiler._LOADED.clear()
+        schema_compiler._MODULE_PATHS.clear()
+
+        validator = self.load({})
+
+        self.assertEqual(validator({"task_id": "M1-T01"}), [])
+        self.assertTrue(validator({}))
+        self.assertNotEqual(module_path.read_text(encoding="utf-8"), "def validate(value:\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for step_cache.py (run with `npm run test:tools`)."""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from pipeline_dag import Step, StepOutcome
+from step_cache import StepCache, cached_runner
+
+
+class StepCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        (self.root / "src.txt").write_text("source v1", encoding="utf-8")
+        self.cache_path = self.root / ".cache" / "steps.json"
+        self.step = Step("bake", "bake src.txt", inputs=["src.txt"], outputs=["out/baked.txt"])
+        self.calls = 0
+        self.fail = False
+
+    def runner(self, step: Step) -> StepOutcome:
+        self.calls += 1
+        if self.fail:
+            return StepOutcome(False, 2, "bake failed")
+        out = self.root / "out" / "baked.txt"
+        out.parent.mkdir(exist_ok=True)
+        out.write_text((self.root / "src.txt").read_text(encoding="utf-8").upper(), encoding="utf-8")
+        return StepOutcome(True, 0, "baked")
+
+    def run_step(self, cache: StepCache) -> StepOutcome:
+        return cached_runner(cache, self.runner)(self.step)
+
+    def test_unchanged_step_replays_and_survives_reload(self) -> None:
+        cache = StepCache(self.root, self.cache_path)
+        self.assertFalse(self.run_step(cache).cached)
+        cache.save()
+
+        replayed = self.run_step(StepCache(self.root, self.cache_path))
+        self.assertTrue(replayed.cached)
+        self.assertEqual((replayed.code, replayed.output), (0, "baked"))
+        self.assertEqual(self.calls, 1)
+
+    def test_failures_are_never_cached(self) -> None:
+        cache = StepCache(self.root, self.cache_path)
+        self.run_step(cache)
+        self.fail = True
+        (self.root / "src.txt").write_text("source version 2", encoding="utf-8")
+
+        self.assertFalse(self.run_step(cache).ok)
+        self.assertNotIn("bake", cache.steps)
+        self.assertFalse(self.run_step(cache).ok)
+        self.assertEqual(self.calls, 3)
+
+        # Restoring the input does not resurrect the pass recorded before the failure.
+        (self.root / "src.txt").write_text("source v1", encoding="utf-8")
+        self.fail = False
+        self.assertFalse(self.run_step(cache).cached)
+        self.assertEqual(self.calls, 4)
+
+    def test_changed_output_misses(self) -> None:
+        cache = StepCache(self.root, self.cache_path)
+        self.run_step(cache)
+        (self.root / "out" / "baked.txt").write_text("hand edited", encoding="utf-8")
+
+        outcome = self.run_step(cache)
+        self.assertFalse(outcome.cached)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual((self.root / "out" / "baked.txt").read_text(encoding="utf-8"), "SOURCE V1")
+
+    def test_deleted_output_and_changed_input_miss(self) -> None:
+        cache = StepCache(self.root, self.cache_path)
+        self.run_step(cache)
+        (self.root / "out" / "baked.txt").unlink()
+        self.assertFalse(self.run_step(cache).cached)
+
+        (self.root / "src.txt").write_text("source version 2", encoding="utf-8")
+        self.assertFalse(self.run_step(cache).cached)
+        self.assertTrue(self.run_step(cache).cached)
+        self.assertEqual(self.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
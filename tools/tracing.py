@@ -0,0 +1,210 @@
+"""
+Lightweight span tracing shared by the tools/ scripts.
+
+`span(name)` (a context manager) and `@traced(name)` record one event per call with wall
+time, CPU time of the calling thread and the process's peak RSS at the end of the span.
+Events go to a process-wide, thread-safe `TRACER`; they can be exported as Chrome
+trace-event JSON (load in chrome://tracing or Perfetto) or aggregated per span name.
+Spans recorded inside worker processes (shard indexing, bulk audit) stay in those
+processes and are not collected.
+
+Every CLI tool accepts `--trace trace.json` and `--profile stats.txt`, handled by
+`run_main()`: the latter wraps the run in cProfile and writes the stats sorted by
+cumulative time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+MAX_EVENTS = 100000
+PROFILE_LINES = 80
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def peak_rss_kib() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak // 1024) if sys.platform == "darwin" else int(peak)
+
+
+@dataclass
+class SpanEvent:
+    name: str
+    start_ns: int
+    wall_ns: int
+    cpu_ns: int
+    peak_rss_kib: Optional[int]
+    pid: int
+    tid: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        self.max_events = max_events
+        self.epoch_ns = time.perf_counter_ns()
+        self.dropped = 0
+        self._events: List[SpanEvent] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; the yielded dict can be filled with extra args for the event."""
+        start = time.perf_counter_ns()
+        cpu_start = time.thread_time_ns()
+        try:
+            yield args
+        finally:
+            event = SpanEvent(
+                name,
+                start - self.epoch_ns,
+                time.perf_counter_ns() - start,
+                time.thread_time_ns() - cpu_start,
+                peak_rss_kib(),
+                os.getpid(),
+                threading.get_ident(),
+                args,
+            )
+            with self._lock:
+                if len(self._events) < self.max_events:
+                    self._events.append(event)
+                else:
+                    self.dropped += 1
+
+    def events(self) -> List[SpanEvent]:
+        with self._lock:
+            return list(self._events)
+
+    def drain(self) -> List[SpanEvent]:
+        """Return and forget the recorded events (for long-running processes)."""
+        with self._lock:
+            events, self._events = self._events, []
+            return events
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **args: Any) -> Any:
+    return TRACER.span(name, **args)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator recording a span around every call of the function."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with TRACER.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def chrome_trace(events: List[SpanEvent]) -> Dict[str, Any]:
+    trace_events = []
+    for event in events:
+        trace_events.append(
+            {
+                "name": event.name,
+                "cat": "tools",
+                "ph": "X",
+                "ts": event.start_ns / 1000,
+                "dur": event.wall_ns / 1000,
+                "pid": event.pid,
+                "tid": event.tid,
+                "args": {
+                    "cpu_ms": round(event.cpu_ns / 1e6, 3),
+                    "peak_rss_kib": event.peak_rss_kib,
+                    **{key: value if isinstance(value, (int, float, str, bool)) else str(value) for key, value in event.args.items()},
+                },
+            }
+        )
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: Path, events: List[SpanEvent]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(chrome_trace(events)), encoding="utf-8")
+
+
+def summarize(events: List[SpanEvent]) -> Dict[str, Dict[str, Any]]:
+    """Per span name: call count, total wall and CPU milliseconds, and the highest peak RSS seen."""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        row = summary.setdefault(event.name, {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_rss_kib": None})
+        row["count"] += 1
+        row["wall_ms"] += event.wall_ns / 1e6
+        row["cpu_ms"] += event.cpu_ns / 1e6
+        if event.peak_rss_kib is not None:
+            row["peak_rss_kib"] = max(row["peak_rss_kib"] or 0, event.peak_rss_kib)
+    for row in summary.values():
+        row["wall_ms"] = round(row["wall_ms"], 3)
+        row["cpu_ms"] = round(row["cpu_ms"], 3)
+    return dict(sorted(summary.items(), key=lambda item: -item[1]["wall_ms"]))
+
+
+def write_profile_stats(profiler: cProfile.Profile, path: Path, limit: int = PROFILE_LINES) -> None:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(limit)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(stream.getvalue(), encoding="utf-8")
+
+
+@contextmanager
+def trace_session(trace_path: Optional[str] = None, profile_path: Optional[str] = None) -> Iterator[None]:
+    """Profile the block with cProfile and/or export the spans it recorded, when paths are given."""
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            write_profile_stats(profiler, Path(profile_path))  # type: ignore[arg-type]
+            print(f"[TRACE] Profile stats: {profile_path}", file=sys.stderr)
+        if trace_path:
+            write_chrome_trace(Path(trace_path), TRACER.events())
+            print(f"[TRACE] Chrome trace: {trace_path}", file=sys.stderr)
+
+
+def add_trace_arguments(parser: argparse.ArgumentParser) -> None:
+    """Document --trace/--profile in a tool's --help; `run_main()` consumes them before main() parses."""
+    parser.add_argument("--trace", metavar="PATH", help="Write recorded spans as Chrome trace-event JSON")
+    parser.add_argument("--profile", metavar="PATH", help="Run under cProfile and write stats sorted by cumulative time")
+
+
+def run_main(main: Callable[[], Any]) -> Any:
+    """Run a tool's main() with --trace/--profile taken from (and removed from) sys.argv."""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--trace")
+    parser.add_argument("--profile")
+    known, rest = parser.parse_known_args(sys.argv[1:])
+    sys.argv[1:] = rest
+    with trace_session(known.trace, known.profile):
+        return main()